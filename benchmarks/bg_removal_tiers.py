@@ -0,0 +1,51 @@
+"""Latency table of background removal per quality tier and source size.
+
+Each tier runs on the first installed model of its candidate list;
+the model and input resolution used are printed with the timings. The
+last column shows the tier picked automatically for each source size.
+
+Usage: python benchmarks/bg_removal_tiers.py [runs]
+"""
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from backend.utils.bg_remover.bg_remover import BgRemover, TIERS
+
+SOURCE_SIZES = ((480, 480), (1600, 1200), (6000, 4000))
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    rng = np.random.default_rng(0)
+    images = {}
+    for width, height in SOURCE_SIZES:
+        base = Image.fromarray(rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8))
+        images[(width, height)] = base.resize((width, height), Image.Resampling.BILINEAR)
+
+    header = "".join(f"{f'{w}x{h}':>14}" for w, h in SOURCE_SIZES)
+    print(f"{'tier':<10}{'model':<18}{'input':>7}{header}")
+    for tier in TIERS:
+        remover = BgRemover(tier)
+        row = ""
+        for size, image in images.items():
+            remover.remove_bg(image)
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                remover.remove_bg(image)
+                timings.append((time.perf_counter() - start) * 1000)
+            row += f"{statistics.median(timings):11.0f} ms"
+        print(f"{tier:<10}{remover._model.file:<18}{remover.input_size:>7}{row}")
+
+    print(f"{'auto':<35}" + "".join(f"{BgRemover.auto_tier(*size):>14}" for size in SOURCE_SIZES))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Time to reach a target file size: manual retries versus the quality search.
+
+The manual workflow is what users did before the target-size mode:
+compress at a quality, save the file, reopen it, check the size and try
+again five points lower. The search encodes candidates in memory only,
+with one or more worker threads.
+
+Usage: python benchmarks/compress_target_size.py [target KB] [format] [width] [height]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from backend.operations.compress import compress_to_size
+
+
+def manual_retries(image: Image.Image, target_size: int, output_format: str, directory: Path) -> tuple:
+    """Save at 85, 80, 75, ... reopening each file, until one fits"""
+    path = directory / f"attempt.{output_format.lower()}"
+    encodes = 0
+    for quality in range(85, 0, -5):
+        image.save(path, format=output_format, quality=quality, optimize=True)
+        encodes += 1
+        with Image.open(path) as saved:
+            saved.load()
+        if path.stat().st_size <= target_size:
+            break
+    return quality, encodes
+
+
+def main():
+    target_size = int(sys.argv[1]) * 1024 if len(sys.argv) > 1 else 1000 * 1024
+    output_format = sys.argv[2].upper() if len(sys.argv) > 2 else "JPEG"
+    width = int(sys.argv[3]) if len(sys.argv) > 3 else 4000
+    height = int(sys.argv[4]) if len(sys.argv) > 4 else 3000
+    rng = np.random.default_rng(0)
+    base = Image.fromarray(rng.integers(0, 256, (height // 10, width // 10, 3), dtype=np.uint8))
+    image = base.resize((width, height), Image.Resampling.BICUBIC)
+    print(f"{width}x{height} {output_format}, target {target_size // 1024} KB")
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        quality, encodes = manual_retries(image, target_size, output_format, Path(directory))
+        print(f"{'manual retries':<20} quality {quality:3d} {encodes:3d} encodes {(time.perf_counter() - start) * 1000:8.0f} ms")
+
+    for workers in (1, 2, 4):
+        start = time.perf_counter()
+        compress_to_size(image, target_size, output_format, workers=workers)
+        print(f"{f'search ({workers} workers)':<20} {(time.perf_counter() - start) * 1000:39.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Encode time and file size of every convert preset, per format.
+
+The same report the convert tool shows, for a photo-like RGB image and
+a transparent RGBA graphic, so the trade-off between the "fast" and the
+"small" presets can be read side by side.
+
+Usage: python benchmarks/convert_presets.py [width] [height] [formats...]
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, features
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from backend.operations.convert import compare_presets
+
+
+def test_images(width: int, height: int) -> dict:
+    rng = np.random.default_rng(0)
+    base = Image.fromarray(rng.integers(0, 256, (height // 10, width // 10, 3), dtype=np.uint8))
+    photo = base.resize((width, height), Image.Resampling.BICUBIC)
+
+    graphic = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(graphic)
+    for i in range(40):
+        x, y = rng.integers(0, width), rng.integers(0, height)
+        radius = int(rng.integers(20, max(21, width // 8)))
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=tuple(int(c) for c in rng.integers(0, 256, 4)))
+    return {"photo (RGB)": photo, "graphic (RGBA)": graphic}
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 1500
+    formats = [format.upper() for format in sys.argv[3:]] or ["JPEG", "PNG", "WEBP"]
+    if "AVIF" in formats and not features.check("avif"):
+        print("AVIF is not supported by this Pillow build; skipping it")
+        formats.remove("AVIF")
+
+    for label, image in test_images(width, height).items():
+        print(f"{label}, {width}x{height}")
+        for format in formats:
+            for entry in compare_presets(image, format):
+                print(f"  {format:<6}{entry['preset']:<10}{entry['ms']:8.0f} ms{entry['bytes'] / 1024:10.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Crop latency against source size: full decode versus region reads.
+
+A fixed crop is taken from uncompressed TIFF scans of growing size.
+"full" is the previous path (decode the whole file, crop, encode the crop
+as PNG); "region" is crop_file, which reads just the crop's pixels and
+keeps the TIFF format. The region column should stay flat. Crops of
+lossless sources (PNG, lossless WebP) are then checked against
+Image.crop, which they must match exactly.
+
+Usage: python benchmarks/crop_region.py [crop size] [runs]
+"""
+import io
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from backend.operations.crop import crop_file
+
+SOURCE_SIZES = ((3000, 2000), (6000, 4000), (12000, 8000))
+
+
+def crop_full(path: Path, box: tuple) -> bytes:
+    with Image.open(path) as image:
+        image.load()
+        buffer = io.BytesIO()
+        image.crop(box).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def check_lossless_sources(directory: Path, rng) -> None:
+    image = Image.fromarray(rng.integers(0, 256, (600, 800, 4), dtype=np.uint8))
+    x, y, width, height = 50, 70, 400, 300
+    for name, options in (("source.png", {}), ("source.webp", {"lossless": True})):
+        path = directory / name
+        image.save(path, **options)
+        data, format = crop_file(path, x, y, width, height)
+        with Image.open(path) as source:
+            expected = np.asarray(source.crop((x, y, x + width, y + height)))
+        cropped = np.asarray(Image.open(io.BytesIO(data)))
+        exact = cropped.shape == expected.shape and np.array_equal(cropped, expected)
+        print(f"{format:>12} crop {'matches Image.crop exactly' if exact else 'DIFFERS from Image.crop'}")
+
+
+def median_ms(func, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    crop_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    rng = np.random.default_rng(0)
+    Image.MAX_IMAGE_PIXELS = None
+    print(f"{crop_size}x{crop_size} crop from the middle of an uncompressed TIFF")
+    print(f"{'source':>12}{'full ms':>10}{'region ms':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for width, height in SOURCE_SIZES:
+            path = Path(directory) / f"scan_{width}x{height}.tif"
+            pixels = np.linspace(0, 200, width, dtype=np.uint8)[None, :, None] + rng.integers(0, 56, (height, 1, 3), dtype=np.uint8)
+            Image.fromarray(pixels).save(path)
+            del pixels
+
+            x, y = (width - crop_size) // 2, (height - crop_size) // 2
+            box = (x, y, x + crop_size, y + crop_size)
+            full = median_ms(lambda: crop_full(path, box), runs)
+            region = median_ms(lambda: crop_file(path, x, y, crop_size, crop_size), runs)
+            print(f"{f'{width}x{height}':>12}{full:10.0f}{region:11.0f}")
+            path.unlink()
+        check_lossless_sources(Path(directory), rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compare thread and process executor backends on a batch of Pillow jobs.
+
+Each task resizes a synthetic photo with Lanczos and encodes it as an
+optimized JPEG, the two GIL-bound steps of the resize and compress tools.
+
+Usage: python benchmarks/executor_backends.py [images] [width] [height]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from backend.jobs.executors import ProcessBackend, ThreadBackend
+from backend.operations.compress import compress_image
+from backend.operations.resize import resize_image
+
+
+def run_batch(backend, images: list, workers: int) -> float:
+    def task(image):
+        resized = backend.run(resize_image, image, image.width // 2, image.height // 2)
+        return backend.run(compress_image, resized, 85, "JPEG")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(task, images))
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+    workers = os.cpu_count() or 1
+
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    image = Image.fromarray(base).resize((width, height), Image.Resampling.BICUBIC)
+    images = [image] * count
+
+    process_backend = ProcessBackend(max_workers=workers)
+    # Start the pool outside the measurement
+    process_backend.run(resize_image, image, 8, 8)
+
+    print(f"{count} images of {width}x{height}, {workers} workers")
+    for backend in (ThreadBackend(), process_backend):
+        elapsed = run_batch(backend, images, workers)
+        print(f"{backend.name:>8}: {elapsed:7.2f} s {count / elapsed:7.2f} images/s")
+    process_backend.shutdown()
+
+
+if __name__ == "__main__":
+    main()
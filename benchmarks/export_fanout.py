@@ -0,0 +1,74 @@
+"""Export of a profile: one job per variant versus one fan-out job.
+
+"separate" is the workflow before export profiles: every width and
+format is its own job that opens and decodes the master, resizes it
+from full size and encodes it. "fan-out" is export_variants, which
+decodes once, resizes each width from the next larger one and encodes
+the variants on worker threads.
+
+Usage: python benchmarks/export_fanout.py [profile] [width] [height] [runs]
+"""
+import io
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, features
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from backend.operations.export import export_variants, LOSSY_FORMATS, PROFILES
+
+
+def separate_jobs(path: Path, profile) -> int:
+    encodes = 0
+    for width in profile.widths:
+        for format in profile.formats:
+            if format == "AVIF" and not features.check("avif"):
+                continue
+            with Image.open(path) as image:
+                image.load()
+                resized = image.resize((width, round(image.height * width / image.width)), Image.Resampling.LANCZOS)
+            options = {"quality": profile.quality} if format in LOSSY_FORMATS else {}
+            resized.save(io.BytesIO(), format=format, **options)
+            encodes += 1
+    return encodes
+
+
+def fan_out(path: Path, profile, workers: int) -> int:
+    with Image.open(path) as image:
+        image.load()
+        return len(export_variants(image, profile, workers=workers))
+
+
+def median_ms(func, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    profile = PROFILES[sys.argv[1] if len(sys.argv) > 1 else "web"]
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 3000
+    runs = int(sys.argv[4]) if len(sys.argv) > 4 else 3
+    rng = np.random.default_rng(0)
+    base = Image.fromarray(rng.integers(0, 256, (height // 10, width // 10, 3), dtype=np.uint8))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "master.jpg"
+        base.resize((width, height), Image.Resampling.BICUBIC).save(path, quality=95)
+        print(f"{width}x{height} JPEG master, widths {profile.widths}, formats {profile.formats}")
+        print(f"{'separate':<22}{median_ms(lambda: separate_jobs(path, profile), runs):8.0f} ms")
+        for workers in (1, 2, 4):
+            print(f"{f'fan-out ({workers} workers)':<22}{median_ms(lambda: fan_out(path, profile, workers), runs):8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare tiled face detection with the old single 320x240 pass.
+
+Recall is measured against a dense reference run (every pyramid level
+down to native resolution), so it shows how many of the faces the model
+can find at all each mode recovers. Pass your own group photos for
+meaningful numbers; without arguments a synthetic 24 MP image is used,
+which only measures latency.
+
+Usage: python benchmarks/face_detection_tiling.py [image ...] [--runs N]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from backend.utils.face_detector.detector import FaceDetector
+
+REFERENCE_MAX_TILES = 1024
+MATCH_IOU = 0.5
+
+
+def single_pass(detector, image):
+    """The previous behaviour: squash the whole image to the model input"""
+    height, width = image.shape[:2]
+    inputs = cv2.resize(image, (detector.INPUT_WIDTH, detector.INPUT_HEIGHT))
+    inputs = ((inputs.astype(np.float32) - 127.0) / 128.0).transpose(2, 0, 1)[None]
+    confidences, boxes = detector._session.run(None, {detector._input_name: inputs})
+    boxes, _, _ = detector._predict(width, height, confidences, boxes, detector._threshold)
+    return boxes
+
+
+def recall(found, reference):
+    if len(reference) == 0:
+        return 1.0
+    if len(found) == 0:
+        return 0.0
+    found = found.astype(np.float32)
+    reference = reference.astype(np.float32)
+    left_top = np.maximum(reference[:, None, :2], found[None, :, :2])
+    right_bottom = np.minimum(reference[:, None, 2:], found[None, :, 2:])
+    overlap = np.clip(right_bottom - left_top, 0, None).prod(axis=2)
+    area_ref = (reference[:, 2:] - reference[:, :2]).prod(axis=1)
+    area_found = (found[:, 2:] - found[:, :2]).prod(axis=1)
+    iou = overlap / (area_ref[:, None] + area_found[None, :] - overlap + 1e-5)
+    return float((iou.max(axis=1) >= MATCH_IOU).mean())
+
+
+def timed(func, runs):
+    result = func()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("images", nargs="*")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.images:
+        images = [(path, np.asarray(Image.open(path).convert("RGB"))) for path in args.images]
+    else:
+        rng = np.random.default_rng(0)
+        base = rng.integers(0, 256, (500, 750, 3), dtype=np.uint8)
+        images = [("synthetic 6000x4000", cv2.resize(base, (6000, 4000), interpolation=cv2.INTER_CUBIC))]
+
+    detector = FaceDetector()
+    modes = [
+        ("single pass", lambda image: single_pass(detector, image)),
+        ("letterbox", lambda image: detector.detect(image, max_tiles=1)[0]),
+        (f"tiled ({FaceDetector.DEFAULT_MAX_TILES})", lambda image: detector.detect(image)[0]),
+    ]
+    for name, image in images:
+        height, width = image.shape[:2]
+        reference = detector.detect(image, max_tiles=REFERENCE_MAX_TILES)[0]
+        windows = len(detector._windows(width, height, FaceDetector.DEFAULT_MAX_TILES))
+        print(f"{name}: {width}x{height}, {len(reference)} faces in reference, {windows} windows")
+        for mode, func in modes:
+            boxes, ms = timed(lambda: func(image), args.runs)
+            print(f"  {mode:>12}: {len(boxes):4d} faces  recall {recall(boxes, reference):5.1%}  {ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Measure face masking latency and memory per face count on a 24 MP image.
+
+Detection is left out; faces are random boxes 1-5% of the image wide.
+Memory is the peak of NumPy allocations made while masking (tracemalloc),
+so an image-sized copy would show as about 72 MB.
+
+Usage: python benchmarks/face_masking.py [runs] [width] [height]
+"""
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from backend.operations.blur_face import mask_faces, MODES
+
+FACE_COUNTS = (1, 10, 100, 500)
+
+
+def previous_mask(image_np, boxes, opacity, color, mask_shape="rectangle", mode="solid"):
+    """The previous compositing: a fresh mask per face and a flat color only"""
+    for box in boxes:
+        x1, y1, x2, y2 = box
+        crop = image_np[y1:y2, x1:x2]
+        mask = np.zeros_like(crop)
+        if mask_shape == "rectangle":
+            cv2.rectangle(mask, (0, 0), (crop.shape[1] - 1, crop.shape[0] - 1), color, -1)
+        else:
+            cv2.circle(mask, (crop.shape[1] // 2, crop.shape[0] // 2), min(crop.shape[:2]) // 2, color, -1)
+        cv2.addWeighted(crop, 1 - opacity, mask, opacity, 0, crop)
+    return image_np
+
+
+def random_boxes(count, width, height, rng):
+    sizes = rng.uniform(0.01, 0.05, count) * width
+    x = rng.uniform(0, width - sizes)
+    y = rng.uniform(0, height - sizes * 1.3)
+    return np.stack([x, y, x + sizes, y + sizes * 1.3], axis=1).astype(int)
+
+
+def measure(func, image, boxes, runs, *args):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(image, boxes, *args)
+        timings.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    func(image, boxes, *args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak / 1e6
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 6000
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 4000
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+    for count in FACE_COUNTS:
+        boxes = random_boxes(count, width, height, rng)
+        print(f"{count} faces:")
+        cases = [("previous solid", previous_mask, "rectangle", "solid")]
+        cases += [(f"{mode} {shape}", mask_faces, shape, mode) for mode in MODES for shape in ("rectangle", "ellipse")]
+        for name, func, shape, mode in cases:
+            ms, mb = measure(func, image, boxes, runs, 1.0, (0, 0, 0), shape, mode)
+            print(f"  {name:>20}: {ms:8.1f} ms  {ms / count:6.2f} ms/face  peak {mb:6.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
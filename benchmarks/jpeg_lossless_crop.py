@@ -0,0 +1,77 @@
+"""Lossless JPEG crop against a pixel-domain round trip.
+
+"round trip" decodes the JPEG, crops and encodes the crop again with the
+source's quantization tables (the crop tool's re-encoding path).
+"lossless" is lossless_crop, which copies the DCT blocks with jpegtran.
+For each, the crop is decoded again and compared with the same region
+of the decoded source.
+
+Usage: python benchmarks/jpeg_lossless_crop.py [width] [height] [runs]
+"""
+import io
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from backend.operations.crop import JPEGTRAN, lossless_crop, mcu_aligned_box, source_encoding
+
+
+def round_trip(path: Path, box: tuple) -> bytes:
+    with Image.open(path) as image:
+        format, params = source_encoding(image)
+        buffer = io.BytesIO()
+        image.crop(box).save(buffer, format=format, **params)
+    return buffer.getvalue()
+
+
+def median_ms(func, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    if JPEGTRAN is None:
+        print("jpegtran is not installed; lossless crops fall back to re-encoding")
+        return
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 6000
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    rng = np.random.default_rng(0)
+    base = Image.fromarray(rng.integers(0, 256, (height // 20, width // 20, 3), dtype=np.uint8))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "photo.jpg"
+        base.resize((width, height), Image.Resampling.BICUBIC).save(path, quality=90)
+        with Image.open(path) as image:
+            source = np.asarray(image)
+            box = mcu_aligned_box(image, width // 4 + 5, height // 4 + 7, width // 2, height // 2)
+        expected = source[box[1]:box[3], box[0]:box[2]].astype(np.int16)
+
+        print(f"{width}x{height} JPEG, crop {box}")
+        for label, crop in (
+            ("round trip", lambda: round_trip(path, box)),
+            ("lossless", lambda: lossless_crop(path, box[0], box[1], box[2] - box[0], box[3] - box[1])[0]),
+        ):
+            ms = median_ms(crop, runs)
+            decoded = np.asarray(Image.open(io.BytesIO(crop()))).astype(np.int16)
+            # Chroma upsampling reads across the crop edge, so compare the interior as well
+            inner = np.abs(decoded - expected)[16:-16, 16:-16]
+            print(
+                f"{label:<12}{ms:8.0f} ms   max error {np.abs(decoded - expected).max():3d}, "
+                f"{inner.max():3d} inside the edge, exact pixels {np.mean(inner == 0) * 100:5.1f}%"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Cost and accuracy of the edge-band matte refinement.
+
+Synthetic shots with a hard-edged disk are matted at 1024x1024 (the
+ground truth downsampled, as the model would see it), upsampled with
+cv2.resize and then refined. The error against the true mask is
+reported inside the edge band. Timings are compared with a guided
+filter over the whole image: the band refinement should grow with the
+disk's perimeter, not with the image area.
+
+Usage: python benchmarks/matte_refinement.py [runs]
+"""
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from backend.utils.bg_remover import matte_refiner
+
+MATTE_SIZE = 1024
+CASES = (
+    # (width, height, disk radius as a fraction of the short side)
+    (3000, 2000, 0.3),
+    (6000, 4000, 0.3),
+    (6000, 4000, 0.15),
+    (6000, 4000, 0.075),
+)
+
+
+def make_case(width: int, height: int, fraction: float, rng):
+    radius = int(min(width, height) * fraction)
+    truth = np.zeros((height, width), dtype=np.uint8)
+    cv2.circle(truth, (width // 2, height // 2), radius, 255, -1, lineType=cv2.LINE_AA)
+    background = rng.integers(40, 90, (height // 16, width // 16, 3), dtype=np.uint8)
+    image = cv2.resize(background, (width, height), interpolation=cv2.INTER_LINEAR)
+    image[truth > 127] = (200, 170, 120)
+    matte = cv2.resize(truth, (MATTE_SIZE, MATTE_SIZE), interpolation=cv2.INTER_AREA)
+    return image, truth, matte, 2 * np.pi * radius
+
+
+def full_guided_filter(image: np.ndarray, alpha: np.ndarray, radius: int) -> np.ndarray:
+    """The same filter over every pixel, with OpenCV box filters"""
+    guide = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY).astype(np.float32) / 255.0
+    source = alpha.astype(np.float32) / 255.0
+    size = (2 * radius + 1, 2 * radius + 1)
+    mean_guide = cv2.boxFilter(guide, -1, size)
+    mean_source = cv2.boxFilter(source, -1, size)
+    covariance = cv2.boxFilter(guide * source, -1, size) - mean_guide * mean_source
+    variance = cv2.boxFilter(guide * guide, -1, size) - mean_guide * mean_guide
+    a = covariance / (variance + matte_refiner.EPS)
+    b = mean_source - a * mean_guide
+    return cv2.boxFilter(a, -1, size) * guide + cv2.boxFilter(b, -1, size)
+
+
+def median_ms(func, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    rng = np.random.default_rng(0)
+    print(f"{'image':>10}{'edge px':>9}{'blocks':>8}{'band ms':>9}{'full ms':>9}{'err before':>12}{'err after':>11}")
+    for width, height, fraction in CASES:
+        image, truth, matte, perimeter = make_case(width, height, fraction, rng)
+        upsampled = cv2.resize(matte, (width, height))
+        radius = max(2, int(round(2 * max(width, height) / MATTE_SIZE)))
+
+        blocks = len(matte_refiner._band_blocks(matte, width, height))
+        band_ms = median_ms(lambda: matte_refiner.refine_matte(image, upsampled.copy(), matte), runs)
+        full_ms = median_ms(lambda: full_guided_filter(image, upsampled, radius), runs)
+
+        refined = matte_refiner.refine_matte(image, upsampled.copy(), matte)
+        band = cv2.dilate(cv2.Canny(truth, 50, 150), np.ones((2 * radius + 1,) * 2, np.uint8)) > 0
+        before = np.abs(upsampled[band].astype(np.int16) - truth[band]).mean()
+        after = np.abs(refined[band].astype(np.int16) - truth[band]).mean()
+        print(f"{f'{width}x{height}':>10}{perimeter:9.0f}{blocks:8d}{band_ms:9.1f}{full_ms:9.1f}{before:12.2f}{after:11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Measure interactive preview latency of each tool on a 24 MP photo.
+
+The image is decoded through the image cache as the app does; the first
+proxy decode is reported separately and every following preview reuses
+it. Tools whose models are not installed are skipped.
+
+Usage: python benchmarks/preview_latency.py [runs] [width] [height]
+"""
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+from PySide6.QtCore import QCoreApplication
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from backend.processors.blur_face_processor import BlurFaceProcessor
+from backend.processors.compress_processor import CompressProcessor
+from backend.processors.convert_processor import ConvertProcessor
+from backend.processors.crop_processor import CropProcessor
+from backend.processors.remove_bg_processor import RemoveBgProcessor
+from backend.processors.resize_processor import ResizeProcessor
+from backend.processors.upscale_processor import UpscaleProcessor
+from backend.utils.image_cache import image_cache
+
+TARGET_MS = 50.0
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 6000
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 4000
+    app = QCoreApplication(sys.argv)
+
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    path = Path(tempfile.mkdtemp()) / "photo.jpg"
+    Image.fromarray(base).resize((width, height), Image.Resampling.BICUBIC).save(path, quality=92)
+
+    start = time.perf_counter()
+    image = image_cache.get(path)
+    print(f"{width}x{height} full decode: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    cases = [
+        (ResizeProcessor, [{"width": width // 2, "height": height // 3}]),
+        (CropProcessor, [{"x": 500, "y": 500, "width": 3000, "height": 2000}]),
+        (CompressProcessor, [{"quality": quality} for quality in (85, 60, 30)]),
+        (ConvertProcessor, [{"format": "WEBP"}]),
+        (BlurFaceProcessor, [{"opacity": 0.8}]),
+        (RemoveBgProcessor, [{"bg_color": "#ffffff"}]),
+        (UpscaleProcessor, [{"scale": 2}]),
+    ]
+    for processor_cls, params_list in cases:
+        processor = processor_cls()
+        processor.set_image(image, str(path))
+        try:
+            # Warm up: proxy decode, model load
+            start = time.perf_counter()
+            processor.render_preview(params_list[0])
+            warmup = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            print(f"{processor_cls.__name__:>18}: skipped ({e})")
+            continue
+
+        timings = []
+        for i in range(runs):
+            start = time.perf_counter()
+            preview = processor.render_preview(params_list[i % len(params_list)])
+            timings.append((time.perf_counter() - start) * 1000)
+
+        p50 = statistics.median(timings)
+        verdict = "ok" if p50 < TARGET_MS else "SLOW"
+        print(
+            f"{processor_cls.__name__:>18}: p50 {p50:6.1f} ms  max {max(timings):6.1f} ms  "
+            f"first {warmup:6.0f} ms  {preview.width()}x{preview.height()}  {verdict}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Peak memory of resizing a large scan: full decode versus band streaming.
+
+Writes a synthetic uncompressed scan as a PPM file a few rows at a time,
+then resizes it in a fresh process per variant and reports that
+process's peak RSS. "full" is the previous path (decode everything, then
+Image.resize); "bands" is resize_file with the given memory budget.
+
+Usage: python benchmarks/resize_memory.py [width] [height] [budget MB]
+"""
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+OUTPUT_SIZE = (3000, 2000)
+
+
+def write_scan(path: Path, width: int, height: int) -> None:
+    """Gradient with noise, written band by band so generating it stays small too"""
+    rng = np.random.default_rng(0)
+    columns = np.linspace(0, 200, width, dtype=np.float32)
+    with open(path, "wb") as f:
+        f.write(f"P6\n{width} {height}\n255\n".encode())
+        for top in range(0, height, 256):
+            rows = min(256, height - top)
+            band = np.empty((rows, width, 3), dtype=np.uint8)
+            band[...] = (columns[None, :, None] + rng.integers(0, 56, (rows, 1, 3))).astype(np.uint8)
+            f.write(band.tobytes())
+
+
+def child(variant: str, path: str, budget: int) -> None:
+    from PIL import Image
+    from backend.operations.resize import resize_file
+
+    Image.MAX_IMAGE_PIXELS = None
+    start = time.perf_counter()
+    if variant == "full":
+        with Image.open(path) as image:
+            image.load()
+            image.resize(OUTPUT_SIZE, Image.Resampling.LANCZOS)
+    else:
+        resize_file(path, *OUTPUT_SIZE, memory_budget=budget)
+    print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 16000
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 12000
+    budget = (int(sys.argv[3]) if len(sys.argv) > 3 else 128) << 20
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "scan.ppm"
+        write_scan(path, width, height)
+        print(f"{width}x{height} RGB scan ({width * height * 3 / 2**20:.0f} MB decoded) to {OUTPUT_SIZE[0]}x{OUTPUT_SIZE[1]}")
+        for variant in ("full", "bands"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", variant, str(path), str(budget)],
+                check=True, capture_output=True, text=True
+            ).stdout.split()
+            seconds, peak_kb = float(output[-2]), int(output[-1])
+            label = variant if variant == "full" else f"bands ({budget >> 20} MB)"
+            print(f"{label:<16} peak RSS {peak_kb / 1024:8.0f} MB {seconds:8.2f} s")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        main()
@@ -0,0 +1,64 @@
+"""Compare tile-at-a-time upscaling with batched tile inference.
+
+Usage: python benchmarks/upscale_batching.py [width] [height]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from backend.utils.upscaler.upscaler import Upscaler
+
+
+def upscale_tile_loop(upscaler: Upscaler, image: np.ndarray) -> None:
+    """The original implementation: one session call per 128x128 tile"""
+    tile_size = Upscaler.TILE_SIZE
+    h0, w0 = image.shape[:2]
+    h, w = -(-h0 // tile_size) * tile_size, -(-w0 // tile_size) * tile_size
+    padded = np.zeros((h, w, 3), dtype=np.uint8)
+    padded[:h0, :w0] = image
+    scale = 4
+    output = np.zeros((h * scale, w * scale, 3), dtype=np.uint8)
+    for y in range(0, h, tile_size):
+        for x in range(0, w, tile_size):
+            tile = padded[y:y + tile_size, x:x + tile_size]
+            inputs = np.transpose(tile, (2, 0, 1))[np.newaxis].astype(np.float32) / 255.0
+            result = upscaler._session.run(None, {upscaler._input_name: inputs})[0]
+            result = np.transpose(result[0], (1, 2, 0))
+            result = (result * 255.0).clip(0, 255).astype(np.uint8)
+            output[y * scale:(y + tile_size) * scale, x * scale:(x + tile_size) * scale] = result
+    Image.fromarray(output[:h0 * scale, :w0 * scale])
+
+
+def measure(label: str, func, megapixels: float, repeat: int = 3) -> None:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"{label:<24} {best * 1000:10.1f} ms {best / megapixels:10.3f} s/MP")
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 768
+    rng = np.random.default_rng(0)
+    array = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    image = Image.fromarray(array)
+    megapixels = width * height / 1e6
+
+    upscaler = Upscaler()
+    print(f"Input {width}x{height} ({megapixels:.2f} MP), auto batch size {upscaler.auto_batch_size()}")
+    measure("tile loop (batch 1)", lambda: upscale_tile_loop(upscaler, array), megapixels)
+    for batch_size in (1, 4, 8, 16, None):
+        label = f"batched ({batch_size or 'auto'})"
+        measure(label, lambda: upscaler.upscale(image, batch_size=batch_size, overlap=0), megapixels)
+
+
+if __name__ == "__main__":
+    main()
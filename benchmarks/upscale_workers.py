@@ -0,0 +1,42 @@
+"""Measure how upscaling throughput scales with the number of tile workers.
+
+Usage: python benchmarks/upscale_workers.py [width] [height]
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from backend.utils.upscaler.upscaler import Upscaler
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 768
+    rng = np.random.default_rng(0)
+    image = Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+    megapixels = width * height / 1e6
+    cpu_count = os.cpu_count() or 1
+
+    print(f"Input {width}x{height} ({megapixels:.2f} MP), {cpu_count} CPUs")
+    print(f"{'workers':>8} {'ms':>10} {'MP/s':>8} {'speedup':>8}")
+    baseline = None
+    workers = 1
+    while workers <= cpu_count:
+        upscaler = Upscaler(workers=workers)
+        upscaler.upscale(image)  # warm up
+        start = time.perf_counter()
+        upscaler.upscale(image)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed * 1000:>10.1f} {megapixels / elapsed:>8.2f} {baseline / elapsed:>8.2f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 import os
 import json
+import uuid
 
-from PySide6.QtCore import QObject, Slot, QUrl, Signal, Property
 from PIL import Image
+from PySide6.QtCore import QObject, Slot, QUrl, Signal, Property, QTimer
 from .models.tool_model import ToolModel
 from .processors.resize_processor import ResizeProcessor
 from .processors.crop_processor import CropProcessor
@@ -11,6 +12,10 @@ from .processors.convert_processor import ConvertProcessor
 from .processors.blur_face_processor import BlurFaceProcessor
 from .processors.remove_bg_processor import RemoveBgProcessor
 from .processors.upscale_processor import UpscaleProcessor
+from .jobs.job_manager import JobManager
+from .utils.model_registry import model_registry
+from .utils.image_cache import image_cache
+from .image_provider import ImageProvider
 
 class AppController(QObject):
     # Signals for the UI
@@ -19,9 +24,15 @@ class AppController(QObject):
     processingProgress = Signal(float)  # progress
     processingCompleted = Signal(str)  # result url
     processingFailed = Signal(str)  # error message
+    processingCancelled = Signal()
+    previewReady = Signal(str)  # preview url
     processedImageInfoChanged = Signal()
     processorChanged = Signal(str)
     loadedImageInfoChanged = Signal()
+    presetReportStarted = Signal()
+    presetReportReady = Signal(str)  # JSON list of {preset, bytes, ms}
+    presetReportFailed = Signal(str)  # error message
+    presetReportCancelled = Signal()
 
     # Map tool IDs to processor classes
     PROCESSOR_MAP = {
@@ -37,6 +48,7 @@ class AppController(QObject):
     def __init__(self):
         super().__init__()
         self._image = None
+        self._image_path = None
         self._loaded_image_info = {
             'width': 0,
             'height': 0,
@@ -48,6 +60,13 @@ class AppController(QObject):
             'size': '0 KB'
         }
         
+        # Full decodes of loaded files run here, off the GUI thread
+        self._decode_jobs = JobManager()
+        self._decode_jobs.jobCompleted.connect(self._on_image_decoded)
+
+        # Serves previews to QML without writing them to disk
+        self._image_provider = ImageProvider()
+
         # Initialize processors
         self._current_processor = None
         self._processors = {}
@@ -56,14 +75,31 @@ class AppController(QObject):
             processor_cls = self.PROCESSOR_MAP.get(processor_name)
             if processor_cls:
                 self._processors[processor_name] = processor_cls()
+                self._processors[processor_name].set_image_provider(self._image_provider)
         
         # Connect processor signals
         for processor in self._processors.values():
             processor.processingStarted.connect(self.processingStarted)
             processor.processingProgress.connect(self.processingProgress)
-            processor.processingCompleted.connect(self._on_processing_completed)
+            processor.processingCompleted.connect(lambda url, processor=processor: self._on_processing_completed(processor, url))
             processor.processingFailed.connect(self.processingFailed)
+            processor.processingCancelled.connect(self.processingCancelled)
+            processor.previewReady.connect(lambda image, processor=processor: self._on_preview_ready(processor, image))
+            if isinstance(processor, ConvertProcessor):
+                processor.presetReportStarted.connect(self.presetReportStarted)
+                processor.presetReportReady.connect(self.presetReportReady)
+                processor.presetReportFailed.connect(self.presetReportFailed)
+                processor.presetReportCancelled.connect(self.presetReportCancelled)
+
+        # Return memory held by models that have not been used for a while
+        self._model_eviction_timer = QTimer(self)
+        self._model_eviction_timer.timeout.connect(model_registry.evict_idle)
+        self._model_eviction_timer.start(60 * 1000)
     
+    @property
+    def image_provider(self) -> ImageProvider:
+        return self._image_provider
+
     @Property("QVariant", notify=loadedImageInfoChanged)
     def loadedImageInfo(self):
         return self._loaded_image_info
@@ -72,29 +108,39 @@ class AppController(QObject):
     def processedImageInfo(self):
         return self._processed_image_info
 
-    def _on_processing_completed(self, result_url):
+    @staticmethod
+    def _format_size(size_bytes: int) -> str:
+        return "%.1f KB" % (size_bytes / 1024) if size_bytes < 1024 * 1024 else "%.1f MB" % (size_bytes / (1024 * 1024))
+
+    def _on_processing_completed(self, processor, result_url):
         """Update processed image info and emit completion signal"""
+        if not result_url or processor.result is None:
+            return
         try:
-            # Get processed image info
-            path = QUrl(result_url).toLocalFile()
-            if os.path.exists(path):
-                print(f"Processing completed. Path: {path}")
-                img = Image.open(path)
-                size_bytes = os.path.getsize(path)
-                size_text = "%.1f KB" % (size_bytes / 1024) if size_bytes < 1024 * 1024 else "%.1f MB" % (size_bytes / (1024 * 1024))
-                
-                self._processed_image_info = {
-                    'width': img.width,
-                    'height': img.height,
-                    'size': size_text
-                }
-                self.processedImageInfoChanged.emit()
-                
-                # Emit completion with result URL
-                self.processingCompleted.emit(result_url)
+            # Read the info from the in-memory result; nothing is on disk until it is saved
+            result = processor.result
+            print(f"Processing completed. URL: {result_url}")
+            width, height = result.size
+            size_bytes = result.size_bytes
+            
+            self._processed_image_info = {
+                'width': width,
+                'height': height,
+                # Only encoded results have a file size before saving
+                'size': self._format_size(size_bytes) if size_bytes is not None else "—"
+            }
+            self.processedImageInfoChanged.emit()
+            
+            # Emit completion with result URL
+            self.processingCompleted.emit(result_url)
         except Exception as e:
             self.processingFailed.emit(f"Failed to get processed image info: {str(e)}")
 
+    def _on_preview_ready(self, processor, image):
+        # Previews that arrive after switching tools are stale
+        if processor is self._current_processor:
+            self.previewReady.emit(self._image_provider.add(image, "preview"))
+
     @Slot(str)
     def setProcessor(self, tool_id: str):
         """Set the current processor"""
@@ -110,7 +156,7 @@ class AppController(QObject):
             # Share current image with new processor if one is loaded
             if self._image:
                 print(f"Sharing image with {processor_name} processor")
-                self._current_processor.set_image(self._image)
+                self._current_processor.set_image(self._image, self._image_path)
         else:
             print(f"Warning: Unknown processor {processor_name}")
             self._current_processor = None
@@ -123,14 +169,18 @@ class AppController(QObject):
         
         if os.path.exists(path):
             try:
+                # Only the header is read here, so large scans do not block the UI. The
+                # cache decodes the file in the background and every tool then shares
+                # that decode; a job started before it is ready decodes the file itself
                 self._image = Image.open(path)
+                self._image_path = path
                 print(f"Image loaded successfully. Size: {self._image.size}")
+                self._decode_jobs.submit_job(f"decode_{uuid.uuid4()}", self._decode_image_job, path, supersede=True)
                 
-                self._current_processor.set_image(self._image)
+                self._current_processor.set_image(self._image, self._image_path)
                 
                 # Calculate size
-                size_bytes = os.path.getsize(path)
-                size_text = "%.1f KB" % (size_bytes / 1024) if size_bytes < 1024 * 1024 else "%.1f MB" % (size_bytes / (1024 * 1024))
+                size_text = self._format_size(os.path.getsize(path))
                 
                 # Emit loaded signal
                 self._loaded_image_info = {
@@ -148,6 +198,20 @@ class AppController(QObject):
             print(f"File not found: {path}")
         return ""
 
+    @staticmethod
+    def _decode_image_job(job, path: str):
+        return path, image_cache.get(path)
+
+    @Slot(str, object)
+    def _on_image_decoded(self, job_id: str, result):
+        path, image = result
+        # A file opened since then has replaced this one
+        if path != self._image_path:
+            return
+        self._image = image
+        if self._current_processor:
+            self._current_processor.set_image(image, path)
+
     @Slot(int, int)
     def resizeImage(self, width, height):
         """Resize the loaded image"""
@@ -159,54 +223,74 @@ class AppController(QObject):
         self._current_processor.resize_image(width, height)
         return ""
     
-    @Slot(int, int, int, int)
-    def cropImage(self, x, y, width, height):
-        """Crop the loaded image"""
+    @Slot(int, int, int, int, bool)
+    def cropImage(self, x, y, width, height, lossless: bool = False):
+        """Crop the loaded image; ``lossless`` keeps JPEG data as is, snapping the box to its blocks"""
         if not self._image:
             self.processingFailed.emit("No image loaded")
             return ""
         
-        self._current_processor.crop_image(x, y, width, height)
+        self._current_processor.crop_image(x, y, width, height, lossless)
         return ""
 
-    @Slot(int)
-    def compressImage(self, quality: int):
-        """Compress the loaded image"""
+    @Slot(int, int)
+    def compressImage(self, quality: int, target_kb: int = 0):
+        """Compress the loaded image; a target size in KB overrides the quality"""
         if not self._image:
             self.processingFailed.emit("No image loaded")
             return ""
         
-        self._current_processor.compress_image(quality)
+        self._current_processor.compress_image(quality, target_kb * 1024)
         return ""
     
+    @Slot(str, str)
+    def convertImage(self, format: str, preset: str = "balanced"):
+        """Convert the loaded image with an encoder preset (fast, balanced or small)"""
+        if not self._image:
+            self.processingFailed.emit("No image loaded")
+            return ""
+        
+        self._current_processor.convert_image(format, preset)
+        return ""
+
     @Slot(str)
-    def convertImage(self, format: str):
-        """Convert the loaded image"""
+    def comparePresets(self, format: str):
+        """Encode the loaded image with every preset; the report arrives via presetReportReady"""
+        if not self._image:
+            self.presetReportFailed.emit("No image loaded")
+            return ""
+        
+        self._current_processor.compare_presets(format)
+        return ""
+
+    @Slot(str, str)
+    def exportImage(self, profile: str, folder_url: str):
+        """Export the loaded image at every width and format of a profile, with a manifest"""
         if not self._image:
             self.processingFailed.emit("No image loaded")
             return ""
         
-        self._current_processor.convert_image(format)
+        self._current_processor.export_image(profile, QUrl(folder_url).toLocalFile())
         return ""
     
-    @Slot(float, str, str)
-    def blurFaces(self, opacity: float = 0.5, mask_color: str = "#3b82f6", mask_shape: str = "rectangle"):
+    @Slot(float, str, str, str)
+    def blurFaces(self, opacity: float = 0.5, mask_color: str = "#3b82f6", mask_shape: str = "rectangle", mode: str = "solid"):
         """Blur the loaded image"""
         if not self._image:
             self.processingFailed.emit("No image loaded")
             return ""
         
-        self._current_processor.blur_faces(opacity, mask_color, mask_shape)
+        self._current_processor.blur_faces(opacity, mask_color, mask_shape, mode)
         return ""
     
-    @Slot(str, bool)
-    def removeBgImage(self, bg_color: str = "#ffffff", crop: bool = False):
-        """Remove background from the loaded image"""
+    @Slot(str, bool, str)
+    def removeBgImage(self, bg_color: str = "#ffffff", crop: bool = False, tier: str = ""):
+        """Remove background from the loaded image; an empty tier picks one from the image size"""
         if not self._image:
             self.processingFailed.emit("No image loaded")
             return ""
         
-        self._current_processor.remove_bg(bg_color, crop)
+        self._current_processor.remove_bg(bg_color, crop, tier or None)
         return ""
     
     @Slot(int)
@@ -219,10 +303,22 @@ class AppController(QObject):
         self._current_processor.upscale_image(scale)
         return ""
 
+    @Slot("QVariantMap")
+    def requestPreview(self, params):
+        """Render a quick preview of the current tool with the given parameters"""
+        if self._image and self._current_processor:
+            self._current_processor.request_preview(params)
+
+    @Slot()
+    def cancelProcessing(self):
+        """Cancel the running operation of the current processor"""
+        if self._current_processor:
+            self._current_processor.cancel()
+
     @Slot(str)
     def saveImage(self, file_url):
         """Save the processed image to the specified location"""
-        if not self._current_processor._image:
+        if not self._current_processor or self._current_processor.result is None:
             self.processingFailed.emit("No image to save")
             return
         
@@ -235,6 +331,7 @@ class AppController(QObject):
     def __del__(self):
         """Cleanup on deletion"""
         if hasattr(self, '_processors'):
-            # for processor in self._processors.values():
-            #     processor.cleanup_temp_files()
-            pass
\ No newline at end of file
+            for processor in self._processors.values():
+                processor.cleanup_temp_files()
+        model_registry.clear()
+        image_cache.clear()
\ No newline at end of file
@@ -0,0 +1,69 @@
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Union
+from PIL import Image
+from PySide6.QtCore import QSize, Qt
+from PySide6.QtGui import QImage
+from PySide6.QtQuick import QQuickImageProvider
+from .operations.pipeline import PipelineResult
+
+
+def to_qimage(image: Image.Image) -> QImage:
+    """Copy a PIL image into a QImage"""
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+    format = QImage.Format_RGBA8888 if image.mode == "RGBA" else QImage.Format_RGB888
+    data = image.tobytes()
+    bytes_per_line = image.width * len(image.getbands())
+    # QImage does not own ``data``; copy before it goes out of scope
+    return QImage(data, image.width, image.height, bytes_per_line, format).copy()
+
+
+class ImageProvider(QQuickImageProvider):
+    """In-memory store serving images to QML as ``image://luma/<id>`` URLs.
+
+    Processing results are stored as they are and only converted to a
+    QImage when QML requests them, so nothing is encoded or written to
+    disk. The most recent ``max_images`` entries of each prefix are kept,
+    so a burst of previews never pushes out the result being shown.
+    """
+
+    NAME = "luma"
+
+    def __init__(self, max_images: int = 4):
+        super().__init__(QQuickImageProvider.ImageType.Image)
+        self._max_images = max_images
+        self._images = {}  # prefix -> OrderedDict of id -> image
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def add(self, image: Union[QImage, Image.Image, PipelineResult], prefix: str = "image") -> str:
+        """Store an image or processing result and return the URL QML can load it from"""
+        image_id = f"{prefix}_{next(self._ids)}"
+        with self._lock:
+            images = self._images.setdefault(prefix, OrderedDict())
+            images[image_id] = image
+            while len(images) > self._max_images:
+                images.popitem(last=False)
+        return f"image://{self.NAME}/{image_id}"
+
+    def get(self, image_id: str):
+        prefix = image_id.rsplit("_", 1)[0]
+        with self._lock:
+            return self._images.get(prefix, {}).get(image_id)
+
+    def requestImage(self, image_id: str, size: QSize, requested_size: QSize) -> QImage:
+        image = self.get(image_id)
+        if image is None:
+            return QImage()
+        if isinstance(image, PipelineResult):
+            image = image.image
+        if isinstance(image, Image.Image):
+            image = to_qimage(image)
+
+        size.setWidth(image.width())
+        size.setHeight(image.height())
+        if requested_size.isValid() and not requested_size.isEmpty():
+            return image.scaled(requested_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        return image
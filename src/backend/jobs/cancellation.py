@@ -0,0 +1,24 @@
+import threading
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once its cancellation token has been triggered"""
+
+
+class CancellationToken:
+    """Cooperative cancellation flag checked by long-running operations"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    def raise_if_cancelled(self) -> None:
+        """Abort the current operation if the job was cancelled"""
+        if self._event.is_set():
+            raise JobCancelled()
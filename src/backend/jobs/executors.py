@@ -0,0 +1,229 @@
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from multiprocessing import shared_memory
+from typing import Callable, Optional
+from PIL import Image
+from .cancellation import CancellationToken, JobCancelled
+
+
+class SharedImage:
+    """Picklable handle to an image whose pixels live in shared memory.
+
+    Only the name, mode and size cross the process boundary; the pixel data
+    is written once into a shared memory block and read from there.
+    """
+
+    def __init__(self, name: str, nbytes: int, mode: str, size: tuple, format: Optional[str] = None, palette: Optional[list] = None):
+        self.name = name
+        self.nbytes = nbytes
+        self.mode = mode
+        self.size = size
+        self.format = format
+        self.palette = palette
+
+    @classmethod
+    def from_image(cls, image: Image.Image) -> tuple:
+        """Copy an image into a new shared memory block; returns (handle, block)"""
+        data = image.tobytes()
+        block = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        block.buf[:len(data)] = data
+        palette = image.getpalette() if image.mode == "P" else None
+        return cls(block.name, len(data), image.mode, image.size, image.format, palette), block
+
+    def to_image(self) -> Image.Image:
+        """Read the pixels back into a regular image"""
+        block = shared_memory.SharedMemory(name=self.name)
+        try:
+            with block.buf[:self.nbytes] as data:
+                image = Image.frombytes(self.mode, self.size, data)
+        finally:
+            block.close()
+        if self.palette is not None:
+            image.putpalette(self.palette)
+        image.format = self.format
+        return image
+
+
+class _SharedFlagToken(CancellationToken):
+    """Cancellation token backed by one byte of shared memory set by the parent"""
+
+    def __init__(self, name: str):
+        super().__init__()
+        self._block = shared_memory.SharedMemory(name=name)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._block.buf[0] != 0
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise JobCancelled()
+
+    def close(self) -> None:
+        self._block.close()
+
+
+class ThreadBackend:
+    """Runs operations inline on the scheduler thread that owns the job"""
+
+    name = "thread"
+
+    def run(self,
+        func: Callable,
+        *args,
+        cancel_token: Optional[CancellationToken] = None,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        **kwargs
+    ):
+        return func(*args, cancel_token=cancel_token, progress_callback=progress_callback, **kwargs)
+
+
+# Set in each worker process by the pool initializer
+_progress_queue = None
+
+
+def _init_worker(progress_queue) -> None:
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _run_in_worker(func: Callable, task_id: int, flag_name: str, args: tuple, kwargs: dict):
+    """Entry point in the worker process: rebuild images, run, share the result"""
+    token = _SharedFlagToken(flag_name)
+    try:
+        args = tuple(arg.to_image() if isinstance(arg, SharedImage) else arg for arg in args)
+        progress_callback = lambda progress: _progress_queue.put((task_id, progress))
+        result = func(*args, cancel_token=token, progress_callback=progress_callback, **kwargs)
+
+        if isinstance(result, Image.Image):
+            handle, block = SharedImage.from_image(result)
+            block.close()
+            return handle
+        return result
+    finally:
+        token.close()
+
+
+class ProcessBackend:
+    """Runs operations in a pool of worker processes.
+
+    Meant for GIL-bound Pillow/NumPy work. Image arguments and image results
+    travel through shared memory instead of being pickled, progress comes
+    back over a queue, and cancellation is signalled through a shared flag.
+    The operation must be a module-level function accepting ``cancel_token``
+    and ``progress_callback`` keyword arguments.
+    """
+
+    name = "process"
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self._max_workers = max_workers or max(1, (os.cpu_count() or 1) - 1)
+        self._executor = None
+        self._progress_queue = None
+        self._progress_callbacks = {}
+        self._task_ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                return
+            # Spawn rather than fork: the parent runs Qt and onnxruntime threads
+            context = multiprocessing.get_context("spawn")
+            self._progress_queue = context.Queue()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self._progress_queue,)
+            )
+            threading.Thread(target=self._drain_progress, name="process-progress", daemon=True).start()
+
+    def _drain_progress(self) -> None:
+        while True:
+            try:
+                task_id, progress = self._progress_queue.get()
+            except (EOFError, OSError):
+                return
+            callback = self._progress_callbacks.get(task_id)
+            if callback:
+                callback(progress)
+
+    def run(self,
+        func: Callable,
+        *args,
+        cancel_token: Optional[CancellationToken] = None,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        **kwargs
+    ):
+        """Run ``func`` in a worker process and block until it finishes"""
+        self._ensure_started()
+        task_id = next(self._task_ids)
+        blocks = []
+        flag = shared_memory.SharedMemory(create=True, size=1)
+        flag.buf[0] = 0
+        blocks.append(flag)
+        try:
+            shared_args = []
+            for arg in args:
+                if isinstance(arg, Image.Image):
+                    handle, block = SharedImage.from_image(arg)
+                    blocks.append(block)
+                    arg = handle
+                shared_args.append(arg)
+
+            if progress_callback:
+                self._progress_callbacks[task_id] = progress_callback
+            future = self._executor.submit(_run_in_worker, func, task_id, flag.name, tuple(shared_args), kwargs)
+
+            while True:
+                try:
+                    result = future.result(timeout=0.05)
+                    break
+                except TimeoutError:
+                    if cancel_token is not None and cancel_token.cancelled:
+                        flag.buf[0] = 1
+
+            if isinstance(result, SharedImage):
+                # Attach so the block is unlinked below once it has been read
+                blocks.append(shared_memory.SharedMemory(name=result.name))
+                result = result.to_image()
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            return result
+        finally:
+            self._progress_callbacks.pop(task_id, None)
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name: str):
+    """Return the shared executor backend called ``name`` ("thread" or "process")"""
+    with _backends_lock:
+        if name not in _backends:
+            if name == ThreadBackend.name:
+                _backends[name] = ThreadBackend()
+            elif name == ProcessBackend.name:
+                _backends[name] = ProcessBackend()
+            else:
+                raise ValueError(f"Unknown executor backend: {name}")
+        return _backends[name]
+
+
+def cpu_bound_backend() -> str:
+    """Backend to use for GIL-bound work; processes only pay off with several cores"""
+    return ProcessBackend.name if (os.cpu_count() or 1) > 1 else ThreadBackend.name
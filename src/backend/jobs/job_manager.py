@@ -1,14 +1,19 @@
-from concurrent.futures import ThreadPoolExecutor
 from PySide6.QtCore import QObject, Signal
-from typing import Any, Callable
+from typing import Any, Callable, Optional
+import threading
 import traceback
+from .cancellation import CancellationToken
+from .scheduler import JobScheduler, Priority, scheduler
+from .executors import get_backend
 
 class Job:
-    def __init__(self, job_id: str, func: Callable, *args, **kwargs):
+    def __init__(self, job_id: str, func: Callable, *args, priority: int = Priority.NORMAL, **kwargs):
         self.id = job_id
         self.func = func
         self.args = args
         self.kwargs = kwargs
+        self.priority = priority
+        self.token = CancellationToken()
         self.progress = 0
         self.result = None
         self.error = None
@@ -18,44 +23,101 @@ class JobManager(QObject):
     jobProgress = Signal(str, float)  # job_id, progress (0-1)
     jobCompleted = Signal(str, object)  # job_id, result
     jobFailed = Signal(str, str)  # job_id, error_message
+    jobCancelled = Signal(str)  # job_id
 
-    def __init__(self):
+    def __init__(self, job_scheduler: Optional[JobScheduler] = None, backend: str = "thread"):
         super().__init__()
-        self._executor = None
+        self._scheduler = job_scheduler or scheduler
+        self._backend = get_backend(backend)
         self._active_jobs = {}
+        self._lock = threading.Lock()
 
-    def submit_job(self, job_id: str, func: Callable, *args, **kwargs) -> None:
-        """Submit a job to be executed in a separate thread"""
-        job = Job(job_id, func, *args, **kwargs)
-        self._active_jobs[job_id] = job
-        
-        def _wrapped_func():
-            try:
-                self.jobStarted.emit(job_id)
-                result = job.func(*job.args, **job.kwargs)
-                job.result = result
-                self.jobCompleted.emit(job_id, result)
-            except Exception as e:
-                error_msg = f"Error in job {job_id}: {str(e)}\n{traceback.format_exc()}"
+    def submit_job(self,
+        job_id: str,
+        func: Callable,
+        *args,
+        priority: int = Priority.NORMAL,
+        supersede: bool = False,
+        **kwargs
+    ) -> Job:
+        """Queue a job on the shared scheduler.
+
+        The job function is called as ``func(job, *args, **kwargs)`` so it can
+        check ``job.token`` and report progress for ``job.id``. With
+        ``supersede`` every job still queued or running on this manager is
+        cancelled first.
+        """
+        if supersede:
+            self.cancel_all()
+
+        job = Job(job_id, func, *args, priority=priority, **kwargs)
+        with self._lock:
+            self._active_jobs[job_id] = job
+        self._scheduler.submit(priority, lambda: self._run_job(job))
+        return job
+
+    def _run_job(self, job: Job) -> None:
+        try:
+            # Cancelled while waiting in the queue
+            if job.token.cancelled:
+                return
+
+            self.jobStarted.emit(job.id)
+            result = job.func(job, *job.args, **job.kwargs)
+
+            # A stale result must not replace the one the user asked for next
+            job.token.raise_if_cancelled()
+            job.result = result
+            self.jobCompleted.emit(job.id, result)
+        except Exception as e:
+            # Errors raised while unwinding a cancelled job are not failures
+            if not job.token.cancelled:
+                error_msg = f"Error in job {job.id}: {str(e)}\n{traceback.format_exc()}"
                 job.error = error_msg
-                self.jobFailed.emit(job_id, error_msg)
-            finally:
-                if job_id in self._active_jobs:
-                    del self._active_jobs[job_id]
+                self.jobFailed.emit(job.id, error_msg)
+        finally:
+            with self._lock:
+                if self._active_jobs.get(job.id) is job:
+                    del self._active_jobs[job.id]
+
+    def set_backend(self, backend: str) -> None:
+        """Switch the executor backend used by ``execute`` ("thread" or "process")"""
+        self._backend = get_backend(backend)
 
-        if self._executor is None:
-            self._executor = ThreadPoolExecutor(max_workers=2)
-        self._executor.submit(_wrapped_func)
+    def execute(self, job: Job, func: Callable, *args, **kwargs) -> Any:
+        """Run an operation for ``job`` on this manager's executor backend.
+
+        ``func`` must accept ``cancel_token`` and ``progress_callback``; they
+        are wired to the job's token and to ``update_progress``. With the
+        process backend ``func`` has to be a module-level function.
+        """
+        return self._backend.run(
+            func,
+            *args,
+            cancel_token=job.token,
+            progress_callback=lambda progress: self.update_progress(job.id, progress),
+            **kwargs
+        )
 
     def update_progress(self, job_id: str, progress: float) -> None:
         """Update the progress of a job (0-1)"""
-        if job_id in self._active_jobs:
-            self._active_jobs[job_id].progress = progress
+        with self._lock:
+            job = self._active_jobs.get(job_id)
+        if job is not None and not job.token.cancelled:
+            job.progress = progress
             self.jobProgress.emit(job_id, progress)
 
     def cancel_job(self, job_id: str) -> None:
-        """Cancel a running job"""
-        if job_id in self._active_jobs:
-            # Note: This doesn't actually stop the thread, but marks it as cancelled
-            del self._active_jobs[job_id]
-            self.jobFailed.emit(job_id, "Job cancelled")
+        """Cancel a queued or running job; running jobs stop at their next check"""
+        with self._lock:
+            job = self._active_jobs.pop(job_id, None)
+        if job is not None:
+            job.token.cancel()
+            self.jobCancelled.emit(job_id)
+
+    def cancel_all(self) -> None:
+        """Cancel every job submitted through this manager"""
+        with self._lock:
+            job_ids = list(self._active_jobs)
+        for job_id in job_ids:
+            self.cancel_job(job_id)
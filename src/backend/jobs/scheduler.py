@@ -0,0 +1,87 @@
+import heapq
+import itertools
+import os
+import threading
+import traceback
+from typing import Callable, Optional
+
+
+class Priority:
+    """Scheduling priorities; lower values run first"""
+    INTERACTIVE = 0
+    NORMAL = 10
+    BATCH = 20
+
+
+class JobScheduler:
+    """Application-wide priority queue of jobs run on a bounded set of threads.
+
+    Every JobManager submits to the same scheduler, so the total number of
+    concurrent jobs stays at ``max_workers + 1`` no matter how many
+    processors exist: ``max_workers`` threads take any task, and one more
+    is reserved for INTERACTIVE tasks, so a preview never waits behind a
+    long job, even with a single worker. Models already parallelize inside
+    onnxruntime, so the default is kept small.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self._max_workers = max_workers or max(1, min(4, (os.cpu_count() or 2) // 2))
+        self._queue = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._workers = []
+        self._interactive_worker = None
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def set_max_workers(self, max_workers: int) -> None:
+        """Change the concurrency limit; extra workers exit once idle"""
+        with self._condition:
+            self._max_workers = max(1, max_workers)
+            self._condition.notify_all()
+
+    def submit(self, priority: int, task: Callable[[], None]) -> None:
+        """Queue a task; tasks with the same priority run in submission order"""
+        with self._condition:
+            heapq.heappush(self._queue, (priority, next(self._counter), task))
+            if len(self._workers) < self._max_workers:
+                worker = threading.Thread(target=self._work, name=f"job-worker-{len(self._workers)}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            if priority <= Priority.INTERACTIVE and self._interactive_worker is None:
+                self._interactive_worker = threading.Thread(
+                    target=self._work, args=(True,), name="job-worker-interactive", daemon=True
+                )
+                self._interactive_worker.start()
+            # Wake every worker, since the interactive one may not take this task
+            self._condition.notify_all()
+
+    def pending(self) -> int:
+        """Number of tasks waiting for a worker"""
+        with self._condition:
+            return len(self._queue)
+
+    def _work(self, interactive_only: bool = False) -> None:
+        current = threading.current_thread()
+        while True:
+            with self._condition:
+                while not self._has_task(interactive_only) and (interactive_only or len(self._workers) <= self._max_workers):
+                    self._condition.wait()
+                if not interactive_only and len(self._workers) > self._max_workers:
+                    self._workers.remove(current)
+                    return
+                _, _, task = heapq.heappop(self._queue)
+
+            try:
+                task()
+            except Exception:
+                traceback.print_exc()
+
+    def _has_task(self, interactive_only: bool) -> bool:
+        # The heap keeps the lowest priority value first
+        return bool(self._queue) and (not interactive_only or self._queue[0][0] <= Priority.INTERACTIVE)
+
+
+scheduler = JobScheduler()
@@ -0,0 +1,160 @@
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+import cv2
+from ..jobs.cancellation import CancellationToken
+from ..utils.color import hex_to_rgb
+from ..utils.face_detector.detector import FaceDetector
+from ..utils.face_detector.tracker import FaceTracker
+from .blur_face import mask_faces
+
+# Codec per output extension; frame sequences ("frames/%05d.png") are written as images
+FOURCC = {".mp4": "mp4v", ".m4v": "mp4v", ".mov": "mp4v", ".avi": "MJPG", ".mkv": "XVID"}
+DEFAULT_FPS = 25.0
+_END = object()
+
+
+def blur_video(
+    input_path: str,
+    output_path: str,
+    opacity: float = 0.5,
+    mask_color: str = "#3b82f6",
+    mask_shape: str = "rectangle",
+    mode: str = "solid",
+    detect_every: int = 5,
+    max_tiles: int = 16,
+    queue_size: int = 8,
+    cancel_token: Optional[CancellationToken] = None,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> dict:
+    """Mask faces in a video or frame sequence, streaming frame by frame.
+
+    Faces are detected every ``detect_every`` frames and carried in between
+    by ``FaceTracker``. Decoding and encoding run on their own threads,
+    connected to the detection loop by queues of ``queue_size`` frames,
+    so memory stays bounded whatever the length of the clip. Either path
+    may be a printf-style frame pattern such as ``frames/%05d.png``.
+
+    Returns statistics of the run, including the processing ``fps``.
+    """
+    capture = cv2.VideoCapture(str(input_path))
+    if not capture.isOpened():
+        raise ValueError(f"Cannot open video: {input_path}")
+    width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    source_fps = capture.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+    total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    if "%" in str(output_path):
+        writer = cv2.VideoWriter(str(output_path), cv2.CAP_IMAGES, 0, source_fps, (width, height))
+    else:
+        fourcc = cv2.VideoWriter_fourcc(*FOURCC.get(Path(output_path).suffix.lower(), "mp4v"))
+        writer = cv2.VideoWriter(str(output_path), fourcc, source_fps, (width, height))
+    if not writer.isOpened():
+        capture.release()
+        raise ValueError(f"Cannot write video: {output_path}")
+
+    decoded = queue.Queue(maxsize=queue_size)
+    processed = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+
+    def put(target: queue.Queue, item) -> bool:
+        # Wake up regularly so a stopped run does not block on a full or empty queue
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(source: queue.Queue):
+        while not stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def read_frames():
+        try:
+            while not stop.is_set():
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                if not put(decoded, frame):
+                    return
+        except Exception as e:
+            errors.append(e)
+        put(decoded, _END)
+
+    def write_frames():
+        try:
+            while True:
+                frame = processed.get()
+                if frame is _END:
+                    return
+                writer.write(frame)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+
+    detector = FaceDetector()
+    tracker = FaceTracker()
+    # Frames are BGR; the mask color follows
+    color = hex_to_rgb(mask_color)[::-1]
+    reader = threading.Thread(target=read_frames, daemon=True)
+    writer_thread = threading.Thread(target=write_frames, daemon=True)
+    frames = detections = 0
+    start = time.perf_counter()
+    reader.start()
+    writer_thread.start()
+    try:
+        while True:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            frame = get(decoded)
+            if frame is _END:
+                break
+
+            if frames % detect_every == 0:
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                boxes, _, _ = detector.detect(rgb, cancel_token=cancel_token, max_tiles=max_tiles)
+                boxes = tracker.update(boxes)
+                detections += 1
+            else:
+                boxes = tracker.advance()
+            mask_faces(frame, boxes, opacity, color, mask_shape, mode)
+
+            if not put(processed, frame):
+                break
+            frames += 1
+            if progress_callback and total > 0:
+                progress_callback(min(1.0, frames / total))
+    finally:
+        # Let the writer drain, then stop the reader if we left early
+        put(processed, _END)
+        writer_thread.join()
+        stop.set()
+        reader.join()
+        capture.release()
+        writer.release()
+
+    if errors:
+        raise errors[0]
+    elapsed = time.perf_counter() - start
+    fps = frames / elapsed if elapsed > 0 else 0.0
+    print(f"Blurred faces in {frames} frames ({detections} detections) at {fps:.1f} fps")
+    return {
+        "frames": frames,
+        "detections": detections,
+        "width": width,
+        "height": height,
+        "source_fps": source_fps,
+        "seconds": elapsed,
+        "fps": fps,
+    }
@@ -0,0 +1,124 @@
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from PIL import Image
+from ..jobs.cancellation import CancellationToken
+from ..utils.memory import available_memory
+
+# Formats whose size can be traded for quality
+LOSSY_FORMATS = ("JPEG", "WEBP")
+# Quality range searched when aiming for a file size
+MIN_QUALITY = 5
+MAX_QUALITY = 95
+
+
+def compress_image(
+    image: Image.Image,
+    quality: int,
+    output_format: str = "JPEG",
+    fast: bool = False,
+    cancel_token: Optional[CancellationToken] = None,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> bytes:
+    """Encode an image at the given quality and return the encoded bytes.
+
+    ``fast`` skips the extra passes that only make the file smaller, for
+    previews where the pixels matter but the size does not.
+    """
+    data = _encode(_encodable(image, output_format), quality, output_format, fast)
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+    if progress_callback:
+        progress_callback(1.0)
+    return data
+
+
+def compress_to_size(
+    image: Image.Image,
+    target_size: int,
+    output_format: str = "JPEG",
+    workers: int = 1,
+    cancel_token: Optional[CancellationToken] = None,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> bytes:
+    """Encode at the highest quality whose file fits in ``target_size`` bytes.
+
+    Candidates are encoded into memory only. Each round encodes ``workers``
+    qualities at once on a thread pool (the encoders release the GIL) and
+    narrows the range around the fitting one, so one worker is a plain
+    binary search. Every extra worker holds a copy of the image; see
+    ``search_workers`` for a count the free memory affords. If nothing
+    fits, the smallest encoding is returned.
+    """
+    output_format = output_format.upper()
+    if output_format not in LOSSY_FORMATS:
+        raise ValueError(f"Cannot aim for a file size with {output_format}; use one of {', '.join(LOSSY_FORMATS)}")
+    workers = max(1, workers)
+    # Converted once and reused by every candidate; save() keeps per-call state
+    # on the image, so each worker encodes from its own copy
+    image = _encodable(image, output_format)
+    copies = [image] + [image.copy() for _ in range(workers - 1)]
+
+    start = time.perf_counter()
+    encodes = 0
+    best, smallest = None, None
+    low, high = MIN_QUALITY, MAX_QUALITY
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while low <= high:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            # Split the remaining range evenly between the workers
+            count = min(workers, high - low + 1)
+            qualities = sorted({low + (high - low) * (i + 1) // (count + 1) for i in range(count)})
+            encoded = pool.map(lambda copy, quality: _encode(copy, quality, output_format), copies, qualities)
+            for quality, data in zip(qualities, encoded):
+                encodes += 1
+                if len(data) <= target_size:
+                    best = (quality, data)
+                    low = quality + 1
+                else:
+                    if smallest is None or len(data) < len(smallest[1]):
+                        smallest = (quality, data)
+                    high = min(high, quality - 1)
+            if progress_callback:
+                progress_callback(1 - (high - low + 1) / (MAX_QUALITY - MIN_QUALITY + 1))
+
+    quality, data = best or smallest
+    print(
+        f"Compressed to {len(data)} bytes (target {target_size}) at quality {quality}: "
+        f"{encodes} encodes in {(time.perf_counter() - start) * 1000:.0f} ms"
+        + ("" if best else "; no quality fits the target")
+    )
+    if progress_callback:
+        progress_callback(1.0)
+    return data
+
+
+def search_workers(image: Image.Image) -> int:
+    """Workers for ``compress_to_size`` whose image copies fit in a quarter of the free memory"""
+    workers = min(4, os.cpu_count() or 1)
+    free = available_memory()
+    if free is None:
+        return 1
+    # Each worker but the first encodes from its own copy, at up to 4 bytes per pixel
+    copy_bytes = image.width * image.height * 4
+    return max(1, min(workers, 1 + free // 4 // copy_bytes))
+
+
+def _encodable(image: Image.Image, output_format: str) -> Image.Image:
+    if output_format == "JPEG" and image.mode not in ("RGB", "L", "CMYK"):
+        return image.convert("RGB")
+    if output_format == "WEBP" and image.mode not in ("RGB", "RGBA"):
+        return image.convert("RGBA" if image.has_transparency_data else "RGB")
+    return image
+
+
+def _encode(image: Image.Image, quality: int, output_format: str, fast: bool = False) -> bytes:
+    buffer = io.BytesIO()
+    if fast:
+        image.save(buffer, format=output_format, quality=quality, method=0)
+    else:
+        image.save(buffer, format=output_format, quality=quality, optimize=True)
+    return buffer.getvalue()
@@ -0,0 +1,115 @@
+import io
+import time
+from typing import Callable, Optional
+from PIL import Image
+from ..jobs.cancellation import CancellationToken
+
+# Modes each encoder takes as they are; other modes are converted to RGB, or RGBA to keep alpha
+ENCODER_MODES = {
+    "JPEG": ("L", "RGB", "CMYK"),
+    "BMP": ("1", "L", "P", "RGB"),
+    "PNG": ("1", "L", "LA", "I;16", "P", "RGB", "RGBA"),
+    "WEBP": ("RGB", "RGBA"),
+    "AVIF": ("RGB", "RGBA"),
+    "TIFF": ("1", "L", "LA", "P", "RGB", "RGBA", "CMYK", "YCbCr", "LAB", "I", "I;16", "F"),
+}
+# Formats that cannot store an alpha channel
+OPAQUE_FORMATS = ("JPEG", "BMP")
+
+# Encoder options per preset, from the quickest encode to the smallest file.
+# Formats left out encode with Pillow's defaults
+PRESETS = {
+    "fast": {
+        "JPEG": {"optimize": False, "subsampling": "4:2:0"},
+        "PNG": {"compress_level": 1},
+        "WEBP": {"method": 0},
+        "AVIF": {"speed": 10},
+    },
+    "balanced": {
+        "JPEG": {"optimize": True, "subsampling": "4:2:0"},
+        "PNG": {"compress_level": 6},
+        "WEBP": {"method": 4},
+        "AVIF": {"speed": 6},
+    },
+    "small": {
+        "JPEG": {"optimize": True, "progressive": True, "subsampling": "4:2:0"},
+        "PNG": {"compress_level": 9, "optimize": True},
+        # Method 6 also searches the alpha plane exhaustively, many times slower for little gain
+        "WEBP": {"method": 5},
+        "AVIF": {"speed": 4},
+    },
+}
+DEFAULT_PRESET = "balanced"
+
+
+def convert_image(
+    image: Image.Image,
+    format: str,
+    preset: str = DEFAULT_PRESET,
+    params: Optional[dict] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> bytes:
+    """Encode an image in another file format and return the encoded bytes.
+
+    ``preset`` picks the encoder options from ``PRESETS``; ``params`` are
+    extra encoder options passed on to ``Image.save`` and win over the
+    preset's.
+    """
+    format = format.upper()
+    options = {**PRESETS[preset].get(format, {}), **(params or {})}
+
+    buffer = io.BytesIO()
+    encodable_image(image, format).save(buffer, format=format, **options)
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+    if progress_callback:
+        progress_callback(1.0)
+    return buffer.getvalue()
+
+
+def compare_presets(
+    image: Image.Image,
+    format: str,
+    cancel_token: Optional[CancellationToken] = None,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> list:
+    """Encode ``image`` with every preset; returns one dict per preset with its ``bytes`` and encode ``ms``"""
+    # The mode conversion is shared, so the timings are the encoders' alone
+    image = encodable_image(image, format.upper())
+    report = []
+    for index, preset in enumerate(PRESETS):
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        start = time.perf_counter()
+        data = convert_image(image, format, preset)
+        report.append({"preset": preset, "bytes": len(data), "ms": (time.perf_counter() - start) * 1000})
+        if progress_callback:
+            progress_callback((index + 1) / len(PRESETS))
+    return report
+
+
+def encodable_image(image: Image.Image, format: str) -> Image.Image:
+    """``image`` in a mode ``format`` can store; converted only when it has to be.
+
+    Modes missing from the format's ``ENCODER_MODES`` entry become RGB, or
+    RGBA when the image has transparency and the format stores alpha.
+    Transparent images bound for an opaque format are flattened onto
+    white, rather than showing whatever color the transparent pixels
+    happen to hold. Formats without an entry are left to their encoder.
+    """
+    modes = ENCODER_MODES.get(format)
+    if modes is None or image.mode in modes:
+        return image
+    if image.mode == "1" and "L" in modes:
+        return image.convert("L")
+    if image.has_transparency_data and format not in OPAQUE_FORMATS:
+        return image.convert("RGBA")
+    if image.has_transparency_data:
+        rgba = image if image.mode == "RGBA" else image.convert("RGBA")
+        alpha = rgba.getchannel("A")
+        if alpha.getextrema()[0] < 255:
+            flattened = Image.new("RGB", image.size, (255, 255, 255))
+            flattened.paste(rgba, mask=alpha)
+            return flattened
+    return image.convert("RGB")
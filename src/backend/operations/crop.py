@@ -0,0 +1,159 @@
+import shutil
+import subprocess
+from typing import Callable, Optional
+from PIL import Image, JpegImagePlugin
+from ..jobs.cancellation import CancellationToken
+from ..utils.band_reader import BandReader
+from .convert import convert_image
+
+# Quality lossy WebP sources are re-encoded at; the source's own setting is not stored in the file
+WEBP_QUALITY = 95
+# jpegtran from libjpeg(-turbo) does lossless JPEG transforms when it is installed
+JPEGTRAN = shutil.which("jpegtran")
+LOSSLESS_FORMATS = ("JPEG", "MPO")
+
+
+def crop_image(
+    image: Image.Image,
+    x: int,
+    y: int,
+    width: int,
+    height: int,
+    cancel_token: Optional[CancellationToken] = None,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> Image.Image:
+    """Crop an image, clamping the crop box to the image bounds"""
+    cropped = image.crop(_crop_box(image.size, x, y, width, height))
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+    if progress_callback:
+        progress_callback(1.0)
+    return cropped
+
+
+def crop_file(
+    path,
+    x: int,
+    y: int,
+    width: int,
+    height: int,
+    cancel_token: Optional[CancellationToken] = None,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> tuple:
+    """Crop an image file and encode the crop like the source; returns (bytes, format).
+
+    Uncompressed layouts (plain TIFF strips or tiles, BMP, PPM) only have
+    the pixels inside the crop read, so the time follows the crop's area
+    rather than the file's. Other files are decoded whole first.
+    """
+    with BandReader(path) as reader:
+        region = reader.read_region(_crop_box(reader.size, x, y, width, height))
+        format, params = source_encoding(reader.image)
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+
+    data = convert_image(region, format, params=params)
+    if progress_callback:
+        progress_callback(1.0)
+    return data, format
+
+
+def lossless_crop(
+    path,
+    x: int,
+    y: int,
+    width: int,
+    height: int,
+    cancel_token: Optional[CancellationToken] = None,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> tuple:
+    """Crop a JPEG file without re-encoding it; returns (bytes, box).
+
+    The DCT blocks inside the crop are copied as they are, so the crop
+    decodes to the source's pixels and nothing is lost. Only whole MCUs
+    can be cut, so the top-left corner moves up and left onto the MCU
+    grid; ``box`` is the region actually kept.
+    """
+    with Image.open(path) as image:
+        if image.format not in LOSSLESS_FORMATS:
+            raise ValueError(f"Lossless crop needs a JPEG, not {image.format}")
+        box = mcu_aligned_box(image, x, y, width, height)
+    left, top, right, bottom = box
+    data = jpeg_transform(path, "-crop", f"{right - left}x{bottom - top}+{left}+{top}")
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+    if progress_callback:
+        progress_callback(1.0)
+    return data, box
+
+
+def can_crop_losslessly(image: Image.Image) -> bool:
+    return JPEGTRAN is not None and image.format in LOSSLESS_FORMATS
+
+
+def mcu_aligned_box(image: Image.Image, x: int, y: int, width: int, height: int) -> tuple:
+    """Crop box clamped to a JPEG, with its top-left corner moved onto the MCU grid"""
+    left, top, right, bottom = _crop_box(image.size, x, y, width, height)
+    # An MCU spans 8 pixels times the largest sampling factor, e.g. 16x16 for 4:2:0
+    mcu_width = 8 * max(h for _, h, _, _ in image.layer)
+    mcu_height = 8 * max(v for _, _, v, _ in image.layer)
+    return (left - left % mcu_width, top - top % mcu_height, right, bottom)
+
+
+def jpeg_transform(path, *options: str) -> bytes:
+    """Run a lossless jpegtran transform (``-crop``, ``-rotate``, ``-flip``...) on a JPEG file"""
+    if JPEGTRAN is None:
+        raise RuntimeError("Lossless JPEG transforms need jpegtran (libjpeg-turbo) on the PATH")
+    # Keep every marker of the source, EXIF and ICC profile included
+    completed = subprocess.run([JPEGTRAN, "-copy", "all", *options, str(path)], capture_output=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"jpegtran failed: {completed.stderr.decode(errors='replace').strip()}")
+    return completed.stdout
+
+
+def source_encoding(image: Image.Image) -> tuple:
+    """(format, save options) that encode like ``image``'s file did; PNG if Pillow cannot write it"""
+    # Multi-picture JPEGs from phones are saved as their first, plain JPEG picture
+    format = "JPEG" if image.format == "MPO" else image.format
+    if format not in Image.SAVE:
+        return "PNG", {}
+
+    params = {}
+    if image.info.get("icc_profile"):
+        params["icc_profile"] = image.info["icc_profile"]
+    if format == "JPEG" and getattr(image, "quantization", None):
+        # The source's quantization tables and subsampling keep its quality
+        params["qtables"] = image.quantization
+        params["subsampling"] = JpegImagePlugin.get_sampling(image)
+    elif format == "TIFF":
+        params["compression"] = image.info.get("compression", "raw")
+    elif format == "WEBP":
+        # Pillow would encode lossy at quality 80, even for a lossless source
+        if is_lossless_webp(image):
+            params["lossless"] = True
+        else:
+            params["quality"] = WEBP_QUALITY
+    return format, params
+
+
+def is_lossless_webp(image: Image.Image) -> bool:
+    """Whether ``image``'s WebP file stores lossless (VP8L) rather than lossy (VP8) data"""
+    if not getattr(image, "filename", None):
+        return False
+    with open(image.filename, "rb") as f:
+        # RIFF header, then chunks; extended files put VP8X, ICCP, ALPH... before the image data
+        f.seek(12)
+        while len(header := f.read(8)) == 8:
+            fourcc, size = header[:4], int.from_bytes(header[4:], "little")
+            if fourcc in (b"VP8 ", b"VP8L"):
+                return fourcc == b"VP8L"
+            f.seek(size + size % 2, 1)
+    return False
+
+
+def _crop_box(size: tuple, x: int, y: int, width: int, height: int) -> tuple:
+    """Crop box clamped to an image of ``size``; an empty box is an error"""
+    box = (max(0, x), max(0, y), min(size[0], x + width), min(size[1], y + height))
+    if box[0] >= box[2] or box[1] >= box[3]:
+        raise ValueError(f"Crop box {width}x{height} at ({x}, {y}) is empty inside the {size[0]}x{size[1]} image")
+    return box
@@ -0,0 +1,120 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Optional
+from PIL import Image, features
+from ..jobs.cancellation import CancellationToken
+from .convert import convert_image, DEFAULT_PRESET
+
+EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp", "AVIF": ".avif"}
+LOSSY_FORMATS = ("JPEG", "WEBP", "AVIF")
+
+
+class ExportProfile:
+    """The widths and formats a master image is published at"""
+
+    def __init__(self, widths: tuple, formats: tuple, quality: int = 80, preset: str = DEFAULT_PRESET):
+        self.widths = widths
+        self.formats = formats
+        self.quality = quality
+        self.preset = preset
+
+
+PROFILES = {
+    # AVIF where the browser supports it, JPEG where it does not
+    "web": ExportProfile((320, 640, 960, 1280, 1920), ("WEBP", "AVIF", "JPEG")),
+    # Graphics with sharp edges or transparency
+    "web-lossless": ExportProfile((320, 640, 960, 1280, 1920), ("WEBP", "PNG")),
+    "thumbnails": ExportProfile((160, 320, 480), ("WEBP", "JPEG"), quality=75),
+}
+
+
+def export_variants(
+    image: Image.Image,
+    profile: ExportProfile,
+    workers: Optional[int] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> list:
+    """Encode ``image`` at every width and format of ``profile``.
+
+    The widths form a pyramid: each level is resized from the previous,
+    larger one rather than from the master, and widths at or above the
+    master's collapse into one full-size level. Every level is handed to
+    a thread pool as soon as it exists, so its formats encode while the
+    next level is resized. Returns one dict per variant with its
+    ``format``, ``width``, ``height``, encoded ``data`` and encode ``ms``.
+    """
+    formats = [format for format in profile.formats if format != "AVIF" or features.check("avif")]
+    if len(formats) < len(profile.formats):
+        print("AVIF is not supported by this Pillow build; skipping it")
+    widths = sorted({min(width, image.width) for width in profile.widths}, reverse=True)
+    total = len(widths) * len(formats)
+
+    variants = []
+    with ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1)) as pool:
+        try:
+            futures = []
+            level = image
+            for width in widths:
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                if width != level.width:
+                    height = max(1, round(image.height * width / image.width))
+                    level = level.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+                # save() keeps per-call state on the image, so each encode gets its own copy
+                for i, format in enumerate(formats):
+                    source = level if i == 0 else level.copy()
+                    futures.append(pool.submit(_encode_variant, source, format, profile))
+
+            for future in futures:
+                # Poll, so a cancel is seen while a slow encode (AVIF) is still running
+                while not wait([future], timeout=0.1).done:
+                    if cancel_token is not None:
+                        cancel_token.raise_if_cancelled()
+                variants.append(future.result())
+                if progress_callback:
+                    progress_callback(len(variants) / total)
+        except BaseException:
+            # Drop the queued encodes; leaving the block only waits for the running ones
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return variants
+
+
+def write_export(variants: list, directory, stem: str) -> Path:
+    """Write the variants as ``<stem>-<width>w.<ext>`` and a ``<stem>.json`` manifest; returns its path"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    entries = []
+    for variant in variants:
+        path = directory / f"{stem}-{variant['width']}w{EXTENSIONS.get(variant['format'], '.' + variant['format'].lower())}"
+        path.write_bytes(variant["data"])
+        entries.append({
+            "file": path.name,
+            "format": variant["format"],
+            "width": variant["width"],
+            "height": variant["height"],
+            "bytes": len(variant["data"]),
+            "encode_ms": round(variant["ms"], 1),
+        })
+
+    # Written last, so a manifest means every variant is on disk
+    manifest = directory / f"{stem}.json"
+    manifest.write_text(json.dumps({"variants": entries}, indent=2))
+    return manifest
+
+
+def _encode_variant(image: Image.Image, format: str, profile: ExportProfile) -> dict:
+    start = time.perf_counter()
+    params = {"quality": profile.quality} if format in LOSSY_FORMATS else None
+    data = convert_image(image, format, profile.preset, params)
+    return {
+        "format": format,
+        "width": image.width,
+        "height": image.height,
+        "data": data,
+        "ms": (time.perf_counter() - start) * 1000,
+    }
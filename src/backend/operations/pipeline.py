@@ -0,0 +1,163 @@
+import io
+import uuid
+from pathlib import Path
+from typing import Callable, Optional
+from PIL import Image
+from ..jobs.cancellation import CancellationToken
+from .blur_face import blur_faces
+from .compress import compress_image, compress_to_size
+from .convert import convert_image, encodable_image, DEFAULT_PRESET
+from .crop import crop_image
+from .remove_bg import remove_background
+from .resize import resize_image
+from .upscale import upscale_image
+
+
+class PipelineResult:
+    """Output of a pipeline run, kept in memory until it is saved.
+
+    ``data`` holds the encoded bytes when the pipeline ended with an
+    encoding step; ``image`` is then decoded from those bytes so previews
+    show the real compression artifacts.
+    """
+
+    def __init__(self, image: Optional[Image.Image] = None, data: Optional[bytes] = None, format: Optional[str] = None):
+        self._image = image
+        self.data = data
+        self.format = format
+        self._preview_path = None
+
+    @property
+    def image(self) -> Image.Image:
+        if self._image is None:
+            self._image = Image.open(io.BytesIO(self.data))
+            self._image.load()
+        return self._image
+
+    @property
+    def size(self) -> tuple:
+        """(width, height) of the result; encoded results only have their header read"""
+        if self._image is not None:
+            return self._image.size
+        with Image.open(io.BytesIO(self.data)) as image:
+            return image.size
+
+    @property
+    def size_bytes(self) -> Optional[int]:
+        """Encoded size, or None if the result has not been encoded"""
+        return len(self.data) if self.data is not None else None
+
+    def __getstate__(self):
+        # Encoded results travel as bytes only; the image is decoded again on demand
+        state = self.__dict__.copy()
+        if self.data is not None:
+            state["_image"] = None
+        return state
+
+    def save(self, file_path, format: Optional[str] = None) -> None:
+        """Write the result; encoded bytes are written as is when the format matches"""
+        format = format or Image.registered_extensions().get(Path(file_path).suffix.lower())
+        if self.data is not None and format in (None, self.format):
+            Path(file_path).write_bytes(self.data)
+            return
+
+        encodable_image(self.image, format).save(file_path, format=format)
+
+    def preview_path(self, directory, name: str) -> Path:
+        """Write the result into ``directory`` the first time a preview is asked for"""
+        if self._preview_path is None or not self._preview_path.exists():
+            suffix = f".{self.format.lower()}" if self.data is not None else ".png"
+            path = Path(directory) / f"{name}_{uuid.uuid4()}{suffix}"
+            self.save(path, self.format if self.data is not None else "PNG")
+            self._preview_path = path
+        return self._preview_path
+
+
+class Pipeline:
+    """Chain of image operations that passes images along in memory.
+
+    Each step takes the previous step's image; an optional encoding step
+    (``compress`` or ``convert``) must come last. Nothing touches the disk
+    while the pipeline runs.
+
+        result = Pipeline().crop(0, 0, 800, 600).resize(400, 300).compress(80).run(image)
+        result.save("out.jpg")
+    """
+
+    def __init__(self):
+        self._steps = []
+        self._sink = None
+
+    def __len__(self) -> int:
+        return len(self._steps) + (self._sink is not None)
+
+    def then(self, func: Callable, *args, **kwargs) -> "Pipeline":
+        """Append an operation that returns an image"""
+        if self._sink is not None:
+            raise ValueError("Cannot add steps after the encoding step")
+        self._steps.append((func, args, kwargs))
+        return self
+
+    def encode(self, func: Callable, *args, format: Optional[str] = None, **kwargs) -> "Pipeline":
+        """Finish with an operation that returns encoded bytes.
+
+        ``format`` is passed as the last positional argument; None means the
+        format of the source image.
+        """
+        if self._sink is not None:
+            raise ValueError("The pipeline already has an encoding step")
+        self._sink = (func, args, format, kwargs)
+        return self
+
+    def crop(self, x: int, y: int, width: int, height: int) -> "Pipeline":
+        return self.then(crop_image, x, y, width, height)
+
+    def resize(self, width: int, height: int, resample: Image.Resampling = Image.Resampling.LANCZOS) -> "Pipeline":
+        return self.then(resize_image, width, height, resample)
+
+    def blur_faces(self, opacity: float = 0.5, mask_color: str = "#3b82f6", mask_shape: str = "rectangle", mode: str = "solid") -> "Pipeline":
+        return self.then(blur_faces, opacity, mask_color, mask_shape, mode)
+
+    def remove_background(self, bg_color: str = "#ffffff", crop: bool = False, tier: Optional[str] = None) -> "Pipeline":
+        return self.then(remove_background, bg_color, crop, tier)
+
+    def upscale(self, scale: int = 4, workers: Optional[int] = None) -> "Pipeline":
+        return self.then(upscale_image, scale, workers=workers)
+
+    def compress(self, quality: int, output_format: Optional[str] = None, fast: bool = False, target_size: Optional[int] = None) -> "Pipeline":
+        """Encode at ``quality``, or at the best quality that fits in ``target_size`` bytes"""
+        if target_size:
+            return self.encode(compress_to_size, target_size, format=output_format)
+        return self.encode(compress_image, quality, format=output_format, fast=fast)
+
+    def convert(self, format: str, preset: str = DEFAULT_PRESET, params: Optional[dict] = None) -> "Pipeline":
+        return self.encode(convert_image, format=format, preset=preset, params=params)
+
+    def run(self,
+        image: Image.Image,
+        cancel_token: Optional[CancellationToken] = None,
+        progress_callback: Optional[Callable[[float], None]] = None
+    ) -> PipelineResult:
+        """Run every step on ``image`` and return the in-memory result"""
+        source_format = image.format
+        total = max(1, len(self))
+
+        def step_progress(index: int):
+            if progress_callback is None:
+                return None
+            return lambda progress: progress_callback((index + progress) / total)
+
+        for index, (func, args, kwargs) in enumerate(self._steps):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            image = func(image, *args, cancel_token=cancel_token, progress_callback=step_progress(index), **kwargs)
+
+        if self._sink is None:
+            if progress_callback:
+                progress_callback(1.0)
+            return PipelineResult(image)
+
+        func, args, format, kwargs = self._sink
+        format = (format or source_format or "JPEG").upper()
+        data = func(image, *args, format, cancel_token=cancel_token, progress_callback=step_progress(len(self._steps)), **kwargs)
+        return PipelineResult(data=data, format=format)
@@ -0,0 +1,59 @@
+from typing import Callable, Optional
+from PIL import Image
+from ..jobs.cancellation import CancellationToken
+from ..utils.bg_remover.bg_remover import BgRemover
+
+
+def remove_background(
+    image: Image.Image,
+    bg_color: str = "#ffffff",
+    crop: bool = False,
+    tier: Optional[str] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> Image.Image:
+    """Cut out the foreground and optionally place it on a solid background.
+
+    ``tier`` is "fast", "balanced" or "best"; None picks one from the image size.
+    """
+    removed = BgRemover(tier or BgRemover.auto_tier(*image.size)).remove_bg(image, bg_color, crop, cancel_token=cancel_token)
+    if progress_callback:
+        progress_callback(1.0)
+    return removed
+
+
+def remove_backgrounds(
+    images: list,
+    bg_color: str = "#ffffff",
+    crop: bool = False,
+    tier: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    removers: Optional[dict] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> list:
+    """Cut out several images, running the model on batches of them.
+
+    Without a ``tier`` each image gets one from its size and images of the
+    same tier are batched together. Pass the same ``removers`` dict to
+    successive calls to reuse their input buffers.
+    """
+    removers = {} if removers is None else removers
+    groups = {}
+    for i, image in enumerate(images):
+        groups.setdefault(tier or BgRemover.auto_tier(*image.size), []).append(i)
+
+    results = [None] * len(images)
+    done = 0
+    for group_tier, indexes in groups.items():
+        if group_tier not in removers:
+            removers[group_tier] = BgRemover(group_tier)
+        cutouts = removers[group_tier].remove_bg_batch(
+            [images[i] for i in indexes], bg_color, crop, batch_size, cancel_token
+        )
+        for i, cutout in zip(indexes, cutouts):
+            results[i] = cutout
+        done += len(indexes)
+        if progress_callback:
+            progress_callback(done / len(images))
+    return results
@@ -0,0 +1,86 @@
+import math
+from typing import Callable, Optional
+from PIL import Image
+from ..jobs.cancellation import CancellationToken
+from ..utils.band_reader import BandReader, BAND_MODES
+
+# Working memory of resize_file when no budget is given
+DEFAULT_MEMORY_BUDGET = 256 << 20
+# Source pixels each resampling filter reaches on either side, in output pixels
+FILTER_SUPPORT = {
+    Image.Resampling.NEAREST: 0.5,
+    Image.Resampling.BOX: 0.5,
+    Image.Resampling.BILINEAR: 1.0,
+    Image.Resampling.HAMMING: 1.0,
+    Image.Resampling.BICUBIC: 2.0,
+    Image.Resampling.LANCZOS: 3.0,
+}
+
+
+def resize_image(
+    image: Image.Image,
+    width: int,
+    height: int,
+    resample: Image.Resampling = Image.Resampling.LANCZOS,
+    cancel_token: Optional[CancellationToken] = None,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> Image.Image:
+    """Resize an image, with Lanczos resampling unless ``resample`` says otherwise"""
+    resized = image.resize((width, height), resample)
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+    if progress_callback:
+        progress_callback(1.0)
+    return resized
+
+
+def resize_file(
+    path,
+    width: int,
+    height: int,
+    resample: Image.Resampling = Image.Resampling.LANCZOS,
+    memory_budget: Optional[int] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> Image.Image:
+    """Resize an image file in horizontal bands, without decoding it all at once.
+
+    Each band of output rows is resampled from just the source rows its
+    filter reaches, read lazily with ``BandReader``, so the working set
+    is the output plus one band sized to fit ``memory_budget`` bytes. The
+    result matches ``resize_image`` on the decoded file. Sources that
+    cannot be read in bands are decoded whole first; JPEGs are decoded at
+    a reduced scale when the output is much smaller.
+    """
+    memory_budget = memory_budget or DEFAULT_MEMORY_BUDGET
+    # Like Image.thumbnail, keep twice the output resolution when decoding JPEGs reduced
+    with BandReader(path, min_size=(2 * width, 2 * height)) as reader:
+        if reader.mode not in BAND_MODES:
+            return resize_image(reader.image, width, height, resample, cancel_token, progress_callback)
+
+        source_width, source_height = reader.size
+        scale = source_height / height
+        margin = math.ceil(FILTER_SUPPORT[resample] * max(scale, 1.0)) + 1
+        # Pillow keeps every mode but L at 4 bytes per pixel. Each source row costs
+        # its file bytes, the decoded band and Pillow's horizontally resampled copy
+        pixel_bytes = 1 if reader.mode == "L" else 4
+        row_bytes = (2 * source_width + width) * pixel_bytes
+        source_rows = (memory_budget - width * height * pixel_bytes) // row_bytes - 2 * margin
+        band_rows = max(1, min(height, int(source_rows / scale)))
+
+        result = Image.new(reader.mode, (width, height))
+        for top in range(0, height, band_rows):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            bottom = min(height, top + band_rows)
+            box_top, box_bottom = top * scale, bottom * scale
+            read_top = max(0, math.floor(box_top) - margin)
+            read_bottom = min(source_height, math.ceil(box_bottom) + margin)
+
+            # The source band is dropped as soon as it is resampled, before the next one is read
+            box = (0, box_top - read_top, source_width, box_bottom - read_top)
+            part = reader.read(read_top, read_bottom).resize((width, bottom - top), resample, box=box)
+            result.paste(part, (0, top))
+            if progress_callback:
+                progress_callback(bottom / height)
+    return result
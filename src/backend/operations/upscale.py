@@ -0,0 +1,16 @@
+from typing import Callable, Optional
+from PIL import Image
+from ..jobs.cancellation import CancellationToken
+from ..utils.upscaler.upscaler import Upscaler
+
+
+def upscale_image(
+    image: Image.Image,
+    scale: int = 4,
+    workers: Optional[int] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> Image.Image:
+    """Upscale an image with the super-resolution model"""
+    upscaler = Upscaler(workers=workers)
+    return upscaler.upscale(image, scale, progress_callback=progress_callback, cancel_token=cancel_token)
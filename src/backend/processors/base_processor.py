@@ -1,9 +1,16 @@
-import os
+import uuid
 from pathlib import Path
+from typing import Optional
 from PIL import Image
-from PySide6.QtCore import QObject, Signal, QUrl
-from ..jobs.job_manager import JobManager
-import uuid
+from PySide6.QtCore import QObject, Signal, QUrl, QTimer
+from PySide6.QtGui import QImage
+from ..image_provider import ImageProvider, to_qimage
+from ..jobs.cancellation import CancellationToken
+from ..jobs.job_manager import Job, JobManager
+from ..jobs.scheduler import Priority
+from ..operations.pipeline import Pipeline, PipelineResult
+from ..utils.image_cache import image_cache
+from ..utils.temp_store import temp_store
 
 class BaseImageProcessor(QObject):
     """Base class for image processing operations"""
@@ -13,64 +20,133 @@ class BaseImageProcessor(QObject):
     processingProgress = Signal(float)  # progress (0-1)
     processingCompleted = Signal(str)  # result_url
     processingFailed = Signal(str)  # error_message
+    processingCancelled = Signal()
+    previewReady = Signal(QImage)
+
+    # Longer side of the proxy that previews are rendered on
+    PREVIEW_MAX_SIDE = 1280
+    # Preview requests arriving within this window are coalesced into one
+    PREVIEW_DEBOUNCE_MS = 30
 
     # def __init__(self, job_manager: JobManager):
-    def __init__(self):
+    def __init__(self, executor_backend: str = "thread"):
         super().__init__()
-        self._job_manager = JobManager()
+        self._job_manager = JobManager(backend=executor_backend)
         self._image = None
-        self._result_image = None
-        self._temp_dir = Path("/tmp/luma-studio")
-        self._temp_dir.mkdir(exist_ok=True)
+        self._image_path = None
+        self._result = None
+        self._image_provider = None
+        self._preview_file = None
 
         # Connect job signals
         self._job_manager.jobStarted.connect(self._on_job_started)
         self._job_manager.jobProgress.connect(self._on_job_progress)
         self._job_manager.jobCompleted.connect(self._on_job_completed)
         self._job_manager.jobFailed.connect(self._on_job_failed)
+        self._job_manager.jobCancelled.connect(self._on_job_cancelled)
+
+        # Previews get their own manager so superseding them never cancels a real job
+        self._preview_jobs = JobManager()
+        self._preview_jobs.jobCompleted.connect(self._on_preview_completed)
+        self._preview_jobs.jobFailed.connect(self._on_preview_failed)
+        self._pending_preview = None
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(self.PREVIEW_DEBOUNCE_MS)
+        self._preview_timer.timeout.connect(self._submit_preview)
 
-    def set_image(self, image: Image.Image):
-        """Set the current image to process"""
+    def set_image(self, image: Image.Image, path: Optional[str] = None):
+        """Set the current image to process and the file it was decoded from"""
         self._image = image
+        self._image_path = path
 
-    def save_processed_image(self, image: Image.Image, operation: str) -> str:
-        """Save processed image to temp directory and return URL"""
-        temp_path = str(self._temp_dir / f"{operation}_{uuid.uuid4()}.png")
-        print(f"Saving {operation} image to: {temp_path}")
-        
-        try:
-            # Ensure directory exists
-            if not self._temp_dir.exists():
-                print(f"Creating temp directory: {self._temp_dir}")
-                self._temp_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Save image
-            image.save(temp_path)
-            print(f"Image saved successfully. File exists: {Path(temp_path).exists()}")
+    def proxy_image(self, max_side: int) -> Image.Image:
+        """Downscaled copy of the current image for previews, taken from the image cache"""
+        if self._image_path is None:
+            factor = max(1, max(self._image.size) // max_side)
+            return self._image.reduce(factor) if factor > 1 else self._image
+        return image_cache.get_proxy(self._image_path, max_side)
 
-            if not Path(temp_path).exists():
-                raise Exception(f"Failed to save {operation} image")
-            
-            # Convert to URL
-            url = QUrl.fromLocalFile(temp_path).toString()
-            print(f"Generated URL: {url}")
+    def request_preview(self, params: dict) -> None:
+        """Ask for a preview with new parameters; rapid requests are coalesced"""
+        if not self._image:
+            return
+        self._pending_preview = dict(params)
+        self._preview_timer.start()
+
+    def _submit_preview(self) -> None:
+        params, self._pending_preview = self._pending_preview, None
+        if params is None:
+            return
+        self._preview_jobs.submit_job(
+            f"preview_{uuid.uuid4()}",
+            self._preview_job,
+            params,
+            priority=Priority.INTERACTIVE,
+            supersede=True
+        )
+
+    def _preview_job(self, job: Job, params: dict) -> QImage:
+        return self.render_preview(params, cancel_token=job.token)
+
+    def render_preview(self, params: dict, cancel_token: Optional[CancellationToken] = None) -> QImage:
+        """Apply the tool to a screen-sized proxy of the current image"""
+        proxy = self.proxy_image(self.PREVIEW_MAX_SIDE)
+        pipeline = self.preview_pipeline(proxy.width / self._image.width, **params)
+        result = pipeline.run(proxy, cancel_token=cancel_token)
+        return to_qimage(result.image)
+
+    def preview_pipeline(self, proxy_scale: float, **params) -> Pipeline:
+        """Pipeline for a preview on a proxy ``proxy_scale`` times the size of the image"""
+        raise NotImplementedError(f"{type(self).__name__} has no preview")
+
+    def set_executor_backend(self, backend: str) -> None:
+        """Choose where the heavy part of jobs runs ("thread" or "process")"""
+        self._job_manager.set_backend(backend)
+
+    def cancel(self) -> None:
+        """Cancel every queued or running job of this processor"""
+        self._job_manager.cancel_all()
+        self.processingCancelled.emit()
+
+    def set_image_provider(self, provider: ImageProvider) -> None:
+        """Hand results to QML through ``provider`` instead of preview files"""
+        self._image_provider = provider
+
+    @property
+    def result(self) -> Optional[PipelineResult]:
+        return self._result
+
+    def publish_result(self, result: PipelineResult, operation: str) -> str:
+        """Keep a job result in memory and return the URL QML shows it from"""
+        self._result = result
+        if self._image_provider is not None:
+            return self._image_provider.add(result, operation)
+        return self.preview_url(operation)
+
+    def preview_url(self, operation: str = "result") -> str:
+        """Write the current result to the temp directory once and return its URL"""
+        if self._result is None:
+            raise Exception("No result image to preview")
+
+        path = self._result.preview_path(temp_store.directory, operation)
+        if path != self._preview_file:
+            # Pin the file while it is the one on screen
+            temp_store.add(path, acquire=True)
+            self.cleanup_temp_files()
+            self._preview_file = path
+        url = QUrl.fromLocalFile(str(path)).toString()
+        print(f"Generated URL: {url}")
+        return url
 
-            # Set result image
-            self._result_image = image
-            return url
-            
-        except Exception as e:
-            print(f"Error saving image: {str(e)}")
-            raise
-    
     def save_result_image(self, file_path: str) -> None:
         """Save processed image to file path"""
         try:
-            # Save image
-            if not self._result_image:
+            if self._result is None:
                 raise Exception("No result image to save")
-            
-            self._result_image.save(file_path)
+
+            # Encoded results are written without encoding them again
+            self._result.save(file_path)
             print(f"Image saved successfully. File exists: {Path(file_path).exists()}")
 
             if not Path(file_path).exists():
@@ -81,12 +157,10 @@ class BaseImageProcessor(QObject):
             raise
 
     def cleanup_temp_files(self) -> None:
-        """Clean up temporary files"""
-        for file in os.listdir(self._temp_dir):
-            try:
-                os.remove(str(self._temp_dir / file))
-            except:
-                pass
+        """Unpin this processor's preview file so the temp store may evict it"""
+        if self._preview_file is not None:
+            temp_store.release(self._preview_file)
+            self._preview_file = None
 
     def _on_job_started(self, job_id: str) -> None:
         pass
@@ -99,3 +173,12 @@ class BaseImageProcessor(QObject):
 
     def _on_job_failed(self, job_id: str, error: str) -> None:
         pass
+
+    def _on_job_cancelled(self, job_id: str) -> None:
+        pass
+
+    def _on_preview_completed(self, job_id: str, image: QImage) -> None:
+        self.previewReady.emit(image)
+
+    def _on_preview_failed(self, job_id: str, error: str) -> None:
+        print(f"Preview failed: {error}")
@@ -1,12 +1,8 @@
 import uuid
-import numpy as np
-import cv2
-from pathlib import Path
 from PIL import Image
-from PySide6.QtCore import QUrl
-from ..utils.face_detector.detector import FaceDetector
 from .base_processor import BaseImageProcessor
-from ..utils.color import hex_to_rgb
+from ..jobs.job_manager import Job
+from ..operations.pipeline import Pipeline
 
 class BlurFaceProcessor(BaseImageProcessor):
     """Processor for blurring faces in images"""
@@ -14,7 +10,8 @@ class BlurFaceProcessor(BaseImageProcessor):
     def blur_faces(self,
         opacity: float = 0.5,
         mask_color: str = "#3b82f6",
-        mask_shape: str = "rectangle"
+        mask_shape: str = "rectangle",
+        mode: str = "solid"
     ) -> None:
         job_id = f"blur_{uuid.uuid4()}"
         self._job_manager.submit_job(
@@ -23,72 +20,43 @@ class BlurFaceProcessor(BaseImageProcessor):
             self._image,
             opacity,
             mask_color,
-            mask_shape
+            mask_shape,
+            mode,
+            supersede=True
         )
     
     def _blur_faces_job(self,
+        job: Job,
         image: Image.Image,
         opacity: float = 0.5,
         mask_color: str = "#3b82f6",
-        mask_shape: str = "rectangle"
+        mask_shape: str = "rectangle",
+        mode: str = "solid"
     ) -> None:
         """Actual blur operation running in a separate thread"""
         try:
             self.processingStarted.emit("Blurring faces...")
             
-            # Create a copy for blurring
-            blurred = image.copy()
+            # Detect and blur faces
+            pipeline = Pipeline().blur_faces(opacity, mask_color, mask_shape, mode)
+            result = self._job_manager.execute(job, pipeline.run, image)
             
-            # Get original format, default to JPEG if unknown
-            output_format = image.format or "JPEG"
-            
-            # Create temp path with correct extension
-            temp_path = Path(self._temp_dir) / f"blurred_{uuid.uuid4()}.{output_format.lower()}"
-            
-            # Detect faces
-            detector = FaceDetector()
-            image_np = np.array(image)
-            boxes, labels, probs = detector.detect(image_np)
-            
-            # Blur faces
-            for box in boxes:
-                x1, y1, x2, y2 = box
-                print(f"Box: {box}")
-
-                # Create a mask for blurring
-                crop = image_np[y1:y2, x1:x2]
-                mask = np.zeros_like(crop)
-                # mask_color = hex_to_rgb(mask_color)
-                mask_color = (255, 255, 255)
-
-                print(mask.dtype, mask_color, type(mask_color), crop.shape[1], crop.shape[0])
-                if mask_shape == "rectangle":
-                    cv2.rectangle(mask, (0, 0), (crop.shape[1] - 1, crop.shape[0] - 1), mask_color, -1)
-                elif mask_shape == "circle":
-                    center = (crop.shape[1] // 2, crop.shape[0] // 2)
-                    radius = min(crop.shape[1] // 2, crop.shape[0] // 2)
-                    cv2.circle(mask, center, radius, mask_color, -1)
-                
-                # Added weighted blur
-                cv2.addWeighted(crop, 1 - opacity, mask, opacity, 0, crop)
-                image_np[y1:y2, x1:x2] = crop
-                
-            # Save with compression
-            blurred = Image.fromarray(image_np)
-            blurred.save(temp_path)
-            
-            # Load the compressed image to get its dimensions
-            self._result_image = Image.open(temp_path)
-            
-            # Convert to URL and return
-            result_url = QUrl.fromLocalFile(str(temp_path)).toString()
-            print(f"Generated URL: {result_url}")
-            return result_url
+            # Keep the result and return its preview URL
+            return self.publish_result(result, "blurred")
         except Exception as e:
             error_msg = f"Failed to blur faces: {str(e)}"
             print(error_msg)
             raise Exception(error_msg)
     
+    def preview_pipeline(self,
+        proxy_scale: float,
+        opacity: float = 0.5,
+        mask_color: str = "#3b82f6",
+        mask_shape: str = "rectangle",
+        mode: str = "solid"
+    ) -> Pipeline:
+        return Pipeline().blur_faces(opacity, mask_color, mask_shape, mode)
+
     def _on_job_started(self, job_id: str) -> None:
         if job_id.startswith("blur_"):
             self.processingStarted.emit("Blurring faces...")
@@ -1,25 +1,29 @@
-from pathlib import Path
-from PIL import Image
 import uuid
 from .base_processor import BaseImageProcessor
-from PySide6.QtCore import QUrl
+from ..jobs.job_manager import Job
+from ..jobs.executors import cpu_bound_backend
+from ..operations.compress import compress_image, compress_to_size, search_workers
+from ..operations.pipeline import Pipeline, PipelineResult
 
 class CompressProcessor(BaseImageProcessor):
     """Processor for compressing images with quality control"""
 
     def __init__(self):
-        super().__init__()
+        # optimize=True encoding holds the GIL, so run it in worker processes
+        super().__init__(executor_backend=cpu_bound_backend())
         self._quality = 85  # Default quality
 
-    def compress_image(self, quality: int) -> None:
+    def compress_image(self, quality: int, target_size: int = 0) -> None:
         job_id = f"compress_{uuid.uuid4()}"
         self._job_manager.submit_job(
             job_id,
             self._compress_image_job,
-            quality
+            int(round(quality)),
+            target_size,
+            supersede=True
         )
     
-    def _compress_image_job(self, quality: int) -> None:
+    def _compress_image_job(self, job: Job, quality: int, target_size: int = 0) -> None:
         """Actual compress operation running in a separate thread"""
         if not self._image:
             self.processingFailed.emit("No image loaded")
@@ -28,36 +32,29 @@ class CompressProcessor(BaseImageProcessor):
         try:
             self.processingStarted.emit("Compressing image...")
             
-            # Create a copy for compression
-            compressed = self._image.copy()
+            # Encode in the original format, default to JPEG if unknown; a target size
+            # in bytes searches for the quality instead. Module-level operations, as
+            # the process backend requires
+            format = (self._image.format or "JPEG").upper()
+            if target_size:
+                workers = search_workers(self._image)
+                data = self._job_manager.execute(job, compress_to_size, self._image, target_size, format, workers)
+            else:
+                data = self._job_manager.execute(job, compress_image, self._image, quality, format)
+            result = PipelineResult(data=data, format=format)
             
-            # Get original format, default to JPEG if unknown
-            output_format = self._image.format or "JPEG"
-            
-            # Create temp path with correct extension
-            temp_path = Path(self._temp_dir) / f"compressed_{uuid.uuid4()}.{output_format.lower()}"
-            
-            # Save with compression
-            compressed.save(
-                temp_path,
-                format=output_format,
-                quality=quality,
-                optimize=True
-            )
-            
-            # Load the compressed image to get its dimensions
-            self._result_image = Image.open(temp_path)
-            
-            # Convert to URL and return
-            result_url = QUrl.fromLocalFile(str(temp_path)).toString()
-            print(f"Generated URL: {result_url}")
-            return result_url
+            # The preview is the encoded file itself
+            return self.publish_result(result, "compressed")
 
         except Exception as e:
             error_msg = f"Failed to compress image: {str(e)}"
             print(error_msg)
             raise Exception(error_msg)
 
+    def preview_pipeline(self, proxy_scale: float, quality: int) -> Pipeline:
+        # Slider values arrive from QML as floats; Pillow only takes integer qualities
+        return Pipeline().compress(int(round(quality)), self._image.format or "JPEG", fast=True)
+
     def _on_job_started(self, job_id: str) -> None:
         if job_id.startswith("compress_"):
             self.processingStarted.emit("Compressing image...")
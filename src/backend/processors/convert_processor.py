@@ -1,18 +1,43 @@
 from .base_processor import BaseImageProcessor
+import json
 import uuid
+from pathlib import Path
 from PIL import Image
-from PySide6.QtCore import QUrl
+from PySide6.QtCore import Signal
+from ..jobs.job_manager import Job, JobManager
+from ..jobs.cancellation import JobCancelled
+from ..operations.convert import compare_presets, DEFAULT_PRESET
+from ..operations.export import export_variants, write_export, PROFILES
+from ..operations.pipeline import Pipeline, PipelineResult
 
 class ConvertProcessor(BaseImageProcessor):
     """Handles image conversion operations"""
 
-    def convert_image(self, format: str) -> None:
-        """Convert the current image to the specified format"""
+    # Preset reports run beside converts and exports, so they have a busy state of their own
+    presetReportStarted = Signal()
+    presetReportReady = Signal(str)  # JSON list of {preset, bytes, ms}
+    presetReportFailed = Signal(str)  # error message
+    presetReportCancelled = Signal()
+
+    # WebP round trips cost several times a JPEG one; preview on a smaller proxy
+    PREVIEW_MAX_SIDE = 720
+
+    def __init__(self):
+        super().__init__()
+        # Preset reports get their own manager, so a new one only supersedes the
+        # previous report and never a running convert or export
+        self._report_jobs = JobManager()
+        self._report_jobs.jobStarted.connect(self._on_report_started)
+        self._report_jobs.jobCompleted.connect(self._on_report_completed)
+        self._report_jobs.jobFailed.connect(self._on_report_failed)
+
+    def convert_image(self, format: str, preset: str = DEFAULT_PRESET) -> None:
+        """Convert the current image to the specified format with an encoder preset"""
         if not self._image:
             self.processingFailed.emit("No image loaded")
             return
 
-        print(f"Starting convert job with format: {format}")
+        print(f"Starting convert job with format: {format}, preset: {preset}")
         print(f"Current image size: {self._image.size}")
         
         job_id = f"convert_{uuid.uuid4()}"
@@ -20,39 +45,120 @@ class ConvertProcessor(BaseImageProcessor):
             job_id,
             self._convert_image_job,
             self._image,
-            format
+            format,
+            preset,
+            supersede=True
         )
     
-    def _convert_image_job(self, image: Image.Image, format: str) -> str:
+    def _convert_image_job(self, job: Job, image: Image.Image, format: str, preset: str) -> str:
         """Actual convert operation running in a separate thread"""
         try:
-            # Create a copy to avoid modifying the original
-            img = image.copy()
-            
-            # Convert the image
-            img = img.convert(format)
-            
-            # Save the converted image
-            temp_path = f"temp_{uuid.uuid4()}.{format.lower()}"
-            img.save(temp_path)
+            # Encode in the new file format
+            result = self._job_manager.execute(job, Pipeline().convert(format, preset).run, image)
             
-            return QUrl.fromLocalFile(temp_path).toString()
+            # The preview is the encoded file itself
+            return self.publish_result(result, "converted")
+        except JobCancelled:
+            raise
         except Exception as e:
             self.processingFailed.emit(f"Failed to convert image: {str(e)}")
             return ""
     
+    def compare_presets(self, format: str) -> None:
+        """Report the encode time and file size of every preset for the current image"""
+        if not self._image:
+            self.presetReportFailed.emit("No image loaded")
+            return
+
+        job_id = f"presets_{uuid.uuid4()}"
+        self._report_jobs.submit_job(
+            job_id,
+            self._compare_presets_job,
+            self._image,
+            format,
+            supersede=True
+        )
+
+    def _compare_presets_job(self, job: Job, image: Image.Image, format: str) -> str:
+        """Encode with every preset in a separate thread; returns the report as JSON"""
+        report = self._report_jobs.execute(job, compare_presets, image, format)
+        for entry in report:
+            print(f"{format} {entry['preset']:<10}{entry['ms']:8.0f} ms {entry['bytes'] / 1024:10.1f} KB")
+        return json.dumps(report)
+
+    def export_image(self, profile: str, directory: str) -> None:
+        """Export the current image at every width and format of a profile into ``directory``"""
+        if not self._image:
+            self.processingFailed.emit("No image loaded")
+            return
+
+        print(f"Starting export job with profile: {profile}")
+        stem = Path(self._image_path).stem if self._image_path else "image"
+
+        job_id = f"export_{uuid.uuid4()}"
+        self._job_manager.submit_job(
+            job_id,
+            self._export_image_job,
+            self._image,
+            PROFILES[profile],
+            directory,
+            stem,
+            supersede=True
+        )
+
+    def _export_image_job(self, job: Job, image: Image.Image, profile, directory: str, stem: str) -> str:
+        """Actual export operation running in a separate thread"""
+        try:
+            # One decode feeds the whole pyramid; the variants encode in parallel
+            variants = self._job_manager.execute(job, export_variants, image, profile)
+            manifest = write_export(variants, directory, stem)
+            print(f"Exported {len(variants)} variants, manifest: {manifest}")
+
+            # The preview is the largest variant in the first format
+            largest = variants[0]
+            return self.publish_result(PipelineResult(data=largest["data"], format=largest["format"]), "exported")
+        except JobCancelled:
+            raise
+        except Exception as e:
+            # Raised, so the job manager reports the failure and no completion follows
+            error_msg = f"Failed to export image: {str(e)}"
+            print(error_msg)
+            raise Exception(error_msg)
+
+    def cancel(self) -> None:
+        self._report_jobs.cancel_all()
+        self.presetReportCancelled.emit()
+        super().cancel()
+
+    def preview_pipeline(self, proxy_scale: float, format: str) -> Pipeline:
+        return Pipeline().convert(format, "fast")
+
     def _on_job_started(self, job_id: str) -> None:
         if job_id.startswith("convert_"):
             self.processingStarted.emit("Converting image...")
+        elif job_id.startswith("export_"):
+            self.processingStarted.emit("Exporting image...")
         
     def _on_job_progress(self, job_id: str, progress: float) -> None:
-        if job_id.startswith("convert_"):
+        if job_id.startswith(("convert_", "export_")):
             self.processingProgress.emit(progress)
         
     def _on_job_completed(self, job_id: str, result: str) -> None:
-        if job_id.startswith("convert_"):
+        if job_id.startswith(("convert_", "export_")):
             self.processingCompleted.emit(result)
         
     def _on_job_failed(self, job_id: str, error: str) -> None:
-        if job_id.startswith("convert_"):
-            self.processingFailed.emit(error)
\ No newline at end of file
+        if job_id.startswith(("convert_", "export_")):
+            self.processingFailed.emit(error)
+
+    def _on_report_started(self, job_id: str) -> None:
+        if job_id.startswith("presets_"):
+            self.presetReportStarted.emit()
+
+    def _on_report_completed(self, job_id: str, result: str) -> None:
+        if job_id.startswith("presets_"):
+            self.presetReportReady.emit(result)
+
+    def _on_report_failed(self, job_id: str, error: str) -> None:
+        if job_id.startswith("presets_"):
+            self.presetReportFailed.emit(error)
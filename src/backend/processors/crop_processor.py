@@ -1,12 +1,19 @@
 from PIL import Image
 from .base_processor import BaseImageProcessor
+from ..jobs.job_manager import Job
+from ..operations.crop import can_crop_losslessly, lossless_crop, source_encoding
+from ..operations.pipeline import Pipeline, PipelineResult
 import uuid
 
 class CropProcessor(BaseImageProcessor):
     """Handles image cropping operations"""
 
-    def crop_image(self, x: int, y: int, width: int, height: int) -> None:
-        """Crop the current image to the specified dimensions"""
+    def crop_image(self, x: int, y: int, width: int, height: int, lossless: bool = False) -> None:
+        """Crop the current image to the specified dimensions.
+
+        ``lossless`` crops JPEG files without re-encoding them; the top-left
+        corner then snaps to the JPEG's 8 or 16 pixel block grid.
+        """
         if not self._image:
             self.processingFailed.emit("No image loaded")
             return
@@ -19,38 +26,42 @@ class CropProcessor(BaseImageProcessor):
             job_id,
             self._crop_image_job,
             self._image,
-            x, y, width, height
+            x, y, width, height,
+            lossless,
+            supersede=True
         )
 
-    def _crop_image_job(self, image: Image.Image, x: int, y: int, width: int, height: int) -> str:
+    def _crop_image_job(self, job: Job, image: Image.Image, x: int, y: int, width: int, height: int, lossless: bool = False) -> str:
         """Actual crop operation running in a separate thread"""
         try:
-            # Create a copy to avoid modifying the original
-            img = image.copy()
-            
-            # Calculate crop box (left, top, right, bottom)
-            box = (x, y, x + width, y + height)
-            
-            # Ensure crop box is within image bounds
-            img_width, img_height = img.size
-            box = (
-                max(0, box[0]),
-                max(0, box[1]),
-                min(img_width, box[2]),
-                min(img_height, box[3])
-            )
+            if lossless and self._image_path is not None and can_crop_losslessly(image):
+                data, box = self._job_manager.execute(job, lossless_crop, self._image_path, x, y, width, height)
+                print(f"Lossless crop kept {box}")
+                result = PipelineResult(data=data, format="JPEG")
+            else:
+                if lossless:
+                    print("Lossless crop needs a JPEG file and jpegtran; re-encoding the crop instead")
+                # Perform crop, clamped to the image bounds, and encode it in the source's format
+                format, params = source_encoding(image)
+                pipeline = Pipeline().crop(x, y, width, height).convert(format, params=params)
+                result = self._job_manager.execute(job, pipeline.run, image)
             
-            # Perform crop
-            cropped = img.crop(box)
-            
-            # Save and return URL
-            return self.save_processed_image(cropped, "cropped")
+            # Keep the result and return its preview URL
+            return self.publish_result(result, "cropped")
                 
         except Exception as e:
             error_msg = f"Failed to crop image: {str(e)}"
             print(error_msg)
             raise Exception(error_msg)
 
+    def preview_pipeline(self, proxy_scale: float, x: int, y: int, width: int, height: int) -> Pipeline:
+        return Pipeline().crop(
+            round(x * proxy_scale),
+            round(y * proxy_scale),
+            max(1, round(width * proxy_scale)),
+            max(1, round(height * proxy_scale))
+        )
+
     def _on_job_started(self, job_id: str) -> None:
         if job_id.startswith("crop_"):
             self.processingStarted.emit("Cropping image...")
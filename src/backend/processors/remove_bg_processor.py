@@ -1,16 +1,16 @@
-from pathlib import Path
 import uuid
+from typing import Optional
 from PIL import Image
-from PySide6.QtCore import QUrl
 
 from .base_processor import BaseImageProcessor
-from ..utils.bg_remover.bg_remover import BgRemover
+from ..jobs.job_manager import Job
+from ..operations.pipeline import Pipeline
 
 class RemoveBgProcessor(BaseImageProcessor):
     """Handles image remove background operations"""
 
-    def remove_bg(self, bg_color: str = "#ffffff", crop: bool = False) -> None:
-        """Remove background from the current image"""
+    def remove_bg(self, bg_color: str = "#ffffff", crop: bool = False, tier: Optional[str] = None) -> None:
+        """Remove background from the current image; ``tier`` is fast, balanced, best or None for automatic"""
         if not self._image:
             self.processingFailed.emit("No image loaded")
             return
@@ -24,30 +24,29 @@ class RemoveBgProcessor(BaseImageProcessor):
             self._remove_bg_job,
             self._image,
             bg_color,
-            crop
+            crop,
+            tier,
+            supersede=True
         )
     
-    def _remove_bg_job(self, image: Image.Image, bg_color: str, crop: bool) -> str:
+    def _remove_bg_job(self, job: Job, image: Image.Image, bg_color: str, crop: bool, tier: Optional[str]) -> str:
         """Actual remove background operation running in a separate thread"""
         try:
-            # Get original format, default to PNG if unknown
-            output_format = "PNG"
-            
-            # Create temp path with correct extension
-            temp_path = Path(self._temp_dir) / f"removed_{uuid.uuid4()}.{output_format.lower()}"
-            
             # Remove background
-            remover = BgRemover()
-            removed = remover.remove_bg(image, bg_color, crop)
+            pipeline = Pipeline().remove_background(bg_color, crop, tier)
+            result = self._job_manager.execute(job, pipeline.run, image)
             
-            # Save result
-            removed.save(temp_path)
-            return QUrl.fromLocalFile(temp_path).toString() 
+            # Keep the result and return its preview URL
+            return self.publish_result(result, "removed")
         except Exception as e:
             error_msg = f"Failed to remove background: {str(e)}"
             print(error_msg)
             raise Exception(error_msg)
     
+    def preview_pipeline(self, proxy_scale: float, bg_color: str = "#ffffff", crop: bool = False, tier: Optional[str] = None) -> Pipeline:
+        # Previews favour latency; the chosen tier is used when the result is applied
+        return Pipeline().remove_background(bg_color, crop, "fast")
+
     def _on_job_started(self, job_id: str) -> None:
         if job_id.startswith("remove_bg_"):
             self.processingStarted.emit("Removing background...")
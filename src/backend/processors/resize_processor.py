@@ -1,10 +1,18 @@
 from PIL import Image
 from .base_processor import BaseImageProcessor
+from ..jobs.job_manager import Job
+from ..jobs.executors import cpu_bound_backend
+from ..operations.pipeline import Pipeline, PipelineResult
+from ..operations.resize import resize_file, resize_image
 import uuid
 
 class ResizeProcessor(BaseImageProcessor):
     """Handles image resizing operations"""
 
+    def __init__(self):
+        # Lanczos resampling holds the GIL, so run it in worker processes
+        super().__init__(executor_backend=cpu_bound_backend())
+
     def resize_image(self, width: int, height: int) -> None:
         """Resize the current image to the specified dimensions"""
         if not self._image:
@@ -20,26 +28,37 @@ class ResizeProcessor(BaseImageProcessor):
             self._resize_image_job,
             self._image,
             width,
-            height
+            height,
+            supersede=True
         )
 
-    def _resize_image_job(self, image: Image.Image, width: int, height: int) -> str:
+    def _resize_image_job(self, job: Job, image: Image.Image, width: int, height: int) -> str:
         """Actual resize operation running in a separate thread"""
         try:
-            # Create a copy to avoid modifying the original
-            img = image.copy()
-            
-            # Perform resize
-            resized = img.resize((width, height), Image.Resampling.LANCZOS)
+            if self._image_path is not None:
+                # Resample the file in bands; the worker never needs the decoded image
+                resized = self._job_manager.execute(job, resize_file, self._image_path, width, height)
+                result = PipelineResult(resized)
+            else:
+                # A module-level function, so the resized pixels come back through shared memory
+                result = PipelineResult(self._job_manager.execute(job, resize_image, image, width, height))
             
-            # Save and return URL
-            return self.save_processed_image(resized, "resized")
+            # Keep the result and return its preview URL
+            return self.publish_result(result, "resized")
                 
         except Exception as e:
             error_msg = f"Failed to resize image: {str(e)}"
             print(error_msg)
             raise Exception(error_msg)
 
+    def preview_pipeline(self, proxy_scale: float, width: int, height: int) -> Pipeline:
+        # Bilinear is indistinguishable from Lanczos at screen size and several times faster
+        return Pipeline().resize(
+            max(1, round(width * proxy_scale)),
+            max(1, round(height * proxy_scale)),
+            Image.Resampling.BILINEAR
+        )
+
     def _on_job_started(self, job_id: str) -> None:
         if job_id.startswith("resize_"):
             self.processingStarted.emit("Resizing image...")
@@ -1,11 +1,14 @@
 from .base_processor import BaseImageProcessor
 from PIL import Image
 import uuid
-from pathlib import Path
-from PySide6.QtCore import QUrl
-from ..utils.upscaler.upscaler import Upscaler
+from ..operations.pipeline import Pipeline
+from ..jobs.job_manager import Job
+from ..jobs.cancellation import JobCancelled
 
 class UpscaleProcessor(BaseImageProcessor):
+    # The model output is four times the input, so a small proxy still fills the view
+    PREVIEW_MAX_SIDE = 320
+
     def __init__(self):
         super().__init__()
     
@@ -20,23 +23,26 @@ class UpscaleProcessor(BaseImageProcessor):
             job_id,
             self._upscale_image_job,
             self._image,
-            scale
+            scale,
+            supersede=True
         )
         return ""
     
-    def _upscale_image_job(self, image: Image.Image, scale: int):
+    def _upscale_image_job(self, job: Job, image: Image.Image, scale: int):
         """Upscale the image"""
         try:
-            temp_path = Path(self._temp_dir) / f"upscaled_{uuid.uuid4()}.png"
-            upscaler = Upscaler()
             print(f"Upscaling image with scale: {scale}")
-            result = upscaler.upscale(image, scale)
-            result.save(temp_path)
-            return QUrl.fromLocalFile(temp_path).toString()
+            result = self._job_manager.execute(job, Pipeline().upscale(scale).run, image)
+            return self.publish_result(result, "upscaled")
+        except JobCancelled:
+            raise
         except Exception as e:
             self.processingFailed.emit(str(e))
             return ""
 
+    def preview_pipeline(self, proxy_scale: float, scale: int) -> Pipeline:
+        return Pipeline().upscale(scale)
+
     def _on_job_started(self, job_id: str) -> None:
         if job_id.startswith("upscale_"):
             self.processingStarted.emit("Upscaling...")
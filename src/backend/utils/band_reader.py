@@ -0,0 +1,102 @@
+from typing import Optional
+import numpy as np
+from PIL import Image
+
+# Modes whose rows can be read and resampled a band at a time
+BAND_MODES = ("L", "LA", "RGB", "RGBA", "CMYK")
+# Bits per pixel of the uncompressed layouts read straight from the file
+RAW_BITS = {"L": 8, "LA": 16, "RGB": 24, "BGR": 24, "RGBA": 32, "BGRA": 32, "RGBX": 32, "BGRX": 32, "CMYK": 32}
+
+
+class BandReader:
+    """Reads horizontal bands of rows, or any region, from an image file.
+
+    Uncompressed layouts (plain TIFF strips or tiles, BMP, PPM) are mapped
+    from the file, so only the requested pixels are ever read. JPEGs are
+    decoded once at the smallest DCT scale that is still at least
+    ``min_size``. Anything else is decoded whole.
+
+        with BandReader("scan.tif") as reader:
+            top = reader.read(0, 512)
+            detail = reader.read_region((4000, 3000, 5000, 3800))
+    """
+
+    def __init__(self, path, min_size: Optional[tuple] = None):
+        self._path = path
+        self.image = Image.open(path)
+        self.mode = self.image.mode
+        self._tiles = self._raw_tiles()
+        if self._tiles is None:
+            if min_size and self.image.format == "JPEG":
+                self.image.draft(self.mode, min_size)
+            self.image.load()
+
+    @property
+    def size(self) -> tuple:
+        """(width, height) of the rows returned by ``read``"""
+        return self.image.size
+
+    @property
+    def streaming(self) -> bool:
+        """Whether bands are read from the file rather than from a decoded image"""
+        return self._tiles is not None
+
+    def _raw_tiles(self) -> Optional[list]:
+        """(extents, offset, rawmode, stride, orientation) per tile if all are uncompressed"""
+        if self.mode not in BAND_MODES or not self.image.tile:
+            return None
+        tiles = []
+        for codec, extents, offset, args in self.image.tile:
+            if codec != "raw":
+                return None
+            rawmode, stride, orientation = (args + (0, 1))[:3] if isinstance(args, tuple) else (args, 0, 1)
+            if rawmode not in RAW_BITS:
+                return None
+            stride = stride or (extents[2] - extents[0]) * RAW_BITS[rawmode] // 8
+            tiles.append((extents, offset, rawmode, stride, orientation))
+        return tiles
+
+    def read(self, top: int, bottom: int) -> Image.Image:
+        """Rows ``top`` to ``bottom`` (exclusive) as a new image"""
+        return self.read_region((0, top, self.size[0], bottom))
+
+    def read_region(self, box: tuple) -> Image.Image:
+        """Pixels inside ``box`` (left, top, right, bottom) as a new image"""
+        left, top, right, bottom = box
+        if not (0 <= left < right <= self.size[0] and 0 <= top < bottom <= self.size[1]):
+            raise ValueError(f"Region {box} is not inside the {self.size[0]}x{self.size[1]} image")
+        if self._tiles is None:
+            return self.image.crop(box)
+
+        region = None
+        for (x0, y0, x1, y1), offset, rawmode, stride, orientation in self._tiles:
+            inner = (max(left, x0), max(top, y0), min(right, x1), min(bottom, y1))
+            if inner[0] >= inner[2] or inner[1] >= inner[3]:
+                continue
+            # Map just the rows of the region; bottom-up layouts store the last row first
+            first = inner[1] - y0 if orientation > 0 else y1 - inner[3]
+            rows = np.memmap(
+                self._path, dtype=np.uint8, mode="r", offset=offset + first * stride, shape=(inner[3] - inner[1], stride)
+            )
+            pixel_bytes = RAW_BITS[rawmode] // 8
+            data = rows[::1 if orientation > 0 else -1, (inner[0] - x0) * pixel_bytes:(inner[2] - x0) * pixel_bytes]
+            data = np.ascontiguousarray(data)
+            del rows
+            part = Image.frombytes(self.mode, (inner[2] - inner[0], inner[3] - inner[1]), data, "raw", rawmode)
+            del data
+            if part.size == (right - left, bottom - top):
+                # Strips span the whole width, so one of them usually covers the region
+                return part
+            if region is None:
+                region = Image.new(self.mode, (right - left, bottom - top))
+            region.paste(part, (inner[0] - left, inner[1] - top))
+        return region
+
+    def close(self) -> None:
+        self.image.close()
+
+    def __enter__(self) -> "BandReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
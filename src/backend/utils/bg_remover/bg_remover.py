@@ -1,61 +1,157 @@
 from PIL import Image
 import numpy as np
 import cv2
-import onnxruntime as ort
+from ..color import hex_to_rgb
+from .matte_refiner import refine_matte
+from ..model_registry import model_registry
 from pathlib import Path
+from typing import Callable, Optional
+from ...jobs.cancellation import CancellationToken
+
+class MattingModel:
+    """A matting model file and the normalization it was trained with"""
+
+    def __init__(self, file: str, mean=0.5, std=1.0):
+        self.file = file
+        self.mean = np.broadcast_to(np.asarray(mean, dtype=np.float32), (3,)).reshape(3, 1, 1)
+        self.std = np.broadcast_to(np.asarray(std, dtype=np.float32), (3,)).reshape(3, 1, 1)
+
+    @property
+    def path(self) -> Path:
+        return Path(__file__).parent / "models" / self.file
+
+
+MODELS = {
+    "isnet-1024": MattingModel("isnet-1024.onnx"),
+    "u2netp": MattingModel("u2netp.onnx", mean=(0.485, 0.456, 0.406), std=(0.229, 0.224, 0.225)),
+}
+
+# Candidates per tier as (model, input size); the first installed model is used
+TIERS = {
+    "fast": [("u2netp", 320), ("isnet-1024", 320)],
+    "balanced": [("isnet-1024", 512)],
+    "best": [("isnet-1024", 1024)],
+}
+
 
 class BgRemover:
-    def __init__(self):
-        self._session = ort.InferenceSession(Path(__file__).parent / "models/isnet-1024.onnx")
+    # Each image takes 12 MB of input and 4 MB of matte at 1024x1024 (best tier)
+    MAX_BATCH_SIZE = 4
+    # Longest image side up to which a tier is picked when none is given
+    AUTO_TIER_SIDES = (("fast", 640), ("balanced", 2048))
+
+    def __init__(self, tier: str = "best", refine: bool = True):
+        if tier not in TIERS:
+            raise ValueError(f"Unknown quality tier: {tier}")
+        name, input_size = next(
+            ((name, size) for name, size in TIERS[tier] if MODELS[name].path.exists()), TIERS[tier][-1]
+        )
+        self.tier = tier
+        # Sharpen the upsampled matte along the edges at the image's resolution
+        self.refine = refine
+        self._model = MODELS[name]
+        self._session = model_registry.get_session(self._model.path)
         self._input_name = self._session.get_inputs()[0].name
         self._output_name = self._session.get_outputs()[0].name
 
-    def remove_bg(self, image: Image.Image, bg_color: str = "", crop: bool = False):
+        # Models exported with a fixed batch dimension can only run that many images at once
+        batch_dim, _, height_dim, width_dim = self._session.get_inputs()[0].shape
+        self._fixed_batch_size = batch_dim if isinstance(batch_dim, int) else None
+        # Models exported with a fixed input size ignore the tier's resolution
+        if isinstance(height_dim, int) and isinstance(width_dim, int):
+            if height_dim != input_size:
+                print(f"{self._model.file} only accepts {height_dim}x{width_dim} input; the {tier} tier runs at that size")
+            input_size = height_dim
+        self.input_size = input_size
+
+        # Reused by every batch: NCHW model input and the resized uint8 image it is filled from
+        self._inputs = None
+        self._resized = np.empty((input_size, input_size, 3), dtype=np.uint8)
+
+    @classmethod
+    def auto_tier(cls, width: int, height: int) -> str:
+        """Cheapest tier whose resolution does justice to an image of this size"""
+        for tier, max_side in cls.AUTO_TIER_SIDES:
+            if max(width, height) <= max_side:
+                return tier
+        return "best"
+
+    def remove_bg(self, image: Image.Image, bg_color: str = "", crop: bool = False, cancel_token: Optional[CancellationToken] = None):
         """Remove background from image"""
-        img = np.array(image)
-        original_height, original_width = img.shape[:2]
-
-        # Convert image to RGB if it's not already
-        if img.shape[2] == 4:
-            img = img[:, :, :3]
-        
-        # Resize to (1024, 1024)
-        img = cv2.resize(img, (1024, 1024))
-
-        # Convert image to float32 and normalize to [0, 1]
-        img = img.astype(np.float32) / 255.0
-        img = (img - 0.5) / 1.0
-
-        # Tranpose image to (C, H, W)
-        img = img.transpose(2, 0, 1)
-
-        # Add batch dimension
-        img = np.expand_dims(img, axis=0)
-
-        # Run inference
-        output = self._session.run([self._output_name], {self._input_name: img})[0]
-
-        # Reshape output to (H, W)
-        output = output[0][0]
-        mi = output.min()
-        ma = output.max()
-        output = (output - mi) / (ma - mi)
-        output = (output * 255).astype(np.uint8)
-        
-        # Resize output to original size
-        alpha = cv2.resize(output, (original_width, original_height))
-        alpha_pil = Image.fromarray(alpha)
-
-        empty = Image.new("RGBA", (original_width, original_height), 0)          
-        cutout = Image.composite(image, empty, alpha_pil)
-
-        # if crop:
-        #     cutout = cutout.crop(cutout.getbbox())
-        
+        return self.remove_bg_batch([image], bg_color, crop, cancel_token=cancel_token)[0]
+
+    def remove_bg_batch(self,
+        images: list,
+        bg_color: str = "",
+        crop: bool = False,
+        batch_size: Optional[int] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        progress_callback: Optional[Callable[[float], None]] = None
+    ) -> list:
+        """Remove the background of several images, running the model on up to ``batch_size`` at once"""
+        batch_size = self._fixed_batch_size or min(batch_size or self.MAX_BATCH_SIZE, max(1, len(images)))
+        results = []
+        for start in range(0, len(images), batch_size):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            batch = [image if image.mode == "RGB" else image.convert("RGB") for image in images[start:start + batch_size]]
+            inputs = self._prepare(batch, batch_size)
+            output = self._session.run([self._output_name], {self._input_name: inputs})[0]
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+
+            mattes = self._mattes(output[:len(batch), 0])
+            for image, matte in zip(batch, mattes):
+                results.append(self._composite(image, matte, bg_color, crop))
+            if progress_callback:
+                progress_callback(len(results) / len(images))
+
+        return results
+
+    def _prepare(self, images: list, batch_size: int) -> np.ndarray:
+        """Resize and normalize RGB images into the reused (N, 3, H, W) input buffer"""
+        if self._inputs is None or len(self._inputs) < batch_size:
+            self._inputs = np.zeros((batch_size, 3, self.input_size, self.input_size), dtype=np.float32)
+        inputs = self._inputs if self._fixed_batch_size is not None else self._inputs[:len(images)]
+
+        for i, image in enumerate(images):
+            interpolation = cv2.INTER_AREA if max(image.size) > self.input_size else cv2.INTER_LINEAR
+            cv2.resize(np.asarray(image), (self.input_size, self.input_size), dst=self._resized, interpolation=interpolation)
+            # HWC uint8 to normalized CHW float32, written in place
+            np.copyto(inputs[i], self._resized.transpose(2, 0, 1), casting="unsafe")
+            inputs[i] *= 1 / 255.0
+            inputs[i] -= self._model.mean
+            inputs[i] /= self._model.std
+        return inputs
+
+    def _mattes(self, output: np.ndarray) -> np.ndarray:
+        """Stretch each (H, W) model output to the full 0-255 range, for the whole batch at once"""
+        low = output.min(axis=(1, 2), keepdims=True)
+        high = output.max(axis=(1, 2), keepdims=True)
+        mattes = output - low
+        mattes *= 255.0 / np.maximum(high - low, 1e-6)
+        return mattes.astype(np.uint8)
+
+    def _composite(self, image: Image.Image, matte: np.ndarray, bg_color: str, crop: bool = False) -> Image.Image:
+        """Use the matte, resized to the image, as alpha; crop to the subject if ``crop``, then flatten onto ``bg_color`` if one is given"""
+        width, height = image.size
+        rgb = np.asarray(image)
+        alpha = cv2.resize(matte, (width, height))
+        if self.refine:
+            refine_matte(rgb, alpha, matte)
+
+        rgba = np.empty((height, width, 4), dtype=np.uint8)
+        rgba[..., :3] = rgb
+        rgba[..., 3] = alpha
+        cutout = Image.fromarray(rgba, "RGBA")
+
+        # Cropped before flattening, while the alpha still marks the subject; an empty matte keeps the full frame
+        bbox = cutout.getbbox() if crop else None
+        if bbox is not None:
+            cutout = cutout.crop(bbox)
+
         if bg_color != "":
-            bg_color = (255, 255, 255)
-            background = Image.new("RGBA", (original_width, original_height), tuple(bg_color))
-            cutout = Image.alpha_composite(background, cutout)      
+            background = Image.new("RGBA", cutout.size, hex_to_rgb(bg_color) + (255,))
+            cutout = Image.alpha_composite(background, cutout)
 
         return cutout
-        
\ No newline at end of file
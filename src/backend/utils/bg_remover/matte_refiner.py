@@ -0,0 +1,106 @@
+import numpy as np
+import cv2
+
+# Matte values strictly between these are uncertain and get refined
+UNCERTAIN_LOW = 8
+UNCERTAIN_HIGH = 247
+BLOCK_SIZE = 32
+# Guided filter regularization; smaller follows the image edges more closely
+EPS = 1e-4
+# Below this upsampling factor the matte is already sharp enough
+MIN_SCALE = 1.5
+# Patches overlap their neighbours (about 9x the block area at 8x upsampling), so the
+# cutoff counts patch pixels: a band whose patches cover more of the image than this
+# has no edge to sharpen and would cost more than filtering the whole frame
+MAX_BAND_FRACTION = 0.25
+# Blocks refined together; bounds the float working set to a few tens of MB
+CHUNK_BLOCKS = 128
+
+
+def refine_matte(image: np.ndarray, alpha: np.ndarray, matte: np.ndarray, radius: int = None) -> np.ndarray:
+    """Sharpen an upsampled matte along the object edges, in place.
+
+    ``image`` is the full resolution RGB array, ``alpha`` the matte already
+    resized to it and ``matte`` the model's low resolution output. Only
+    ``BLOCK_SIZE`` blocks of the image touching the uncertain band of the
+    low resolution matte are processed: they are gathered in stacks of
+    ``CHUNK_BLOCKS`` and run through a guided filter with the image as
+    guide, so the cost follows the length of the edges rather than the
+    image area.
+    """
+    height, width = alpha.shape
+    scale = max(width / matte.shape[1], height / matte.shape[0])
+    if scale < MIN_SCALE:
+        return alpha
+    # The upsampled transition is a few matte pixels wide; the window must span it
+    radius = radius or max(2, int(round(2 * scale)))
+    patch = BLOCK_SIZE + 4 * radius
+    if height < patch or width < patch:
+        return alpha
+
+    blocks = _band_blocks(matte, width, height)
+    if not len(blocks) or len(blocks) * patch * patch > MAX_BAND_FRACTION * width * height:
+        return alpha
+
+    for start in range(0, len(blocks), CHUNK_BLOCKS):
+        _refine_blocks(image, alpha, blocks[start:start + CHUNK_BLOCKS], radius, patch)
+    return alpha
+
+
+def _refine_blocks(image: np.ndarray, alpha: np.ndarray, blocks: np.ndarray, radius: int, patch: int) -> None:
+    """Guided filter the patches around ``blocks`` and write back their uncertain pixels"""
+    height, width = alpha.shape
+    # Patches around each block, shifted inward at the image borders
+    top = np.clip(blocks[:, 0] * BLOCK_SIZE - 2 * radius, 0, height - patch)
+    left = np.clip(blocks[:, 1] * BLOCK_SIZE - 2 * radius, 0, width - patch)
+    rows = (top[:, None] + np.arange(patch))[:, :, None]
+    cols = (left[:, None] + np.arange(patch))[:, None, :]
+
+    # Gray while still 8 bit, so only one float channel is ever allocated
+    guide = cv2.cvtColor(image[rows, cols].reshape(-1, patch, 3), cv2.COLOR_RGB2GRAY)
+    guide = guide.reshape(len(blocks), patch, patch).astype(np.float32)
+    guide *= 1 / 255.0
+    source = alpha[rows, cols].astype(np.float32)
+    source *= 1 / 255.0
+
+    refined = np.clip(_guided_filter(guide, source, radius, EPS) * 255.0 + 0.5, 0, 255).astype(np.uint8)
+    # Confident pixels keep their value, the filter would only leak image texture into them
+    inner = slice(2 * radius, patch - 2 * radius)
+    rows, cols = rows[:, inner], cols[:, :, inner]
+    current = alpha[rows, cols]
+    uncertain = (current > UNCERTAIN_LOW) & (current < UNCERTAIN_HIGH)
+    alpha[rows, cols] = np.where(uncertain, refined, current)
+
+
+def _band_blocks(matte: np.ndarray, width: int, height: int) -> np.ndarray:
+    """(row, col) of the full resolution blocks that contain uncertain matte pixels"""
+    band = ((matte > UNCERTAIN_LOW) & (matte < UNCERTAIN_HIGH)).astype(np.uint8)
+    # Grow by a matte pixel so the whole transition is covered
+    band = cv2.dilate(band, np.ones((3, 3), np.uint8))
+    grid = (-(-width // BLOCK_SIZE), -(-height // BLOCK_SIZE))
+    touched = cv2.resize(band * 255, grid, interpolation=cv2.INTER_AREA) > 0
+    return np.argwhere(touched)
+
+
+def _box(x: np.ndarray, radius: int) -> np.ndarray:
+    """Mean over (2r+1)^2 windows of a stack of patches; each side shrinks by 2r"""
+    size = 2 * radius + 1
+    total = np.cumsum(x, axis=1)
+    x = np.concatenate([total[:, size - 1:size], total[:, size:] - total[:, :-size]], axis=1)
+    total = np.cumsum(x, axis=2)
+    x = np.concatenate([total[:, :, size - 1:size], total[:, :, size:] - total[:, :, :-size]], axis=2)
+    x *= 1 / (size * size)
+    return x
+
+
+def _guided_filter(guide: np.ndarray, source: np.ndarray, radius: int, eps: float) -> np.ndarray:
+    """Gray guided filter (He et al.) over a stack of patches; returns the patch centers"""
+    mean_guide = _box(guide, radius)
+    mean_source = _box(source, radius)
+    covariance = _box(guide * source, radius) - mean_guide * mean_source
+    variance = _box(guide * guide, radius) - mean_guide * mean_guide
+
+    a = covariance / (variance + eps)
+    b = mean_source - a * mean_guide
+    inner = slice(2 * radius, guide.shape[1] - 2 * radius)
+    return _box(a, radius) * guide[:, inner, inner] + _box(b, radius)
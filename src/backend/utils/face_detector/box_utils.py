@@ -1,5 +1,11 @@
 import numpy as np
 
+# "numpy" (IoU matrix with a greedy bitmask) or "cv2" (cv2.dnn.NMSBoxes)
+NMS_BACKEND = "numpy"
+# Rows of the IoU matrix computed at once; bounds memory for large candidate sets
+NMS_BLOCK_SIZE = 512
+
+
 def convert_locations_to_boxes(locations, priors, center_variance,
                                size_variance):
     """Convert regressional location results of SSD into boxes in the form of (center_x, center_y, h, w).
@@ -81,7 +87,105 @@ def corner_form_to_center_form(boxes):
     ], len(boxes.shape) - 1)
 
 
-def hard_nms(box_scores, iou_threshold, top_k=-1, candidate_size=200):
+def iou_matrix(boxes0, boxes1, eps=1e-5):
+    """Return the pairwise intersection-over-union of two sets of boxes.
+
+    Args:
+        boxes0 (N, 4): boxes in corner-form.
+        boxes1 (M, 4): boxes in corner-form.
+        eps: a small number to avoid 0 as denominator.
+    Returns:
+        iou (N, M): IoU of every pair.
+    """
+    return iou_of(boxes0[:, None, :], boxes1[None, :, :], eps)
+
+
+def nms_mask(boxes, iou_threshold, block_size=NMS_BLOCK_SIZE, cancel_token=None, eps=1e-5):
+    """Suppression bitmask of boxes sorted by descending score.
+
+    Row i has bit j set (``np.packbits`` order) when box j comes after box i
+    and overlaps it by more than ``iou_threshold``. Only the upper triangle
+    of the IoU matrix is computed, ``block_size`` rows at a time, so 10k
+    candidates stay within a few tens of megabytes. ``block_size`` must
+    be a multiple of 8. IoU is computed as in ``iou_of``, ``eps`` included.
+    """
+    count = len(boxes)
+    boxes = np.asarray(boxes, dtype=np.float32)
+    x0, y0, x1, y1 = boxes.T
+    area = area_of(boxes[:, :2], boxes[:, 2:])
+    mask = np.zeros((count, (count + 7) // 8), dtype=np.uint8)
+    for start in range(0, count, block_size):
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        rows = slice(start, min(start + block_size, count))
+        columns = slice(start, count)
+        width = np.minimum(x1[rows, None], x1[None, columns])
+        width -= np.maximum(x0[rows, None], x0[None, columns])
+        np.maximum(width, 0, out=width)
+        height = np.minimum(y1[rows, None], y1[None, columns])
+        height -= np.maximum(y0[rows, None], y0[None, columns])
+        np.maximum(height, 0, out=height)
+        overlap = width
+        overlap *= height
+        # overlap / (union + eps) > t  <=>  overlap * (1 + t) > t * (area_i + area_j + eps), without dividing
+        union = area[rows, None] + area[None, columns]
+        union += eps
+        union *= iou_threshold
+        suppress = overlap * (1 + iou_threshold) > union
+        suppress[np.tri(suppress.shape[0], suppress.shape[1], dtype=bool)] = False
+        # Blocks start on a multiple of 8 so the packed columns line up with the full row
+        mask[rows, start // 8:] = np.packbits(suppress, axis=1)
+    return mask
+
+
+def _greedy_nms(boxes, iou_threshold, top_k=-1, cancel_token=None):
+    """Indexes kept by greedy NMS over boxes sorted by descending score"""
+    mask = nms_mask(boxes, iou_threshold, cancel_token=cancel_token)
+    removed = np.zeros(mask.shape[1], dtype=np.uint8)
+    keep = []
+    for i in range(len(boxes)):
+        if removed[i >> 3] & (0x80 >> (i & 7)):
+            continue
+        keep.append(i)
+        if 0 < top_k == len(keep):
+            break
+        removed |= mask[i]
+    return np.array(keep, dtype=np.int64)
+
+
+def _cv2_nms(boxes, iou_threshold, top_k=-1):
+    """Indexes kept by ``cv2.dnn.NMSBoxes`` over boxes sorted by descending score"""
+    import cv2
+
+    rects = np.concatenate([boxes[:, :2], boxes[:, 2:] - boxes[:, :2]], axis=1)
+    # NMSBoxes wants scores in 0..1; the sort order is all that matters, ties included
+    ranks = np.linspace(1.0, 0.5, len(boxes))
+    keep = cv2.dnn.NMSBoxes(rects.tolist(), ranks.tolist(), 0.0, iou_threshold, top_k=max(top_k, 0))
+    return np.asarray(keep, dtype=np.int64).reshape(-1)
+
+
+def nms_indexes(box_scores, iou_threshold, top_k=-1, candidate_size=200, cancel_token=None, backend=None):
+    """Indexes into box_scores of the boxes kept by greedy NMS, highest score first"""
+    backend = backend or NMS_BACKEND
+    if backend not in ("numpy", "cv2"):
+        raise ValueError(f"Unknown NMS backend: {backend}")
+    if len(box_scores) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # Stable sort so equal scores keep their input order
+    order = np.argsort(-box_scores[:, -1], kind="stable")
+    if candidate_size > 0:
+        order = order[:candidate_size]
+    boxes = box_scores[order, :-1]
+
+    if backend == "cv2":
+        keep = _cv2_nms(boxes, iou_threshold, top_k)
+    else:
+        keep = _greedy_nms(boxes, iou_threshold, top_k, cancel_token)
+    return order[keep]
+
+
+def hard_nms(box_scores, iou_threshold, top_k=-1, candidate_size=200, cancel_token=None, backend=None):
     """
 
     Args:
@@ -89,30 +193,44 @@ def hard_nms(box_scores, iou_threshold, top_k=-1, candidate_size=200):
         iou_threshold: intersection over union threshold.
         top_k: keep top_k results. If k <= 0, keep all the results.
         candidate_size: only consider the candidates with the highest scores.
+        cancel_token: optional CancellationToken checked between blocks of the IoU matrix.
+        backend: "numpy" or "cv2" (``cv2.dnn.NMSBoxes``, which leaves out ``eps``); defaults to ``NMS_BACKEND``.
     Returns:
-         picked: a list of indexes of the kept boxes
+         picked: the kept rows of box_scores, highest score first
     """
-    scores = box_scores[:, -1]
-    boxes = box_scores[:, :-1]
-    picked = []
-    # _, indexes = scores.sort(descending=True)
-    indexes = np.argsort(scores)
-    # indexes = indexes[:candidate_size]
-    indexes = indexes[-candidate_size:]
-    while len(indexes) > 0:
-        # current = indexes[0]
-        current = indexes[-1]
-        picked.append(current)
-        if 0 < top_k == len(picked) or len(indexes) == 1:
-            break
-        current_box = boxes[current, :]
-        # indexes = indexes[1:]
-        indexes = indexes[:-1]
-        rest_boxes = boxes[indexes, :]
-        iou = iou_of(
-            rest_boxes,
-            np.expand_dims(current_box, axis=0),
-        )
-        indexes = indexes[iou <= iou_threshold]
-
-    return box_scores[picked, :]
\ No newline at end of file
+    return box_scores[nms_indexes(box_scores, iou_threshold, top_k, candidate_size, cancel_token, backend), :]
+
+
+def batched_nms_indexes(box_scores, groups, iou_threshold, top_k=-1, candidate_size=200, cancel_token=None, backend=None):
+    """Run NMS independently for every group (e.g. image and class) in one pass.
+
+    Boxes of different groups are shifted apart so they never overlap and
+    a single suppression pass handles them all. ``candidate_size`` and
+    ``top_k`` apply per group.
+
+    Args:
+        box_scores (N, 5): boxes in corner-form and probabilities.
+        groups (N): integer group of each box.
+    Returns:
+        indexes: the kept boxes, sorted by group and then by descending score
+    """
+    if len(box_scores) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    order = np.lexsort((-box_scores[:, -1], groups))
+    if candidate_size > 0:
+        order = order[_group_rank(groups[order]) < candidate_size]
+
+    boxes = box_scores[order, :4].astype(np.float64)
+    extent = boxes.max() - boxes.min() + 1
+    shifted = np.concatenate([boxes + (groups[order] * extent)[:, None], box_scores[order, -1:]], axis=1)
+    keep = np.sort(nms_indexes(shifted, iou_threshold, candidate_size=-1, cancel_token=cancel_token, backend=backend))
+    if top_k > 0:
+        keep = keep[_group_rank(groups[order[keep]]) < top_k]
+    return order[keep]
+
+
+def _group_rank(sorted_groups):
+    """Position of each element within its run of equal groups"""
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    return np.arange(len(sorted_groups)) - np.repeat(starts, np.diff(np.r_[starts, len(sorted_groups)]))
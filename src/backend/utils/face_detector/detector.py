@@ -1,59 +1,168 @@
+import math
 import cv2
 from pathlib import Path
+from typing import Optional
 import numpy as np
 from .import box_utils
 
-import onnxruntime as ort
+from ..model_registry import model_registry
+from ...jobs.cancellation import CancellationToken
 
 class FaceDetector:
+    INPUT_WIDTH = 320
+    INPUT_HEIGHT = 240
+    # Windows per pyramid level overlap by this fraction so faces on a seam are seen whole once
+    TILE_OVERLAP = 0.25
+    DEFAULT_MAX_TILES = 48
+    MAX_BATCH_SIZE = 16
+    # A box mostly inside a higher-scoring one is a fragment of the same face cut by a tile edge
+    CONTAINMENT_THRESHOLD = 0.6
+
     def __init__(self):
-        self._session = ort.InferenceSession(Path(__file__).parent / "models/version-RFB-320.onnx")
+        self._session = model_registry.get_session(Path(__file__).parent / "models/version-RFB-320.onnx")
         self._input_name = self._session.get_inputs()[0].name
         self._output_name = self._session.get_outputs()[0].name
         self._threshold = 0.7
-    
-    def detect(self, image):
-        """Predict faces in the image"""
-        original_height, original_width = image.shape[:2]
-        image = cv2.resize(image, (320, 240))
-        image = image.astype(np.float32)
-        image_mean = np.array([127, 127, 127], dtype=np.float32)
-        image = (image - image_mean) / 128.0
-        image = np.transpose(image, [2, 0, 1])
-        image = np.expand_dims(image, axis=0)
-        confidences, boxes = self._session.run(None, {self._input_name: image})
-        boxes, labels, probs = self._predict(original_width,
-                                            original_height,
-                                            confidences,
-                                            boxes,
-                                            self._threshold)
-        return boxes, labels, probs
-
-    def _predict(self, width, height, confidences, boxes, prob_threshold, iou_threshold=0.3, top_k=-1):
-        """Real prediction"""
-        boxes = boxes[0]
-        confidences = confidences[0]
-        picked_box_probs = []
-        picked_labels = []
-        for class_index in range(1, confidences.shape[1]):
-            probs = confidences[:, class_index]
-            mask = probs > prob_threshold
-            probs = probs[mask]
-            if probs.shape[0] == 0:
-                continue
-            subset_boxes = boxes[mask, :]
-            box_probs = np.concatenate([subset_boxes, probs.reshape(-1, 1)], axis=1)
-            box_probs = box_utils.hard_nms(box_probs,
-                                        iou_threshold=iou_threshold,
-                                        top_k=top_k,
-                                        )
-            picked_box_probs.append(box_probs)
-            picked_labels.extend([class_index] * box_probs.shape[0])
-        if not picked_box_probs:
+
+        # Models exported with a fixed batch dimension can only run that many windows at once
+        batch_dim = self._session.get_inputs()[0].shape[0]
+        self._fixed_batch_size = batch_dim if isinstance(batch_dim, int) else None
+
+    def detect(self, image, cancel_token: Optional[CancellationToken] = None, max_tiles: int = DEFAULT_MAX_TILES):
+        """Predict faces in the image.
+
+        The whole image is always searched once, letterboxed to the model
+        input. Larger images are also searched on a pyramid of overlapping
+        windows at 1/2, 1/4... of that scale down to native resolution, as
+        long as the total number of windows stays within ``max_tiles``.
+        All windows run in batched session calls and their boxes are merged.
+        """
+        height, width = image.shape[:2]
+        windows = self._windows(width, height, max_tiles)
+
+        confidences, boxes, factors = [], [], []
+        for start in range(0, len(windows), self._batch_size()):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            batch = windows[start:start + self._batch_size()]
+            inputs, batch_factors = self._prepare(image, batch)
+            batch_confidences, batch_boxes = self._session.run(None, {self._input_name: inputs})
+            # Drop the padding of fixed-size batches
+            confidences.append(batch_confidences[:len(batch)])
+            boxes.append(batch_boxes[:len(batch)])
+            factors.extend(batch_factors)
+
+        factors = np.array(factors)
+        predictions = self._predict_batch(self.INPUT_WIDTH / factors,
+                                          self.INPUT_HEIGHT / factors,
+                                          np.concatenate(confidences),
+                                          np.concatenate(boxes),
+                                          self._threshold,
+                                          cancel_token=cancel_token)
+        picked = []
+        for (x, y, _, _), (window_boxes, _, window_probs) in zip(windows, predictions):
+            if len(window_boxes):
+                window_boxes = window_boxes.astype(np.float32) + np.array([x, y, x, y], dtype=np.float32)
+                picked.append(np.concatenate([window_boxes, window_probs.reshape(-1, 1)], axis=1))
+
+        if not picked:
             return np.array([]), np.array([]), np.array([])
-        picked_box_probs = np.concatenate(picked_box_probs)
-        picked_box_probs[:, 0] *= width
-        picked_box_probs[:, 1] *= height
-        picked_box_probs[:, 2] *= width
-        picked_box_probs[:, 3] *= height
-        return picked_box_probs[:, :4].astype(np.int32), np.array(picked_labels), picked_box_probs[:, 4]
+        box_probs = self._merge(np.concatenate(picked), cancel_token)
+        box_probs[:, :4] = np.clip(box_probs[:, :4], 0, [width, height, width, height])
+        return box_probs[:, :4].astype(np.int32), np.ones(len(box_probs), dtype=np.int64), box_probs[:, 4]
+
+    def _batch_size(self) -> int:
+        return self._fixed_batch_size or self.MAX_BATCH_SIZE
+
+    def _windows(self, width: int, height: int, max_tiles: int) -> list:
+        """(x, y, w, h) windows: the whole image, then finer pyramid levels while the budget lasts"""
+        windows = [(0, 0, width, height)]
+        scale = max(width / self.INPUT_WIDTH, height / self.INPUT_HEIGHT) / 2
+        # Stop at native resolution; upsampling does not reveal smaller faces
+        while scale >= 1:
+            tile_w = min(width, round(self.INPUT_WIDTH * scale))
+            tile_h = min(height, round(self.INPUT_HEIGHT * scale))
+            level = [(x, y, tile_w, tile_h)
+                     for y in self._tile_starts(height, tile_h)
+                     for x in self._tile_starts(width, tile_w)]
+            if len(windows) + len(level) > max_tiles:
+                break
+            windows.extend(level)
+            scale /= 2
+        return windows
+
+    def _tile_starts(self, length: int, tile: int) -> list:
+        """Window offsets along one axis, spread evenly with the last one ending at the edge"""
+        if length <= tile:
+            return [0]
+        count = math.ceil((length - tile) / (tile * (1 - self.TILE_OVERLAP))) + 1
+        return [round(i * (length - tile) / (count - 1)) for i in range(count)]
+
+    def _prepare(self, image: np.ndarray, windows: list) -> tuple:
+        """Letterbox each window into one normalized NCHW batch; returns (inputs, scale factors)"""
+        batch_size = self._fixed_batch_size or len(windows)
+        # Padding with the mean normalizes to zero
+        canvas = np.full((batch_size, self.INPUT_HEIGHT, self.INPUT_WIDTH, 3), 127, dtype=np.uint8)
+        factors = []
+        for i, (x, y, w, h) in enumerate(windows):
+            factor = min(self.INPUT_WIDTH / w, self.INPUT_HEIGHT / h)
+            size = (max(1, min(self.INPUT_WIDTH, round(w * factor))), max(1, min(self.INPUT_HEIGHT, round(h * factor))))
+            interpolation = cv2.INTER_AREA if factor < 1 else cv2.INTER_LINEAR
+            canvas[i, :size[1], :size[0]] = cv2.resize(image[y:y + h, x:x + w], size, interpolation=interpolation)
+            factors.append(factor)
+
+        inputs = canvas.astype(np.float32)
+        inputs -= 127.0
+        inputs /= 128.0
+        return np.ascontiguousarray(inputs.transpose(0, 3, 1, 2)), factors
+
+    def _merge(self, box_probs: np.ndarray, cancel_token: Optional[CancellationToken] = None) -> np.ndarray:
+        """Merge boxes found in different windows into one box per face"""
+        box_probs = box_utils.hard_nms(box_probs, iou_threshold=0.3, candidate_size=len(box_probs), cancel_token=cancel_token)
+        if len(box_probs) < 2:
+            return box_probs
+
+        # hard_nms returns boxes by descending score; drop fragments covered by an earlier box
+        boxes = box_probs[:, :4]
+        left_top = np.maximum(boxes[:, None, :2], boxes[None, :, :2])
+        right_bottom = np.minimum(boxes[:, None, 2:], boxes[None, :, 2:])
+        overlap = box_utils.area_of(left_top, right_bottom)
+        area = np.maximum(box_utils.area_of(boxes[:, :2], boxes[:, 2:]), 1e-5)
+        contained = np.triu(overlap / area[None, :] > self.CONTAINMENT_THRESHOLD, k=1).any(axis=0)
+        return box_probs[~contained]
+
+    def _predict(self, width, height, confidences, boxes, prob_threshold, iou_threshold=0.3, top_k=-1, cancel_token=None):
+        """Real prediction"""
+        return self._predict_batch(width, height, confidences[:1], boxes[:1], prob_threshold,
+                                   iou_threshold, top_k, cancel_token)[0]
+
+    def _predict_batch(self, width, height, confidences, boxes, prob_threshold, iou_threshold=0.3, top_k=-1, cancel_token=None):
+        """Prediction for a batch of images or windows with one NMS pass.
+
+        ``width`` and ``height`` are scalars or one value per image.
+        Returns a (boxes, labels, probs) tuple per image.
+        """
+        batch_size, _, num_classes = confidences.shape
+        # Class 0 is background
+        image_index, prior_index, class_index = np.nonzero(confidences[:, :, 1:] > prob_threshold)
+        class_index += 1
+        box_probs = np.concatenate([boxes[image_index, prior_index],
+                                    confidences[image_index, prior_index, class_index].reshape(-1, 1)], axis=1)
+        keep = box_utils.batched_nms_indexes(box_probs,
+                                             image_index * num_classes + class_index,
+                                             iou_threshold=iou_threshold,
+                                             top_k=top_k,
+                                             cancel_token=cancel_token)
+        image_index, class_index, box_probs = image_index[keep], class_index[keep], box_probs[keep]
+
+        scale = np.stack(np.broadcast_arrays(width, height, width, height), axis=-1).reshape(-1, 4)
+        box_probs[:, :4] *= scale[image_index if len(scale) > 1 else 0]
+
+        results = []
+        bounds = np.searchsorted(image_index, np.arange(batch_size + 1))
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            if start == end:
+                results.append((np.array([]), np.array([]), np.array([])))
+            else:
+                results.append((box_probs[start:end, :4].astype(np.int32), class_index[start:end], box_probs[start:end, 4]))
+        return results
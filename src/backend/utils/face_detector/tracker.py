@@ -0,0 +1,94 @@
+import numpy as np
+from . import box_utils
+
+
+class _Track:
+    def __init__(self, box: np.ndarray, frame: int):
+        self.box = box.astype(np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.detected_box = self.box.copy()
+        self.detected_frame = frame
+        self.misses = 0
+
+
+class FaceTracker:
+    """Carries face boxes across the frames between two detections.
+
+    Each track moves at the constant velocity measured between its last two
+    detections. Detections are matched to the predicted tracks by IoU;
+    a track that is not detected again keeps being reported, standing
+    still, for ``max_misses`` detection rounds, so a face the detector
+    misses for a moment stays masked. Reported boxes are grown by
+    ``margin`` of their size to cover prediction error.
+    """
+
+    def __init__(self, iou_threshold: float = 0.2, max_misses: int = 2, margin: float = 0.15):
+        self._iou_threshold = iou_threshold
+        self._max_misses = max_misses
+        self._margin = margin
+        self._tracks = []
+        self._frame = 0
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def advance(self) -> np.ndarray:
+        """Move to the next frame without a detection and return the predicted boxes"""
+        self._frame += 1
+        for track in self._tracks:
+            track.box += track.velocity
+        return self.boxes()
+
+    def update(self, detections: np.ndarray) -> np.ndarray:
+        """Move to the next frame using its detections and return the tracked boxes"""
+        self._frame += 1
+        for track in self._tracks:
+            track.box += track.velocity
+
+        detections = np.asarray(detections, dtype=np.float32).reshape(-1, 4)
+        matched_tracks, matched_detections = self._match(detections)
+        for t, d in zip(matched_tracks, matched_detections):
+            track = self._tracks[t]
+            elapsed = self._frame - track.detected_frame
+            track.velocity = (detections[d] - track.detected_box) / elapsed
+            track.box = detections[d].copy()
+            track.detected_box = detections[d].copy()
+            track.detected_frame = self._frame
+            track.misses = 0
+
+        kept = []
+        for t, track in enumerate(self._tracks):
+            if t not in matched_tracks:
+                track.misses += 1
+                # Coasting on an old velocity drifts off the face; hold the box still instead
+                track.velocity[:] = 0
+                if track.misses > self._max_misses:
+                    continue
+            kept.append(track)
+        kept.extend(_Track(detections[d], self._frame) for d in range(len(detections)) if d not in matched_detections)
+        self._tracks = kept
+        return self.boxes()
+
+    def boxes(self) -> np.ndarray:
+        """Current boxes in corner form, grown by the margin"""
+        if not self._tracks:
+            return np.zeros((0, 4), dtype=np.float32)
+        boxes = np.stack([track.box for track in self._tracks])
+        pad = (boxes[:, 2:] - boxes[:, :2]) * self._margin / 2
+        return np.concatenate([boxes[:, :2] - pad, boxes[:, 2:] + pad], axis=1)
+
+    def _match(self, detections: np.ndarray) -> tuple:
+        """Greedy one-to-one matching of tracks and detections by descending IoU"""
+        if not self._tracks or not len(detections):
+            return [], []
+        iou = box_utils.iou_matrix(np.stack([track.box for track in self._tracks]), detections)
+        matched_tracks, matched_detections = {}, set()
+        for index in np.argsort(-iou, axis=None):
+            t, d = np.unravel_index(index, iou.shape)
+            if iou[t, d] <= self._iou_threshold:
+                break
+            if t in matched_tracks or d in matched_detections:
+                continue
+            matched_tracks[t] = d
+            matched_detections.add(d)
+        return list(matched_tracks), [matched_tracks[t] for t in matched_tracks]
@@ -0,0 +1,165 @@
+import math
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from PIL import Image
+from .memory import available_memory
+
+
+def image_nbytes(image: Image.Image) -> int:
+    """Approximate memory used by a decoded image"""
+    return image.width * image.height * len(image.getbands())
+
+
+class ImageCache:
+    """Process-wide cache of decoded images and their downscaled proxies.
+
+    Entries are keyed by path, modification time and file size, so an
+    edited file is decoded again. Each file can have a full-resolution
+    decode and a pyramid of proxies at 1/2, 1/4, 1/8... of its size; the
+    least recently used ones are dropped once ``max_bytes`` is exceeded.
+    JPEG proxies are decoded straight at the reduced size with ``draft``
+    without decoding the full image first.
+
+    Cached images are shared: callers must not modify them in place.
+    """
+
+    DEFAULT_MAX_BYTES = 1 << 30
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        if max_bytes is None:
+            free = available_memory()
+            max_bytes = min(self.DEFAULT_MAX_BYTES, free // 4) if free else self.DEFAULT_MAX_BYTES
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()  # (path, mtime, size, factor) -> image
+        self._sizes = {}  # (path, mtime, size) -> full-resolution size
+        self._bytes = 0
+        self._load_locks = {}
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def current_bytes(self) -> int:
+        return self._bytes
+
+    @staticmethod
+    def _file_key(path) -> tuple:
+        path = Path(path).resolve()
+        stat = path.stat()
+        return (str(path), stat.st_mtime_ns, stat.st_size)
+
+    def get(self, path) -> Image.Image:
+        """Return the fully decoded image, decoding it on first use"""
+        return self._get_level(self._file_key(path), 1)
+
+    def image_size(self, path) -> tuple:
+        """Full-resolution (width, height) read from the header only"""
+        file_key = self._file_key(path)
+        with self._lock:
+            size = self._sizes.get(file_key)
+        if size is None:
+            with Image.open(file_key[0]) as image:
+                size = image.size
+            with self._lock:
+                self._sizes[file_key] = size
+        return size
+
+    def get_proxy(self, path, max_side: int) -> Image.Image:
+        """Return the smallest pyramid level whose longer side is still at least ``max_side``.
+
+        The result is at most twice ``max_side`` on its longer side, or the
+        full image if that is already small enough.
+        """
+        file_key = self._file_key(path)
+        longest = max(self.image_size(path))
+        factor = 1
+        while longest / (factor * 2) >= max_side:
+            factor *= 2
+        return self._get_level(file_key, factor)
+
+    def _get_level(self, file_key: tuple, factor: int) -> Image.Image:
+        key = file_key + (factor,)
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                return image
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Decode outside the cache lock so other files stay available
+        with load_lock:
+            with self._lock:
+                image = self._entries.get(key)
+                if image is not None:
+                    self._entries.move_to_end(key)
+                    return image
+
+            image = self._decode(file_key, factor)
+            self._put(key, image)
+        return image
+
+    def _decode(self, file_key: tuple, factor: int) -> Image.Image:
+        path = file_key[0]
+        if factor == 1:
+            print(f"Decoding image: {path}")
+            image = Image.open(path)
+            image.load()
+            return image
+
+        # Derive from a larger level that is already cached when possible
+        with self._lock:
+            source_factor = max(
+                (key[3] for key in self._entries if key[:3] == file_key and factor % key[3] == 0),
+                default=None
+            )
+            source = self._entries.get(file_key + (source_factor,)) if source_factor else None
+
+        if source is None:
+            source = Image.open(path)
+            full_size = source.size
+            if source.format == "JPEG":
+                # DCT scaling decodes at 1/2, 1/4 or 1/8 of the size directly
+                source.draft(source.mode, (math.ceil(full_size[0] / factor), math.ceil(full_size[1] / factor)))
+            source.load()
+            source_factor = round(full_size[0] / source.width) if source.width else 1
+
+        remaining = max(1, factor // max(1, source_factor))
+        proxy = source
+        if remaining > 1:
+            if proxy.mode in ("P", "1"):
+                proxy = proxy.convert("RGBA" if "transparency" in proxy.info else "RGB")
+            proxy = proxy.reduce(remaining)
+        proxy.format = source.format
+        return proxy
+
+    def _put(self, key: tuple, image: Image.Image) -> None:
+        nbytes = image_nbytes(image)
+        with self._lock:
+            self._entries[key] = image
+            self._bytes += nbytes
+            # Keep the image just added even if it alone exceeds the budget
+            while self._bytes > self._max_bytes and len(self._entries) > 1:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._bytes -= image_nbytes(evicted)
+                self._forget(evicted_key)
+
+    def _forget(self, key: tuple) -> None:
+        """Drop the bookkeeping of an evicted level; the header size goes with the file's last level"""
+        self._load_locks.pop(key, None)
+        if not any(other[:3] == key[:3] for other in self._entries):
+            self._sizes.pop(key[:3], None)
+
+    def clear(self) -> None:
+        """Drop every cached image"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._load_locks.clear()
+            self._bytes = 0
+
+
+image_cache = ImageCache()
@@ -0,0 +1,173 @@
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import onnxruntime as ort
+
+
+class SessionConfig:
+    """Options used when building onnxruntime inference sessions"""
+
+    OPTIMIZATION_LEVELS = {
+        "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }
+
+    def __init__(self,
+        intra_op_num_threads: int = 0,
+        inter_op_num_threads: int = 0,
+        graph_optimization_level: str = "all",
+        optimized_model_dir: Optional[str] = None,
+        providers: Optional[list] = None
+    ):
+        if graph_optimization_level not in self.OPTIMIZATION_LEVELS:
+            raise ValueError(f"Unknown graph optimization level: {graph_optimization_level}")
+
+        # 0 lets onnxruntime pick the number of threads
+        self.intra_op_num_threads = intra_op_num_threads
+        self.inter_op_num_threads = inter_op_num_threads
+        self.graph_optimization_level = graph_optimization_level
+        self.optimized_model_dir = Path(optimized_model_dir) if optimized_model_dir else None
+        self.providers = providers or ["CPUExecutionProvider"]
+
+    def key(self) -> tuple:
+        """Hashable summary of the options, used to tell sessions apart"""
+        return (
+            self.intra_op_num_threads,
+            self.inter_op_num_threads,
+            self.graph_optimization_level,
+            str(self.optimized_model_dir),
+            tuple(self.providers),
+        )
+
+    def replace(self, **changes) -> "SessionConfig":
+        """Return a copy of this config with some options changed"""
+        options = {
+            "intra_op_num_threads": self.intra_op_num_threads,
+            "inter_op_num_threads": self.inter_op_num_threads,
+            "graph_optimization_level": self.graph_optimization_level,
+            "optimized_model_dir": self.optimized_model_dir,
+            "providers": self.providers,
+        }
+        options.update(changes)
+        return SessionConfig(**options)
+
+    def optimized_model_path(self, model_path: Path) -> Optional[Path]:
+        """Path of the cached optimized graph for a model, if caching is enabled"""
+        if self.optimized_model_dir is None:
+            return None
+        return self.optimized_model_dir / f"{model_path.stem}.{self.graph_optimization_level}.onnx"
+
+    def create_session(self, model_path: Path) -> ort.InferenceSession:
+        """Build a session, reusing the cached optimized graph when it is up to date"""
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_num_threads
+        options.inter_op_num_threads = self.inter_op_num_threads
+        options.graph_optimization_level = self.OPTIMIZATION_LEVELS[self.graph_optimization_level]
+
+        load_path = model_path
+        cached_path = self.optimized_model_path(model_path)
+        if cached_path is not None:
+            if cached_path.exists() and cached_path.stat().st_mtime >= model_path.stat().st_mtime:
+                # The cached graph is already optimized, skip the optimization passes
+                load_path = cached_path
+                options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            else:
+                cached_path.parent.mkdir(parents=True, exist_ok=True)
+                options.optimized_model_filepath = str(cached_path)
+
+        return ort.InferenceSession(str(load_path), sess_options=options, providers=self.providers)
+
+
+class _Entry:
+    def __init__(self, session: ort.InferenceSession):
+        self.session = session
+        self.last_used = time.monotonic()
+
+
+class ModelRegistry:
+    """Process-wide cache of onnxruntime sessions.
+
+    Each model is loaded lazily on first use and shared by every caller
+    afterwards. Sessions that have not been used for ``idle_timeout``
+    seconds can be dropped with ``evict_idle`` to give the memory back.
+    """
+
+    def __init__(self, config: Optional[SessionConfig] = None, idle_timeout: float = 300.0):
+        self._config = config or SessionConfig()
+        self._idle_timeout = idle_timeout
+        self._entries = {}
+        self._load_locks = {}
+        self._lock = threading.Lock()
+
+    @property
+    def config(self) -> SessionConfig:
+        return self._config
+
+    def configure(self, config: Optional[SessionConfig] = None, idle_timeout: Optional[float] = None) -> None:
+        """Replace the session options; loaded sessions are rebuilt on next use"""
+        with self._lock:
+            if config is not None:
+                self._config = config
+                self._entries.clear()
+            if idle_timeout is not None:
+                self._idle_timeout = idle_timeout
+
+    def get_session(self, model_path, config: Optional[SessionConfig] = None) -> ort.InferenceSession:
+        """Return the shared session for a model, loading it on first use.
+
+        ``config`` overrides the registry-wide options; sessions built with
+        different options are cached separately.
+        """
+        path = str(Path(model_path).resolve())
+        with self._lock:
+            config = config or self._config
+            key = (path, config.key())
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.last_used = time.monotonic()
+                return entry.session
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so other models stay available
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.last_used = time.monotonic()
+                    return entry.session
+
+            print(f"Loading model: {path}")
+            session = config.create_session(Path(path))
+
+            with self._lock:
+                self._entries[key] = _Entry(session)
+        return session
+
+    def is_loaded(self, model_path) -> bool:
+        path = str(Path(model_path).resolve())
+        with self._lock:
+            return any(key[0] == path for key in self._entries)
+
+    def evict_idle(self, max_idle: Optional[float] = None) -> int:
+        """Drop sessions unused for ``max_idle`` seconds and return how many were dropped"""
+        max_idle = self._idle_timeout if max_idle is None else max_idle
+        now = time.monotonic()
+        with self._lock:
+            idle = [key for key, entry in self._entries.items() if now - entry.last_used >= max_idle]
+            for key in idle:
+                del self._entries[key]
+        for path, _ in idle:
+            print(f"Evicted idle model: {path}")
+        return len(idle)
+
+    def clear(self) -> None:
+        """Drop every loaded session"""
+        with self._lock:
+            self._entries.clear()
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,197 @@
+import atexit
+import os
+import re
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+# Names of the per-job files written before sessions existed, e.g. resized_<uuid>.png
+_LEGACY_NAME = re.compile(r"^[a-z_]+_[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\.\w+$")
+
+
+class _Artifact:
+    def __init__(self, size: int):
+        self.size = size
+        self.refs = 0
+
+
+class TempStore:
+    """Quota-bounded directory for temporary files.
+
+    Each process writes into its own ``session-<pid>`` directory, which is
+    removed at exit. Sessions left behind by a crashed process are removed
+    by ``cleanup_stale``, which runs before the first file is created.
+    Once the tracked files exceed ``max_bytes`` the least recently used
+    ones that are not referenced are deleted; files still shown in the UI
+    are pinned with ``acquire`` and unpinned with ``release``.
+    """
+
+    DEFAULT_MAX_BYTES = 2 << 30
+    TMPFS_DIR = Path("/dev/shm")
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES, tmpfs: bool = False):
+        self._root = Path(root) if root else None
+        self._max_bytes = max_bytes
+        self._tmpfs = tmpfs
+        self._session_dir = None
+        self._old_session_dirs = []
+        self._artifacts = OrderedDict()  # path -> _Artifact, least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def configure(self, root: Optional[str] = None, max_bytes: Optional[int] = None, tmpfs: Optional[bool] = None) -> None:
+        """Change the location or quota; a new location applies to files created afterwards"""
+        with self._lock:
+            if root is not None or tmpfs is not None:
+                self._root = Path(root) if root else self._root
+                self._tmpfs = self._tmpfs if tmpfs is None else tmpfs
+                if self._session_dir is not None:
+                    # Files already handed out stay valid until ``clear``
+                    self._old_session_dirs.append(self._session_dir)
+                    self._session_dir = None
+        if max_bytes is not None:
+            self._max_bytes = max_bytes
+            self.make_room(0)
+
+    @property
+    def root(self) -> Path:
+        """Directory holding the sessions; tmpfs is used only if it exists and is writable"""
+        if self._root is not None:
+            return self._root
+        if self._tmpfs and self.TMPFS_DIR.is_dir() and os.access(self.TMPFS_DIR, os.W_OK):
+            return self.TMPFS_DIR / "luma-studio"
+        return Path(tempfile.gettempdir()) / "luma-studio"
+
+    @property
+    def directory(self) -> Path:
+        """This process's session directory, created on first use"""
+        with self._lock:
+            if self._session_dir is None:
+                root = self.root
+                root.mkdir(parents=True, exist_ok=True)
+                self.cleanup_stale(root)
+                self._session_dir = root / f"session-{os.getpid()}"
+                self._session_dir.mkdir(exist_ok=True)
+            return self._session_dir
+
+    @property
+    def spill_directory(self) -> Path:
+        """Disk-backed directory for memory-mapped spill files; tmpfs would defeat their purpose"""
+        directory = self.directory
+        if self.TMPFS_DIR in directory.parents:
+            return Path(tempfile.gettempdir())
+        return directory
+
+    @property
+    def current_bytes(self) -> int:
+        return self._bytes
+
+    def new_path(self, prefix: str, suffix: str = "") -> Path:
+        """Unique path in the session directory; call ``add`` once the file is written"""
+        return self.directory / f"{prefix}_{uuid.uuid4()}{suffix}"
+
+    def add(self, path, acquire: bool = False) -> Path:
+        """Start tracking a written file, evicting older ones if over quota"""
+        path = Path(path)
+        size = path.stat().st_size
+        with self._lock:
+            artifact = self._artifacts.pop(path, None)
+            if artifact is not None:
+                self._bytes -= artifact.size
+                artifact.size = size
+            else:
+                artifact = _Artifact(size)
+            if acquire:
+                artifact.refs += 1
+            self._artifacts[path] = artifact
+            self._bytes += size
+        self.make_room(0)
+        return path
+
+    def acquire(self, path) -> None:
+        """Pin a file so eviction skips it, e.g. while the UI shows it"""
+        with self._lock:
+            artifact = self._artifacts.get(Path(path))
+            if artifact is not None:
+                artifact.refs += 1
+                self._artifacts.move_to_end(Path(path))
+
+    def release(self, path) -> None:
+        """Drop a pin taken with ``acquire``"""
+        with self._lock:
+            artifact = self._artifacts.get(Path(path))
+            if artifact is not None and artifact.refs > 0:
+                artifact.refs -= 1
+        self.make_room(0)
+
+    def make_room(self, nbytes: int) -> None:
+        """Evict unpinned files until ``nbytes`` more fit within the quota"""
+        evicted = []
+        with self._lock:
+            for path, artifact in list(self._artifacts.items()):
+                if self._bytes + nbytes <= self._max_bytes:
+                    break
+                if artifact.refs == 0:
+                    del self._artifacts[path]
+                    self._bytes -= artifact.size
+                    evicted.append(path)
+        for path in evicted:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def cleanup_stale(root: Path) -> int:
+        """Remove session directories of processes that are gone; returns how many"""
+        removed = 0
+        for entry in root.iterdir() if root.is_dir() else []:
+            if entry.is_dir() and entry.name.startswith("session-"):
+                try:
+                    pid = int(entry.name.split("-", 1)[1])
+                except ValueError:
+                    continue
+                if pid == os.getpid() or _process_alive(pid):
+                    continue
+                shutil.rmtree(entry, ignore_errors=True)
+                removed += 1
+            elif entry.is_file() and _LEGACY_NAME.match(entry.name):
+                entry.unlink(missing_ok=True)
+                removed += 1
+        if removed:
+            print(f"Removed {removed} stale temp entries from {root}")
+        return removed
+
+    def clear(self) -> None:
+        """Delete this process's session directories"""
+        with self._lock:
+            session_dirs = self._old_session_dirs + ([self._session_dir] if self._session_dir else [])
+            self._session_dir = None
+            self._old_session_dirs = []
+            self._artifacts.clear()
+            self._bytes = 0
+        for session_dir in session_dirs:
+            shutil.rmtree(session_dir, ignore_errors=True)
+
+
+def _process_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill terminates the process on Windows; keep other sessions there
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists but belongs to another user
+        return True
+    return True
+
+
+temp_store = TempStore()
+atexit.register(temp_store.clear)
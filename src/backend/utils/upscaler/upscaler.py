@@ -1,42 +1,277 @@
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import onnxruntime as ort
+from typing import Callable, Optional, Union
+from ..model_registry import model_registry
+from ..memory import available_memory
+from ..temp_store import temp_store
+from ...jobs.cancellation import CancellationToken
 import math
 import numpy as np
 from PIL import Image
 
 class Upscaler:
-    def __init__(self):
-        self._session = ort.InferenceSession(Path(__file__).parent / "models/real_esrgan_general_x4v3.onnx")
+    TILE_SIZE = 128
+    MODEL_SCALE = 4
+    DEFAULT_OVERLAP = 16
+    MAX_BATCH_SIZE = 32
+    DEFAULT_BATCH_SIZE = 8
+    MAX_WORKERS = 4
+    # Rough number of float32 feature maps per input pixel kept alive while a tile runs
+    ACTIVATION_CHANNELS = 256
+
+    def __init__(self, workers: Optional[int] = None):
+        cpu_count = os.cpu_count() or 1
+        self._workers = workers or max(1, min(self.MAX_WORKERS, cpu_count // 2))
+
+        config = None
+        if self._workers > 1 and model_registry.config.intra_op_num_threads == 0:
+            # Split the cores between concurrent runs instead of letting every run claim all of them
+            config = model_registry.config.replace(intra_op_num_threads=max(1, cpu_count // self._workers))
+        self._session = model_registry.get_session(Path(__file__).parent / "models/real_esrgan_general_x4v3.onnx", config)
         self._input_name = self._session.get_inputs()[0].name
         self._output_name = self._session.get_outputs()[0].name
-    
-    def upscale(self, image: Image.Image, scale: int = 4):
-        """Upscale the image"""
-        image = np.array(image)
-        h0, w0 = image.shape[:2]
-        tile_size = 128
-        h, w = math.ceil(h0 / tile_size) * tile_size, math.ceil(w0 / tile_size) * tile_size
-        expaned_image = np.zeros((h, w, 3), dtype=np.uint8)
-        expaned_image[:h0, :w0] = image
-        output = np.zeros((h * scale, w * scale, 3), dtype=np.uint8)
-        print(f"h0: {h0}, w0: {w0}, h: {h}, w: {w}")
-        print(f"output shape: {output.shape}")
-        for y in range(0, h, tile_size):
-            for x in range(0, w, tile_size):
-                print(f'y: {y}, x: {x}')
-                tile = expaned_image[y:y + tile_size, x:x + tile_size]
-                upsampled_tile = self._upscale(tile, scale)
-                output[y * scale:(y + tile_size) * scale, x * scale:(x + tile_size) * scale] = upsampled_tile
-        
-        output = output[:h0 * scale, :w0 * scale]
-        output = Image.fromarray(output)
-        return output
 
-    def _upscale(self, image: np.ndarray, scale: int = 4):
-        """Real function to upscale the image"""
-        inputs = np.transpose(image, (2, 0, 1))[np.newaxis].astype(np.float32) / 255.0
-        output = self._session.run(None, {self._input_name: inputs})[0]
-        output = np.transpose(output[0], (1, 2, 0))
-        output = (output * 255.0).clip(0, 255).astype(np.uint8)
+        # Models exported with a fixed batch dimension can only run that many tiles at once
+        batch_dim = self._session.get_inputs()[0].shape[0]
+        self._fixed_batch_size = batch_dim if isinstance(batch_dim, int) else None
+
+    def upscale(self,
+        image: Image.Image,
+        scale: int = 4,
+        batch_size: Optional[int] = None,
+        overlap: int = DEFAULT_OVERLAP,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Image.Image:
+        """Upscale the image, writing blended tiles straight into the result image"""
+        output = Image.new("RGB", (image.width * self.MODEL_SCALE, image.height * self.MODEL_SCALE))
+        self._run_tiles(image, output, batch_size, overlap, progress_callback, cancel_token)
+
+        if scale != self.MODEL_SCALE:
+            output = output.resize((image.width * scale, image.height * scale), Image.Resampling.LANCZOS)
         return output
-    
\ No newline at end of file
+
+    def upscale_to_array(self,
+        image: Image.Image,
+        batch_size: Optional[int] = None,
+        overlap: int = DEFAULT_OVERLAP,
+        out: Optional[np.ndarray] = None,
+        max_memory: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> np.ndarray:
+        """Upscale the image at the model scale into an (H, W, 3) uint8 array.
+
+        The result is written into ``out`` when given. Otherwise a new array
+        is allocated, or a memory-mapped file in ``spill_dir`` when the output
+        would not fit in ``max_memory`` bytes.
+        """
+        shape = (image.height * self.MODEL_SCALE, image.width * self.MODEL_SCALE, 3)
+        if out is None:
+            out_bytes = math.prod(shape)
+            if max_memory is not None and out_bytes > max_memory // 2:
+                out = self._create_spill_buffer(shape, spill_dir)
+            else:
+                out = np.empty(shape, dtype=np.uint8)
+        elif out.shape != shape or out.dtype != np.uint8:
+            raise ValueError(f"Output buffer must be uint8 with shape {shape}, got {out.dtype} {out.shape}")
+
+        if max_memory is not None and batch_size is None:
+            batch_size = self.auto_batch_size(budget=max_memory // 2 // self._workers)
+        self._run_tiles(image, out, batch_size, overlap, progress_callback, cancel_token)
+        return out
+
+    def _run_tiles(self,
+        image: Image.Image,
+        out: Union[np.ndarray, Image.Image],
+        batch_size: Optional[int],
+        overlap: int,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> None:
+        """Run the model over overlapping tiles in batches and blend them into ``out``.
+
+        Batches are run concurrently on ``workers`` threads; onnxruntime
+        releases the GIL inside ``run`` so the runs overlap. Results are
+        blended on the calling thread in submission order.
+        """
+        tile_size = self.TILE_SIZE
+        if not 0 <= overlap <= tile_size // 2:
+            raise ValueError(f"Tile overlap must be between 0 and {tile_size // 2}, got {overlap}")
+
+        source = np.asarray(image.convert("RGB") if image.mode != "RGB" else image)
+        h0, w0 = source.shape[:2]
+        ys = self._tile_starts(h0, tile_size, overlap)
+        xs = self._tile_starts(w0, tile_size, overlap)
+        positions = [(row, col) for row in range(len(ys)) for col in range(len(xs))]
+
+        # Spread the tiles over the workers before growing the batches
+        auto_size = math.ceil(len(positions) / self._workers)
+        batch_size = min(batch_size or self.auto_batch_size(), auto_size)
+        if self._fixed_batch_size is not None:
+            batch_size = self._fixed_batch_size
+        batches = [positions[start:start + batch_size] for start in range(0, len(positions), batch_size)]
+
+        def run_batch(batch: list) -> np.ndarray:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            inputs = np.zeros((batch_size, 3, tile_size, tile_size), dtype=np.float32)
+            for i, (row, col) in enumerate(batch):
+                tile = self._read_tile(source, ys[row], xs[col], tile_size)
+                np.multiply(tile.transpose(2, 0, 1), 1.0 / 255.0, out=inputs[i], casting="unsafe")
+
+            run_inputs = inputs if self._fixed_batch_size is not None else inputs[:len(batch)]
+            result = self._session.run([self._output_name], {self._input_name: run_inputs})[0]
+            result *= 255.0
+            return result
+
+        blender = _TileBlender(out, (h0, w0), ys, xs, tile_size, overlap, self.MODEL_SCALE)
+        done = 0
+        for batch, result in zip(batches, self._map_ordered(run_batch, batches)):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            for i, (row, col) in enumerate(batch):
+                blender.add(row, col, result[i].transpose(1, 2, 0))
+            done += len(batch)
+            if progress_callback:
+                progress_callback(done / len(positions))
+
+    def _map_ordered(self, func: Callable, items: list):
+        """Yield ``func(item)`` in order, keeping at most two batches per worker in flight"""
+        if self._workers == 1 or len(items) == 1:
+            for item in items:
+                yield func(item)
+            return
+
+        with ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="upscale") as executor:
+            pending = deque()
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= self._workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    @staticmethod
+    def _tile_starts(length: int, tile_size: int, overlap: int) -> list:
+        """Tile offsets along one axis; the last tile may run past the edge"""
+        if length <= tile_size:
+            return [0]
+        stride = tile_size - overlap
+        return [i * stride for i in range(1 + math.ceil((length - tile_size) / stride))]
+
+    @staticmethod
+    def _read_tile(source: np.ndarray, y: int, x: int, tile_size: int) -> np.ndarray:
+        """Slice a tile from the source, padding only tiles that cross the image edge"""
+        tile = source[y:y + tile_size, x:x + tile_size]
+        pad_h, pad_w = tile_size - tile.shape[0], tile_size - tile.shape[1]
+        if pad_h or pad_w:
+            mode = "reflect" if min(tile.shape[:2]) > 1 else "edge"
+            tile = np.pad(tile, ((0, pad_h), (0, pad_w), (0, 0)), mode=mode)
+        return tile
+
+    @staticmethod
+    def _create_spill_buffer(shape: tuple, spill_dir: Optional[str] = None) -> np.ndarray:
+        """Allocate a memory-mapped output buffer backed by an unlinked temp file"""
+        if spill_dir is None:
+            # Free quota held by older temp files before taking the space
+            temp_store.make_room(math.prod(shape))
+            spill_dir = temp_store.spill_directory
+        fd, path = tempfile.mkstemp(prefix="upscale_", suffix=".raw", dir=spill_dir)
+        try:
+            with os.fdopen(fd, "w+b") as f:
+                f.truncate(math.prod(shape))
+                buffer = np.memmap(f, dtype=np.uint8, mode="r+", shape=shape)
+        finally:
+            # The mapping keeps the data alive; nothing is left behind on crash
+            os.unlink(path)
+        return buffer
+
+    def auto_batch_size(self, tile_size: int = TILE_SIZE, scale: int = MODEL_SCALE, budget: Optional[int] = None) -> int:
+        """Pick a batch size that keeps one batch within a quarter of the free memory"""
+        if self._fixed_batch_size is not None:
+            return self._fixed_batch_size
+
+        free = available_memory()
+        limit = free // 4 if free is not None else None
+        if budget is not None:
+            limit = budget if limit is None else min(limit, budget)
+        if limit is None:
+            return self.DEFAULT_BATCH_SIZE
+
+        pixels = tile_size * tile_size
+        bytes_per_tile = 4 * (3 * pixels + 3 * pixels * scale * scale + self.ACTIVATION_CHANNELS * pixels)
+        return max(1, min(self.MAX_BATCH_SIZE, limit // bytes_per_tile))
+
+
+class _TileBlender:
+    """Blends overlapping upscaled tiles into an output buffer in raster order.
+
+    Neighbouring tiles are feathered with complementary linear ramps across
+    their overlap, which makes the blend separable: each tile is first mixed
+    with its left neighbour, then with the row above. Only the overlap strips
+    are carried between tiles, so no full-size intermediate is allocated.
+    """
+
+    def __init__(self, out, source_size: tuple, ys: list, xs: list, tile_size: int, overlap: int, scale: int):
+        self._out = out
+        self._h0, self._w0 = source_size
+        self._ys, self._xs = ys, xs
+        self._tile_size = tile_size
+        self._scale = scale
+        self._overlap = overlap * scale
+        self._ramp = (np.arange(self._overlap, dtype=np.float32) + 0.5) / max(self._overlap, 1)
+
+        out_tile = tile_size * scale
+        # Right edge of the previous tile and bottom edge of the previous row
+        self._h_carry = np.empty((out_tile, self._overlap, 3), dtype=np.float32)
+        self._v_carry = np.empty((self._overlap, self._w0 * scale, 3), dtype=np.float32)
+
+    def add(self, row: int, col: int, tile: np.ndarray) -> None:
+        """Blend one (H, W, 3) float tile; tiles must arrive in raster order"""
+        y, x = self._ys[row], self._xs[col]
+        valid_h = min(self._tile_size, self._h0 - y) * self._scale
+        valid_w = min(self._tile_size, self._w0 - x) * self._scale
+        tile = tile[:valid_h, :valid_w]
+
+        overlap = self._overlap
+        left = overlap if col > 0 else 0
+        right = overlap if col < len(self._xs) - 1 else 0
+        top = overlap if row > 0 else 0
+        bottom = overlap if row < len(self._ys) - 1 else 0
+
+        if left:
+            carry = self._h_carry[:valid_h]
+            tile[:, :left] -= carry
+            tile[:, :left] *= self._ramp[:, None]
+            tile[:, :left] += carry
+        if right:
+            # Finished by the next tile in this row
+            self._h_carry[:valid_h] = tile[:, valid_w - right:]
+
+        ox = x * self._scale
+        block = tile[:, :valid_w - right]
+        columns = slice(ox, ox + block.shape[1])
+        if top:
+            carry = self._v_carry[:, columns]
+            block[:top] -= carry
+            block[:top] *= self._ramp[:, None, None]
+            block[:top] += carry
+        if bottom:
+            # Finished by the tile below
+            self._v_carry[:, columns] = block[valid_h - bottom:]
+
+        block = block[:valid_h - bottom]
+        np.clip(block, 0, 255, out=block)
+        np.rint(block, out=block)
+        self._write(y * self._scale, ox, block.astype(np.uint8))
+
+    def _write(self, oy: int, ox: int, block: np.ndarray) -> None:
+        if isinstance(self._out, np.ndarray):
+            self._out[oy:oy + block.shape[0], ox:ox + block.shape[1]] = block
+        else:
+            self._out.paste(Image.fromarray(block), (ox, oy))
@@ -0,0 +1,500 @@
+"""luma-batch: run LumaStudio tools over image files without a display.
+
+Examples:
+    python src/batch.py resize photos/ -o out/ --recursive --width 1280
+    python src/batch.py compress "shots/**/*.jpg" -o out/ --quality 80 --workers 8
+    python src/batch.py compress uploads/ -o web/ --format WEBP --target-size 200
+    python src/batch.py export masters/ -o site/img/ --profile web
+    python src/batch.py remove_bg catalog/ -o cutouts/ --bg-color ""
+    python src/batch.py blur_video footage/ "shoot/frames_%05d.png" -o anonymized/ --detect-every 5
+
+Finished files are recorded in a manifest inside the output directory, so
+an interrupted run can be restarted with the same command and only the
+remaining files are processed.
+"""
+import argparse
+import glob
+import json
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from PIL import Image
+
+from backend.operations.blur_face import blur_faces, MODES as BLUR_MODES, SHAPES as BLUR_SHAPES
+from backend.operations.blur_video import blur_video
+from backend.operations.compress import compress_image, compress_to_size
+from backend.operations.convert import convert_image, DEFAULT_PRESET, PRESETS as CONVERT_PRESETS
+from backend.operations.crop import crop_file, crop_image, lossless_crop, JPEGTRAN
+from backend.operations.export import export_variants, write_export, PROFILES as EXPORT_PROFILES
+from backend.operations.remove_bg import remove_background, remove_backgrounds
+from backend.operations.resize import resize_file, resize_image
+from backend.operations.upscale import upscale_image
+from backend.utils.bg_remover.bg_remover import BgRemover, TIERS as BG_TIERS
+from backend.utils.model_registry import model_registry, SessionConfig
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff"}
+VIDEO_EXTENSIONS = {".mp4", ".m4v", ".mov", ".avi", ".mkv"}
+FORMAT_EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp", "BMP": ".bmp", "TIFF": ".tif"}
+MANIFEST_NAME = "luma-batch-manifest.jsonl"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="luma-batch", description="Run a LumaStudio tool over many images.")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("inputs", nargs="+", help="Files, directories or glob patterns (use ** with --recursive)")
+    common.add_argument("-o", "--output", required=True, help="Output directory")
+    common.add_argument("-r", "--recursive", action="store_true", help="Descend into subdirectories")
+    common.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Parallel worker processes")
+    common.add_argument("--manifest", help=f"Resume manifest (default: OUTPUT/{MANIFEST_NAME})")
+    common.add_argument("--force", action="store_true", help="Reprocess files already listed in the manifest")
+
+    operations = parser.add_subparsers(dest="operation", required=True)
+
+    resize = operations.add_parser("resize", parents=[common], help="Resize images")
+    resize.add_argument("--width", type=int, help="Target width; keeps the aspect ratio if --height is omitted")
+    resize.add_argument("--height", type=int, help="Target height; keeps the aspect ratio if --width is omitted")
+    resize.add_argument(
+        "--memory-budget", type=int, metavar="MB", help="Working memory per worker; large scans are resized in bands to fit"
+    )
+
+    crop = operations.add_parser("crop", parents=[common], help="Crop images")
+    crop.add_argument("--box", type=int, nargs=4, metavar=("X", "Y", "WIDTH", "HEIGHT"), required=True)
+    crop.add_argument(
+        "--lossless", action="store_true", help="Crop JPEGs without re-encoding (needs jpegtran); X and Y snap to the block grid"
+    )
+
+    compress = operations.add_parser("compress", parents=[common], help="Re-encode images at a lower quality")
+    compress.add_argument("--quality", type=int, default=85)
+    compress.add_argument("--format", help="Output format (default: the source format)")
+    compress.add_argument(
+        "--target-size", type=int, metavar="KB", help="Highest quality whose file fits in KB kilobytes (overrides --quality)"
+    )
+
+    convert = operations.add_parser("convert", parents=[common], help="Convert images to another format")
+    convert.add_argument("--format", required=True, choices=sorted(FORMAT_EXTENSIONS))
+    convert.add_argument(
+        "--preset", choices=list(CONVERT_PRESETS), help=f"Encoder speed/size trade-off (default: {DEFAULT_PRESET})"
+    )
+
+    export = operations.add_parser(
+        "export", parents=[common], help="Write every width and format of a profile, with a JSON manifest per image"
+    )
+    export.add_argument("--profile", choices=sorted(EXPORT_PROFILES), default="web")
+
+    blur_face = operations.add_parser("blur_face", parents=[common], help="Mask detected faces")
+    blur_face.add_argument("--opacity", type=float, default=1.0, help="Blend of the effect over faces; 1 hides them fully")
+    blur_face.add_argument("--color", default="#3b82f6")
+    blur_face.add_argument("--shape", choices=BLUR_SHAPES, default="rectangle")
+    blur_face.add_argument("--mode", choices=BLUR_MODES, default="gaussian")
+
+    blur_video = operations.add_parser(
+        "blur_video", parents=[common], help="Mask faces in videos or printf-style frame sequences (frames_%%05d.png)"
+    )
+    blur_video.add_argument("--opacity", type=float, default=1.0, help="Blend of the effect over faces; 1 hides them fully")
+    blur_video.add_argument("--color", default="#3b82f6")
+    blur_video.add_argument("--shape", choices=BLUR_SHAPES, default="rectangle")
+    blur_video.add_argument("--mode", choices=BLUR_MODES, default="gaussian")
+    blur_video.add_argument("--detect-every", type=int, default=5, help="Run detection every N frames and track in between")
+
+    remove_bg = operations.add_parser("remove_bg", parents=[common], help="Remove image backgrounds")
+    remove_bg.add_argument("--bg-color", default="#ffffff", help='Background color, or "" to keep transparency')
+    remove_bg.add_argument("--crop", action="store_true")
+    remove_bg.add_argument("--tier", choices=sorted(BG_TIERS), help="Quality/speed tier (default: picked per image size)")
+    remove_bg.add_argument(
+        "--batch-size", type=int, default=BgRemover.MAX_BATCH_SIZE, help="Images per model run in each worker"
+    )
+
+    upscale = operations.add_parser("upscale", parents=[common], help="Upscale images")
+    upscale.add_argument("--scale", type=int, choices=[2, 3, 4], default=4)
+
+    return parser
+
+
+def operation_params(args: argparse.Namespace) -> dict:
+    """Parameters of the chosen operation, also used to key the manifest"""
+    if args.operation == "resize":
+        if not args.width and not args.height:
+            raise SystemExit("resize needs --width and/or --height")
+        params = {"width": args.width, "height": args.height}
+        if args.memory_budget:
+            params["memory_budget"] = args.memory_budget
+        return params
+    if args.operation == "crop":
+        if args.lossless and JPEGTRAN is None:
+            raise SystemExit("--lossless needs jpegtran (libjpeg-turbo) on the PATH")
+        return {"box": args.box, "lossless": True} if args.lossless else {"box": args.box}
+    if args.operation == "compress":
+        params = {"quality": args.quality, "format": args.format.upper() if args.format else None}
+        if args.target_size:
+            # Only keyed when given, so manifests of earlier runs stay valid
+            params["target_size"] = args.target_size
+        return params
+    if args.operation == "convert":
+        params = {"format": args.format.upper()}
+        if args.preset:
+            params["preset"] = args.preset
+        return params
+    if args.operation == "export":
+        return {"profile": args.profile}
+    if args.operation == "blur_face":
+        return {"opacity": args.opacity, "color": args.color, "shape": args.shape, "mode": args.mode}
+    if args.operation == "blur_video":
+        if args.detect_every < 1:
+            raise SystemExit("blur_video needs --detect-every of at least 1")
+        return {
+            "opacity": args.opacity,
+            "color": args.color,
+            "shape": args.shape,
+            "mode": args.mode,
+            "detect_every": args.detect_every,
+        }
+    if args.operation == "remove_bg":
+        return {"bg_color": args.bg_color, "crop": args.crop, "tier": args.tier}
+    if args.operation == "upscale":
+        # Processes already use every core; keep one tile worker per process
+        return {"scale": args.scale, "workers": 1 if args.workers > 1 else None}
+    raise ValueError(f"Unknown operation: {args.operation}")
+
+
+def output_extension(operation: str, params: dict, source: Path) -> str:
+    if operation in ("compress", "convert") and params["format"]:
+        return FORMAT_EXTENSIONS.get(params["format"], "." + params["format"].lower())
+    if operation == "remove_bg" and not params["bg_color"]:
+        return ".png"
+    if operation == "export":
+        # The variants are written next to their manifest
+        return ".json"
+    return source.suffix
+
+
+def resize_dimensions(params: dict, size: tuple) -> tuple:
+    """Output size of a resize, filling in the side left out from the aspect ratio"""
+    width, height = params["width"], params["height"]
+    if not height:
+        height = max(1, round(size[1] * width / size[0]))
+    elif not width:
+        width = max(1, round(size[0] * height / size[1]))
+    return width, height
+
+
+def run_operation(operation: str, params: dict, image: Image.Image):
+    """Apply one operation; returns an image or already encoded bytes"""
+    if operation == "resize":
+        return resize_image(image, *resize_dimensions(params, image.size))
+    if operation == "crop":
+        return crop_image(image, *params["box"])
+    if operation == "compress":
+        if params.get("target_size"):
+            # Processes already use every core, so the search keeps its default single worker
+            return compress_to_size(image, params["target_size"] * 1024, params["format"] or image.format or "JPEG")
+        return compress_image(image, params["quality"], params["format"] or image.format or "JPEG")
+    if operation == "convert":
+        return convert_image(image, params["format"], params.get("preset", DEFAULT_PRESET))
+    if operation == "blur_face":
+        return blur_faces(image, params["opacity"], params["color"], params["shape"], params["mode"])
+    if operation == "remove_bg":
+        return remove_background(image, params["bg_color"], params["crop"], params["tier"])
+    if operation == "upscale":
+        return upscale_image(image, params["scale"], workers=params["workers"])
+    raise ValueError(f"Unknown operation: {operation}")
+
+
+def process_file(operation: str, params: dict, input_path: str, output_path: str) -> dict:
+    """Worker entry point: process one file and write the output atomically"""
+    if operation == "blur_video":
+        return process_video(params, input_path, output_path)
+    if operation == "export":
+        return process_export(params, input_path, output_path)
+
+    start = time.perf_counter()
+    if operation in ("resize", "crop"):
+        # Read in bands or regions rather than decoded whole, so scans past Pillow's
+        # decompression bomb limit are fine here
+        Image.MAX_IMAGE_PIXELS = None
+
+    if operation == "resize":
+        with Image.open(input_path) as image:
+            pixels = image.width * image.height
+            size = resize_dimensions(params, image.size)
+        memory_budget = params.get("memory_budget")
+        result = resize_file(input_path, *size, memory_budget=memory_budget and memory_budget << 20)
+    elif operation == "crop":
+        # Only the crop is read where the layout allows; the output keeps the source format
+        with Image.open(input_path) as image:
+            pixels = image.width * image.height
+            lossless = params.get("lossless") and image.format in ("JPEG", "MPO")
+        result, _ = (lossless_crop if lossless else crop_file)(input_path, *params["box"])
+    else:
+        with Image.open(input_path) as image:
+            image.load()
+            pixels = image.width * image.height
+            result = run_operation(operation, params, image)
+
+    write_output(result, output_path)
+    return {
+        "ms": (time.perf_counter() - start) * 1000,
+        "pixels": pixels,
+        "bytes": os.path.getsize(output_path),
+    }
+
+
+def process_chunk(operation: str, params: dict, files: list) -> list:
+    """Worker entry point for several files; returns their stats, or {"error": ...} for failures"""
+    if operation == "remove_bg" and len(files) > 1:
+        return process_bg_batch(params, files)
+
+    results = []
+    for input_path, output_path in files:
+        try:
+            results.append(process_file(operation, params, input_path, output_path))
+        except Exception as e:
+            results.append({"error": str(e)})
+    return results
+
+
+# One remover per tier and worker process, so their input buffers are reused by every chunk
+_bg_removers = {}
+
+
+def process_bg_batch(params: dict, files: list) -> list:
+    """Remove the backgrounds of several files in batched model runs"""
+
+    start = time.perf_counter()
+    results = [None] * len(files)
+    images, loaded = [], []
+    for i, (input_path, _) in enumerate(files):
+        try:
+            image = Image.open(input_path)
+            image.load()
+            images.append(image)
+            loaded.append(i)
+        except Exception as e:
+            results[i] = {"error": str(e)}
+
+    try:
+        cutouts = remove_backgrounds(
+            images, params["bg_color"], params["crop"], params["tier"], batch_size=len(images), removers=_bg_removers
+        )
+    except Exception as e:
+        return [result or {"error": str(e)} for result in results]
+
+    # The model ran once for the chunk; share its time between the files
+    ms = (time.perf_counter() - start) * 1000 / max(1, len(loaded))
+    for i, image, cutout in zip(loaded, images, cutouts):
+        output_path = files[i][1]
+        try:
+            item_start = time.perf_counter()
+            write_output(cutout, output_path)
+            results[i] = {
+                "ms": ms + (time.perf_counter() - item_start) * 1000,
+                "pixels": image.width * image.height,
+                "bytes": os.path.getsize(output_path),
+            }
+        except Exception as e:
+            results[i] = {"error": str(e)}
+        image.close()
+    return results
+
+
+def write_output(result, output_path: str) -> None:
+    """Write an image or encoded bytes to ``output_path`` atomically"""
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    temp_path = f"{output_path}.part"
+    if isinstance(result, bytes):
+        with open(temp_path, "wb") as f:
+            f.write(result)
+    else:
+        format = Image.registered_extensions().get(Path(output_path).suffix.lower(), "PNG")
+        if format == "JPEG" and result.mode not in ("RGB", "L"):
+            result = result.convert("RGB")
+        result.save(temp_path, format=format)
+    os.replace(temp_path, output_path)
+
+
+def process_video(params: dict, input_path: str, output_path: str) -> dict:
+    """Anonymize one video or frame sequence; sequences are written frame by frame in place"""
+    output = Path(output_path)
+    # The writer picks the container from the extension, so keep it on the temporary name
+    temp_path = output if "%" in output.name else output.with_name(f"{output.stem}.part{output.suffix}")
+    stats = blur_video(
+        input_path,
+        str(temp_path),
+        params["opacity"],
+        params["color"],
+        params["shape"],
+        params["mode"],
+        params["detect_every"],
+    )
+    if temp_path != output:
+        os.replace(temp_path, output)
+
+    return {
+        "ms": stats["seconds"] * 1000,
+        "pixels": stats["frames"] * stats["width"] * stats["height"],
+        "bytes": os.path.getsize(output) if temp_path != output else None,
+        "frames": stats["frames"],
+        "fps": stats["fps"],
+    }
+
+
+def process_export(params: dict, input_path: str, output_path: str) -> dict:
+    """Export one image at every width and format of a profile; ``output_path`` is its manifest"""
+    start = time.perf_counter()
+    with Image.open(input_path) as image:
+        image.load()
+        pixels = image.width * image.height
+        # Processes already use every core; encode the variants one at a time
+        variants = export_variants(image, EXPORT_PROFILES[params["profile"]], workers=1)
+
+    output = Path(output_path)
+    write_export(variants, output.parent, output.stem)
+    return {
+        "ms": (time.perf_counter() - start) * 1000,
+        "pixels": pixels,
+        "bytes": sum(len(variant["data"]) for variant in variants),
+        "variants": len(variants),
+    }
+
+
+def init_worker(threads_per_worker: int) -> None:
+    # Share the cores between worker processes instead of oversubscribing them
+    model_registry.configure(SessionConfig(intra_op_num_threads=threads_per_worker))
+
+
+def collect_inputs(patterns: list, recursive: bool, extensions: set = IMAGE_EXTENSIONS) -> list:
+    """Expand files, directories and globs into (path, base directory) pairs"""
+    found = {}
+    for pattern in patterns:
+        if "%" in os.path.basename(pattern) and extensions is VIDEO_EXTENSIONS:
+            # Frame sequence, opened as a whole by the video reader
+            path = Path(pattern)
+            found.setdefault(path.resolve(), (path, path.parent.parent))
+            continue
+        if os.path.isdir(pattern):
+            base = Path(pattern)
+            candidates = base.rglob("*") if recursive else base.iterdir()
+        elif any(char in pattern for char in "*?["):
+            prefix = pattern[:min(pattern.index(char) for char in "*?[" if char in pattern)]
+            base = Path(os.path.dirname(prefix) or ".")
+            candidates = (Path(path) for path in glob.iglob(pattern, recursive=recursive))
+        else:
+            base = Path(pattern).parent
+            candidates = [Path(pattern)]
+
+        for path in candidates:
+            if path.is_file() and path.suffix.lower() in extensions:
+                found.setdefault(path.resolve(), (path, base))
+    return sorted(found.values())
+
+
+def output_exists(output_path: Path) -> bool:
+    """Whether an output is on disk; frame sequences count when any of their frames is"""
+    if "%" not in output_path.name:
+        return output_path.exists()
+    # A printf-style frame number such as %05d matches the digits of any frame
+    return any(output_path.parent.glob(re.sub(r"%0?\d*d", "*", output_path.name)))
+
+
+def load_manifest(path: Path) -> dict:
+    done = {}
+    if path.exists():
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn last line from an interrupted run
+                    continue
+                if record.get("status") == "ok":
+                    done[record["key"]] = record
+    return done
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def print_summary(latencies: list, pixels: int, skipped: int, failed: int, elapsed: float) -> None:
+    print(f"\nProcessed {len(latencies)} files, skipped {skipped}, failed {failed} in {elapsed:.1f} s")
+    if latencies:
+        print(f"Throughput: {len(latencies) / elapsed:.2f} files/s, {pixels / 1e6 / elapsed:.2f} MP/s")
+        print(
+            f"Latency: p50 {percentile(latencies, 0.5):.0f} ms, "
+            f"p95 {percentile(latencies, 0.95):.0f} ms, max {max(latencies):.0f} ms"
+        )
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    params = operation_params(args)
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = Path(args.manifest) if args.manifest else output_dir / MANIFEST_NAME
+    done = {} if args.force else load_manifest(manifest_path)
+    params_key = json.dumps(params, sort_keys=True)
+
+    tasks = []
+    skipped = 0
+    extensions = VIDEO_EXTENSIONS if args.operation == "blur_video" else IMAGE_EXTENSIONS
+    for path, base in collect_inputs(args.inputs, args.recursive, extensions):
+        relative = path.relative_to(base) if path.is_relative_to(base) else Path(path.name)
+        output_path = output_dir / relative.with_suffix(output_extension(args.operation, params, path))
+        key = f"{args.operation}:{params_key}:{path.resolve()}"
+        if key in done and output_exists(output_path):
+            skipped += 1
+            continue
+        tasks.append((key, str(path), str(output_path)))
+
+    print(f"{args.operation}: {len(tasks)} files to process, {skipped} already done")
+    workers = max(1, min(args.workers, len(tasks) or 1))
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+
+    # Models that take batches get several files per task, without leaving workers idle
+    chunk_size = max(1, min(getattr(args, "batch_size", 1), math.ceil(len(tasks) / workers)))
+    chunks = [tasks[start:start + chunk_size] for start in range(0, len(tasks), chunk_size)]
+
+    latencies, pixels, failed = [], 0, 0
+    start = time.perf_counter()
+    with open(manifest_path, "a") as manifest, ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(threads_per_worker,)
+    ) as executor:
+        futures = {
+            executor.submit(
+                process_chunk, args.operation, params, [(input_path, output_path) for _, input_path, output_path in chunk]
+            ): chunk
+            for chunk in chunks
+        }
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                # The worker itself died, e.g. out of memory
+                results = [{"error": str(e)}] * len(chunk)
+
+            for (key, input_path, output_path), stats in zip(chunk, results):
+                record = {"key": key, "input": input_path, "output": output_path}
+                if "error" in stats:
+                    record.update(status="failed", error=stats["error"])
+                    failed += 1
+                    print(f"Failed: {input_path}: {stats['error']}", file=sys.stderr)
+                else:
+                    record.update(status="ok", **stats)
+                    latencies.append(stats["ms"])
+                    pixels += stats["pixels"]
+                    if "fps" in stats:
+                        print(f"{input_path}: {stats['frames']} frames at {stats['fps']:.1f} fps")
+                manifest.write(json.dumps(record) + "\n")
+            manifest.flush()
+
+    print_summary(latencies, pixels, skipped, failed, time.perf_counter() - start)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,10 @@ import os
 from PySide6.QtGui import QGuiApplication
 from PySide6.QtQml import QQmlApplicationEngine
 from backend.app_controller import AppController
+from backend.image_provider import ImageProvider
 from backend.models.tool_model import ToolModel
+from backend.utils.model_registry import model_registry, SessionConfig
+from backend.utils.temp_store import temp_store
 
 def compile_resources():
     base_path = os.path.dirname(__file__)
@@ -14,6 +17,16 @@ def main():
     import resources_rc
 
     app = QGuiApplication(sys.argv)
+
+    # Cache optimized ONNX graphs so later launches skip graph optimization
+    model_registry.configure(SessionConfig(
+        optimized_model_dir=os.path.join(os.path.expanduser("~"), ".cache", "luma-studio", "models")
+    ))
+
+    # LUMA_STUDIO_TMPFS=1 keeps temp files in /dev/shm, e.g. on kiosks with slow or small disks
+    temp_store.configure(tmpfs=os.environ.get("LUMA_STUDIO_TMPFS") == "1")
+    # Remove what a crashed previous run left behind
+    temp_store.cleanup_stale(temp_store.root)
     engine = QQmlApplicationEngine()
 
     # Register models
@@ -23,6 +36,7 @@ def main():
     # Register image processor
     app_controller = AppController()
     engine.rootContext().setContextProperty("appController", app_controller)
+    engine.addImageProvider(ImageProvider.NAME, app_controller.image_provider)
 
     # Load QML
     qml_file = os.path.join(os.path.dirname(__file__), "qml/main.qml")
@@ -11,6 +11,8 @@ Rectangle {
     radius: 8
 
     property string source: ""
+    // Shown instead of the source while a tool preview is available
+    property string previewSource: ""
     signal imageLoaded(string imageUrl)
 
     // Reset
@@ -151,7 +153,7 @@ Rectangle {
     Image {
         anchors.fill: parent
         anchors.margins: 20
-        source: root.source
+        source: root.previewSource || root.source
         fillMode: Image.PreserveAspectFit
         visible: root.source !== ""
         
@@ -120,6 +120,8 @@ Rectangle {
 
             Image {
                 source: root.source
+                // Results come from the in-memory image provider; convert them off the UI thread
+                asynchronous: true
                 fillMode: Image.PreserveAspectFit
                 width: parent.width
                 height: parent.height
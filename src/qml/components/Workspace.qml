@@ -13,6 +13,7 @@ Item {
     property string currentImage: ""
     property var imageInfo: ({ width: 0, height: 0, size: "0 KB" })
     property string processedImage: ""
+    property string previewImage: ""
 
     state: "empty"
 
@@ -23,6 +24,7 @@ Item {
             PropertyChanges { target: root; currentTool: "" }
             PropertyChanges { target: root; currentToolName: "" }
             PropertyChanges { target: root; processedImage: "" }
+            PropertyChanges { target: root; previewImage: "" }
         },
         State {
             name: "edit"
@@ -37,6 +39,7 @@ Item {
     Connections {
         target: appController
         function onImageLoaded(width, height, size) {
+            root.previewImage = ""
             root.imageInfo = {
                 width: width,
                 height: height,
@@ -45,10 +48,16 @@ Item {
         }
 
         function onProcessorChanged(processorName) {
+            root.previewImage = ""
             root.imageInfo = appController.loadedImageInfo
         }
 
+        function onPreviewReady(url) {
+            root.previewImage = url
+        }
+
         function onProcessingCompleted(result) {
+            root.previewImage = ""
             root.processedImage = result
             root.state = "result"
         }
@@ -85,6 +94,7 @@ Item {
                 anchors.fill: parent
                 anchors.margins: 20
                 source: root.currentImage
+                previewSource: root.previewImage
                 onImageLoaded: (imageUrl) => {
                     root.currentImage = imageUrl
                     root.state = "edit"
@@ -9,12 +9,24 @@ Item {
     property bool updatingValues: false
     property int originalWidth: 0
     property int originalHeight: 0
-    property double defaultOpacity: 0.95
+    property double defaultOpacity: 1.0
     property string defaultMaskColor: "#3b82f6"
     property string defaultShape: "Rectangle"
+    property string defaultMode: "Gaussian"
     property string maskColor: defaultMaskColor
     property string shape: defaultShape
 
+    function requestPreview() {
+        if (!root.updatingValues) {
+            appController.requestPreview({
+                opacity: opacitySlider.value,
+                mask_color: root.maskColor,
+                mask_shape: shapeCombo.currentText.toLowerCase(),
+                mode: modeCombo.currentText.toLowerCase()
+            })
+        }
+    }
+
     Connections {
         target: appController
         function onImageLoaded(width, height, size) {
@@ -58,6 +70,20 @@ Item {
                 anchors.fill: parent
                 spacing: 10
 
+                Label {
+                    text: "Mode"
+                    color: "#666666"
+                }
+
+                ComboBox {
+                    id: modeCombo
+                    model: ["Gaussian", "Box", "Pixelate", "Solid"]
+                    currentIndex: model.indexOf(root.defaultMode)
+                    Layout.fillWidth: true
+                    enabled: !root.isProcessing
+                    onCurrentIndexChanged: root.requestPreview()
+                }
+
                 Label {
                     text: "Blur Opacity: " + opacitySlider.value.toFixed(1)
                     color: "#666666"
@@ -71,18 +97,24 @@ Item {
                     stepSize: 0.1
                     Layout.fillWidth: true
                     enabled: !root.isProcessing
+                    onValueChanged: root.requestPreview()
                 }
 
                 Label {
                     text: "Mask Color"
                     color: "#666666"
+                    visible: modeCombo.currentText === "Solid"
                 }
 
                 CustomColorPicker {
                     Layout.fillWidth: true
+                    visible: modeCombo.currentText === "Solid"
                     enabled: !root.isProcessing
                     color: root.maskColor
-                    onColorChanged: root.maskColor = selectedColor
+                    onColorChanged: {
+                        root.maskColor = selectedColor
+                        root.requestPreview()
+                    }
                 }
 
                 Label {
@@ -92,10 +124,11 @@ Item {
 
                 ComboBox {
                     id: shapeCombo
-                    model: ["Rectangle", "Circle"]
-                    currentIndex: 0
+                    model: ["Rectangle", "Circle", "Ellipse"]
+                    currentIndex: model.indexOf(root.defaultShape)
                     Layout.fillWidth: true
                     enabled: !root.isProcessing
+                    onCurrentIndexChanged: root.requestPreview()
                 }
             }
         }
@@ -114,8 +147,10 @@ Item {
                     root.updatingValues = true
                     opacitySlider.value = root.defaultOpacity
                     root.maskColor = root.defaultMaskColor
-                    shapeCombo.currentIndex = root.defaultShape
+                    shapeCombo.currentIndex = shapeCombo.model.indexOf(root.defaultShape)
+                    modeCombo.currentIndex = modeCombo.model.indexOf(root.defaultMode)
                     root.updatingValues = false
+                    root.requestPreview()
                 }
             }
 
@@ -135,7 +170,8 @@ Item {
                     appController.blurFaces(
                         opacitySlider.value,
                         root.maskColor,
-                        shapeCombo.currentText.toLowerCase()
+                        shapeCombo.currentText.toLowerCase(),
+                        modeCombo.currentText.toLowerCase()
                     )
                 }
             }
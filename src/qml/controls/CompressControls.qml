@@ -86,6 +86,11 @@ ColumnLayout {
                 stepSize: 1
                 value: 85
                 width: parent.width
+                onValueChanged: {
+                    if (!root.updatingValues) {
+                        appController.requestPreview({ quality: Math.round(value) })
+                    }
+                }
             }
 
             Label {
@@ -93,6 +98,35 @@ ColumnLayout {
                 font.pixelSize: 12
                 color: "#999999"
             }
+
+            // Searches for the best quality that fits instead of using the slider
+            CheckBox {
+                id: targetSizeCheckBox
+                text: "Target file size"
+                checked: false
+                enabled: !root.isProcessing
+            }
+
+            Row {
+                spacing: 8
+                visible: targetSizeCheckBox.checked
+
+                SpinBox {
+                    id: targetSizeSpinBox
+                    from: 10
+                    to: 100000
+                    stepSize: 10
+                    value: 200
+                    editable: true
+                    enabled: !root.isProcessing
+                }
+
+                Label {
+                    text: "KB"
+                    color: "#666666"
+                    anchors.verticalCenter: parent.verticalCenter
+                }
+            }
         }
     }
 
@@ -189,6 +223,8 @@ ColumnLayout {
             onClicked: {
                 root.updatingValues = true
                 qualitySlider.value = 85
+                targetSizeCheckBox.checked = false
+                targetSizeSpinBox.value = 200
                 root.updatingValues = false
             }
         }
@@ -207,7 +243,8 @@ ColumnLayout {
             enabled: !root.isProcessing
             onClicked: {
                 appController.compressImage(
-                    qualitySlider.value
+                    qualitySlider.value,
+                    targetSizeCheckBox.checked ? targetSizeSpinBox.value : 0
                 )
             }
         }
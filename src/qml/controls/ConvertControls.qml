@@ -1,12 +1,16 @@
 import QtQuick
 import QtQuick.Controls
 import QtQuick.Layouts
+import QtQuick.Dialogs
 
 Item {
     id: root
     property var imageInfo: null
     property string selectedFormat: "JPEG"
+    property string selectedPreset: "balanced"
+    property string presetReport: ""
     property bool isProcessing: false
+    property bool isComparing: false
     property bool updatingValues: false
 
     Connections {
@@ -35,6 +39,30 @@ Item {
             }
         }
 
+        function onPresetReportStarted() {
+            root.isComparing = true
+        }
+
+        function onPresetReportReady(report) {
+            root.isComparing = false
+            var lines = []
+            var entries = JSON.parse(report)
+            for (var i = 0; i < entries.length; i++) {
+                var entry = entries[i]
+                lines.push(entry.preset + ": " + Math.round(entry.ms) + " ms, " + (entry.bytes / 1024).toFixed(1) + " KB")
+            }
+            root.presetReport = lines.join("\n")
+        }
+
+        function onPresetReportFailed(error) {
+            root.isComparing = false
+            console.error("Preset comparison failed:", error)
+        }
+
+        function onPresetReportCancelled() {
+            root.isComparing = false
+        }
+
         function onProcessingFailed(error) {
             root.isProcessing = false
             console.error("Processing failed:", error)
@@ -63,7 +91,10 @@ Item {
                     id: formatCombo
                     model: ["JPEG", "PNG", "WebP"]
                     currentIndex: 0
-                    onCurrentTextChanged: root.selectedFormat = currentText
+                    onCurrentTextChanged: {
+                        root.selectedFormat = currentText
+                        root.presetReport = ""
+                    }
                     Layout.fillWidth: true
                     enabled: !root.isProcessing
                 }
@@ -76,6 +107,52 @@ Item {
             }
         }
 
+        GroupBox {
+            title: "Encoder preset"
+            Layout.fillWidth: true
+
+            ColumnLayout {
+                anchors.fill: parent
+                spacing: 10
+
+                RowLayout {
+                    Layout.fillWidth: true
+                    spacing: 8
+
+                    ComboBox {
+                        id: presetCombo
+                        model: ["fast", "balanced", "small"]
+                        currentIndex: 1
+                        onCurrentTextChanged: root.selectedPreset = currentText
+                        Layout.fillWidth: true
+                        enabled: !root.isProcessing
+                    }
+
+                    BusyIndicator {
+                        running: root.isComparing
+                        visible: running
+                        Layout.preferredWidth: 24
+                        Layout.preferredHeight: 24
+                    }
+
+                    Button {
+                        text: "Compare"
+                        enabled: !root.isComparing
+                        ToolTip.visible: hovered
+                        ToolTip.text: "Encode with every preset and show the time and size of each"
+                        onClicked: appController.comparePresets(root.selectedFormat)
+                    }
+                }
+
+                Label {
+                    text: root.presetReport
+                    visible: root.presetReport !== ""
+                    font.pixelSize: 12
+                    color: "#999999"
+                }
+            }
+        }
+
         GroupBox {
             title: "Options"
             Layout.fillWidth: true
@@ -102,6 +179,45 @@ Item {
             }
         }
 
+        GroupBox {
+            title: "Export profile"
+            Layout.fillWidth: true
+
+            ColumnLayout {
+                anchors.fill: parent
+                spacing: 10
+
+                Label {
+                    text: "Every width and format, with a manifest:"
+                    color: "#666666"
+                }
+
+                RowLayout {
+                    Layout.fillWidth: true
+                    spacing: 8
+
+                    ComboBox {
+                        id: profileCombo
+                        model: ["web", "web-lossless", "thumbnails"]
+                        Layout.fillWidth: true
+                        enabled: !root.isProcessing
+                    }
+
+                    Button {
+                        text: "Export..."
+                        enabled: !root.isProcessing
+                        onClicked: exportFolderDialog.open()
+                    }
+                }
+            }
+        }
+
+        FolderDialog {
+            id: exportFolderDialog
+            title: "Export to folder"
+            onAccepted: appController.exportImage(profileCombo.currentText, selectedFolder)
+        }
+
         // Action buttons
         RowLayout {
             Layout.fillWidth: true
@@ -113,6 +229,7 @@ Item {
                 onClicked: {
                     root.updatingValues = true
                     root.selectedFormat = "JPEG"
+                    presetCombo.currentIndex = 1
                     root.updatingValues = false
                 }
             }
@@ -130,7 +247,7 @@ Item {
                 palette.buttonText: "white"
                 enabled: !root.isProcessing
                 onClicked: {
-                    appController.convertImage(root.selectedFormat)
+                    appController.convertImage(root.selectedFormat, root.selectedPreset)
                 }
             }
         }
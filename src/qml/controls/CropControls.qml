@@ -164,6 +164,14 @@ ColumnLayout {
                 }
             }
         }
+
+        // Keeps the JPEG data as is; the top-left corner snaps to the 8 or 16 pixel block grid
+        CheckBox {
+            id: losslessCheckBox
+            text: "Lossless (JPEG)"
+            checked: false
+            enabled: !root.isProcessing
+        }
     }
 
     // Aspect ratio timer
@@ -286,7 +294,8 @@ ColumnLayout {
                     xSpinBox.value,
                     ySpinBox.value,
                     widthSpinBox.value,
-                    heightSpinBox.value
+                    heightSpinBox.value,
+                    losslessCheckBox.checked
                 )
             }
         }
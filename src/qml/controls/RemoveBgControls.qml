@@ -74,6 +74,20 @@ ColumnLayout {
                 }
             }
 
+            Label {
+                text: "Quality"
+                color: "#666666"
+            }
+
+            // Auto picks a tier from the image size
+            ComboBox {
+                id: tierCombo
+                model: ["Auto", "Fast", "Balanced", "Best"]
+                currentIndex: 0
+                Layout.fillWidth: true
+                enabled: !root.isProcessing
+            }
+
             // Crop
             CheckBox {
                 id: cropCheckBox
@@ -125,7 +139,8 @@ ColumnLayout {
             onClicked: {
                 appController.removeBgImage(
                     bgColorPicker.color,
-                    cropCheckBox.checked
+                    cropCheckBox.checked,
+                    tierCombo.currentIndex === 0 ? "" : tierCombo.currentText.toLowerCase()
                 )
             }
         }
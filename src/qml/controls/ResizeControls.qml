@@ -30,6 +30,7 @@ ColumnLayout {
                 }
                 root.updatingValues = false
             }
+            appController.requestPreview({ width: widthSpinBox.value, height: heightSpinBox.value })
         }
     }
 
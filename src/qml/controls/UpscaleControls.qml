@@ -10,6 +10,7 @@ ColumnLayout {
     spacing: 24
 
     property bool isProcessing: false
+    property real progress: 0
     property bool updatingValues: false
     property int scale: 2
     property int originalWidth: 0
@@ -34,6 +35,11 @@ ColumnLayout {
 
         function onProcessingStarted(operation) {
             root.isProcessing = true
+            root.progress = 0
+        }
+
+        function onProcessingProgress(progress) {
+            root.progress = progress
         }
 
         function onProcessingCompleted(result) {
@@ -118,10 +124,16 @@ ColumnLayout {
         Item { Layout.fillWidth: true }
 
         BusyIndicator {
-            running: root.isProcessing
+            running: root.isProcessing && root.progress === 0
             visible: running
         }
 
+        ProgressBar {
+            value: root.progress
+            visible: root.isProcessing && root.progress > 0
+            Layout.preferredWidth: 80
+        }
+
         Button {
             text: "Apply"
             highlighted: true